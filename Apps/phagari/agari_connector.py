@@ -21,10 +21,12 @@ import requests
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
 import json
+import time
 import pytz
 from dateutil.parser import isoparse
 from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
 from bs4 import BeautifulSoup
 
 
@@ -46,6 +48,7 @@ class AgariConnector(BaseConnector):
 
         self._state = {}
         self._access_token = None
+        self._token_lock = Lock()
         self._client_id = None
         self._client_secret = None
         self._current_utc_time = None
@@ -600,6 +603,27 @@ class AgariConnector(BaseConnector):
 
         return action_result.set_status(phantom.APP_SUCCESS)
 
+    def _get_access_token(self, action_result, expired_token=None):
+        """
+        Return the current access token, generating one when there is none or when it has expired.
+
+        Workers of the on poll action share the token, so only the first of them that sees it expire
+        generates a new one, the others pick up the refreshed token.
+
+        :param action_result: object of ActionResult class
+        :param expired_token: token that was rejected by the API
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS(along with appropriate message), access token
+        """
+        with self._token_lock:
+            if self._access_token and self._access_token != expired_token:
+                return RetVal(phantom.APP_SUCCESS, self._access_token)
+
+            ret_val = self._generate_access_token(action_result)
+            if phantom.is_fail(ret_val):
+                return RetVal(action_result.get_status(), None)
+
+            return RetVal(phantom.APP_SUCCESS, self._access_token)
+
     def requests_retry_session(self, retries, backoff_factor, status_forcelist=[429], session=None):
         """
         Create and return a session object
@@ -679,19 +703,14 @@ class AgariConnector(BaseConnector):
         response obtained by making an API call
         """
         url = "{}{}".format(AGARI_BASE_URL, endpoint)
-        if headers is None:
-            headers = {}
+        # Copy the headers, they are shared by the workers of the on poll action
+        headers = dict(headers or {})
 
-        token = self._state.get(AGARI_OAUTH_TOKEN_STRING, {})
-        if not token.get(AGARI_OAUTH_ACCESS_TOKEN_STRING):
-            ret_val = self._generate_access_token(action_result)
-
-            if phantom.is_fail(ret_val):
-                return action_result.get_status(), None
+        ret_val, token = self._get_access_token(action_result)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status(), None
 
-            headers.update({
-                'Authorization': AGARI_AUTHORIZATION_HEADER.format(token=self._access_token)
-            })
+        headers['Authorization'] = AGARI_AUTHORIZATION_HEADER.format(token=token)
 
         ret_val, resp_json = self._make_rest_call(url, action_result, headers, params, data, json, method)
 
@@ -700,13 +719,11 @@ class AgariConnector(BaseConnector):
 
         if msg and ('403' in msg or '401' in msg):
             self.debug_print("Refreshing Agari API and re-trying request to [{}] because API token was expired or invalid with error code [{}]".format(url, msg))
-            ret_val = self._generate_access_token(action_result)
+            ret_val, token = self._get_access_token(action_result, expired_token=token)
             if phantom.is_fail(ret_val):
                 return action_result.get_status(), None
 
-            headers.update({
-                'Authorization': AGARI_AUTHORIZATION_HEADER.format(token=self._access_token)
-            })
+            headers['Authorization'] = AGARI_AUTHORIZATION_HEADER.format(token=token)
 
             ret_val, resp_json = self._make_rest_call(url, action_result, headers, params, data, json, method)
 
@@ -1105,7 +1122,8 @@ class AgariConnector(BaseConnector):
         :param action_result: object of ActionResult class
         :param updated_param: parameter dictionary
         :param max_results: max results to fetch
-        :return: phantom.APP_SUCCESS
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS(along with appropriate message),
+        generator of the enriched policy events
         """
         message_params = None
         # Add fields parameter will be applied to 'get message' API call. Hence, popping it from params.
@@ -1127,45 +1145,48 @@ class AgariConnector(BaseConnector):
             self.save_progress(AGARI_SUCC_NO_POLICY_EVENT_TO_INGEST)
             return action_result.set_status(phantom.APP_SUCCESS), []
 
-        non_ingested_policy_ids = []
-        # Validate 'add_fields' parameter for 'get message' and check if there are any valid events for ingestion.
-        for alert_event in alert_events:
-            policy_event_id = alert_event.get('id')
-            try:
-                ret_val, policy_event = self._make_rest_call_helper(action_result, AGARI_GET_POLICY_EVENT_ENDPOINT.format(id=policy_event_id), headers=self._headers)
-                if phantom.is_fail(ret_val):
-                    non_ingested_policy_ids.append(str(policy_event_id))
-                    continue
+        return phantom.APP_SUCCESS, self._enrich_policy_events(action_result, alert_events, message_params)
 
-                message_id = policy_event.get('alert_event', {}).get('collector_message_id')
-                if not message_id:
-                    non_ingested_policy_ids.append(str(policy_event_id))
-                    continue
+    def _enrich_policy_events(self, action_result, alert_events, message_params):
+        """
+        Fetch the policy event details and message of every alert event in a single concurrent pass.
 
-                ret_val, _ = self._make_rest_call_helper(action_result, AGARI_GET_MESSAGE_ENDPOINT.format(id=message_id), headers=self._headers, params=message_params)
-                if phantom.is_fail(ret_val):
-                    non_ingested_policy_ids.append(str(policy_event_id))
-                    error_msg = action_result.get_message()
-                    if AGARI_ERR_ADD_FIELDS in error_msg:
-                        return action_result.get_status(), []
-                    continue
-                break
-            except:
-                non_ingested_policy_ids.append(str(policy_event_id))
-                continue
-        else:
-            # Nothing to ingest. Hence, returning with the policy event IDs.
-            return action_result.set_status(phantom.APP_ERROR, AGARI_ERR_NO_POLICY_EVENT_INGESTED.format(', ID: '.join(non_ingested_policy_ids))), []
+        Results are yielded in the order of the alert events as soon as they are fetched, so they can be ingested
+        while later events are still being enriched. The first event whose message could be fetched validates the
+        'add_fields' parameter, an invalid value stops the pass before anything is yielded for it.
 
-        fetched_data = []
+        :param action_result: object of ActionResult class
+        :param alert_events: alert events to enrich
+        :param message_params: parameters of the 'get message' API call
+        :return: generator of status phantom.APP_ERROR/phantom.APP_SUCCESS(along with appropriate message), policy event data
+        """
+        non_ingested_policy_ids = []
         action_result_list = [ActionResult() for _ in range(len(alert_events))]
-        message_params_list = [message_params] * len(alert_events)
+
         with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
-            fetched_data = executor.map(self._get_results_helper, alert_events, action_result_list, message_params_list)
+            futures = [
+                executor.submit(self._get_results_helper, alert_event, worker_action_result, message_params)
+                for alert_event, worker_action_result in zip(alert_events, action_result_list)
+            ]
+
+            for alert_event, worker_action_result, future in zip(alert_events, action_result_list, futures):
+                data = future.result()
+                if data:
+                    yield phantom.APP_SUCCESS, data
+                    continue
 
-        filtered_fetched_data = [data for data in fetched_data if data]
+                error_msg = worker_action_result.get_message()
+                if error_msg and AGARI_ERR_ADD_FIELDS in error_msg:
+                    for pending in futures:
+                        pending.cancel()
+                    yield action_result.set_status(phantom.APP_ERROR, error_msg), None
+                    return
 
-        return phantom.APP_SUCCESS, filtered_fetched_data
+                non_ingested_policy_ids.append(str(alert_event.get('id')))
+
+        if len(non_ingested_policy_ids) == len(alert_events):
+            # Nothing to ingest. Hence, returning with the policy event IDs.
+            yield action_result.set_status(phantom.APP_ERROR, AGARI_ERR_NO_POLICY_EVENT_INGESTED.format(', ID: '.join(non_ingested_policy_ids))), None
 
     def _get_severity_from_message_trust_score(self, message_trust_score):
         """
@@ -1246,63 +1267,97 @@ class AgariConnector(BaseConnector):
 
         return artifact
 
+    def _save_container_chunk(self, action_result, containers, policy_event, update_state):
+        """
+        Save a chunk of containers, along with their artifacts, in a single call.
+
+        :param action_result: object of ActionResult class
+        :param containers: containers with their embedded artifacts
+        :param policy_event: last policy event of the chunk
+        :param update_state: whether the state should be updated once the chunk is saved
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS(along with appropriate message)
+        """
+        status, message, _ = self.save_containers(containers)
+        if phantom.is_fail(status):
+            self.debug_print("Error occurred while saving the containers: {}".format(message))
+            return action_result.set_status(phantom.APP_ERROR, "Error occurred while saving the containers: {}".format(message))
+
+        # Update state once the chunk is committed so that a failed chunk is fetched again on the next run
+        if update_state:
+            self._state[AGARI_LAST_INGESTED_POLICY_EVENT_DATE] = policy_event.get("created_at")
+            self._state[AGARI_LAST_INGESTED_POLICY_EVENT_ID] = policy_event.get("id")
+            self.save_state(self._state)
+            self.debug_print(AGARI_INGESTION_STATUS_UPDATED)
+
+        return phantom.APP_SUCCESS
+
     def _save_results(self, action_result, results, update_state_after, cef_mapping, sort):
         """
         Ingest policy events as container and messages as artifact.
 
         :param action_result: object of ActionResult class
-        :param results: data to ingest
-        :param update_state_after: threshold after which state file will be updated
+        :param results: generator of status and data to ingest
+        :param update_state_after: number of containers saved together, the state file is updated after each of them
         :param cef_mapping: mapping between the old and the new cef
         :param sort: sort direction
-        :return: phantom.APP_SUCCESS
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS(along with appropriate message)
         """
         self.save_progress("Ingesting the data")
         self.debug_print("Ingesting the data")
-        count = 1
+        # The state can only be updated along the way when the oldest policy events are ingested first
+        update_state = not self._is_poll_now and sort == "oldest_first"
+        first_policy_event = last_policy_event = None
+        containers = []
+        ingested_count = 0
+        start_time = time.time()
+
+        for ret_val, data in results:
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
 
-        for data in results:
-            policy_event_id = data.get('policy_event', {}).get('id')
             policy_event = data.get('policy_event', {})
             message = data.get('message', {})
+            if first_policy_event is None:
+                first_policy_event = policy_event
+            last_policy_event = policy_event
+
             severity = self._get_severity_from_message_trust_score(message.get('message_trust_score', '0'))
             container = self._get_container_data(policy_event, severity)
-            message_artifact = self._get_message_artifact_data(message, cef_mapping, severity)
-            policy_event_artifact = self._get_policy_event_artifact_data(policy_event)
-
-            status, message, container_id = self.save_container(container)
-            if phantom.is_fail(status):
-                self.debug_print("Error occurred while saving the container: ID {}: {}".format(container_id, message))
-                continue
-
-            policy_event_artifact['container_id'] = container_id
-            message_artifact['container_id'] = container_id
-            status, message, _ = self.save_artifacts([policy_event_artifact, message_artifact])
-            if phantom.is_fail(status):
-                self.debug_print("Error occurred while saving the artifact: {}".format(message))
-                continue
-
-            # Update state if the required number of container are ingested as per 'update_state_after'
-            if count == update_state_after and not self._is_poll_now and sort == "oldest_first":
-                self._state[AGARI_LAST_INGESTED_POLICY_EVENT_DATE] = policy_event.get("created_at")
-                self._state[AGARI_LAST_INGESTED_POLICY_EVENT_ID] = policy_event_id
-                self.save_state(self._state)
-                self.debug_print(AGARI_INGESTION_STATUS_UPDATED)
-                count = 0
+            container['artifacts'] = [
+                self._get_policy_event_artifact_data(policy_event),
+                self._get_message_artifact_data(message, cef_mapping, severity)
+            ]
+            containers.append(container)
+
+            if len(containers) == update_state_after:
+                ret_val = self._save_container_chunk(action_result, containers, policy_event, update_state)
+                if phantom.is_fail(ret_val):
+                    return action_result.get_status()
+                ingested_count += len(containers)
+                containers = []
+                self.save_progress("{} policy events ingested".format(ingested_count))
 
-            count += 1
+        if containers:
+            ret_val = self._save_container_chunk(action_result, containers, last_policy_event, update_state)
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+            ingested_count += len(containers)
 
-            self.save_progress("Policy event ID ({}) is ingested in container ID ({})".format(policy_event_id, container_id))
-            self.debug_print("Policy event ID ({}) is ingested in container ID ({})".format(policy_event_id, container_id))
+        elapsed_time = time.time() - start_time
+        action_result.update_summary({
+            "total_policy_events_ingested": ingested_count,
+            "containers_per_second": round(ingested_count / elapsed_time, 2) if elapsed_time else ingested_count
+        })
+        self.save_progress("{} policy events ingested".format(ingested_count))
 
         if not self._is_poll_now:
-            # Index will be 0 for latest first as we are fetching the data in descending order
-            index = 0 if sort == "latest_first" else -1
+            # The first policy event is the latest one for latest first as we are fetching the data in descending order
+            policy_event = first_policy_event if sort == "latest_first" else last_policy_event
 
             # Update state after polling cycle is complete
-            if results:
-                self._state[AGARI_LAST_INGESTED_POLICY_EVENT_DATE] = results[index].get('policy_event', {}).get('created_at')
-                self._state[AGARI_LAST_INGESTED_POLICY_EVENT_ID] = results[index].get('policy_event', {}).get('id')
+            if policy_event is not None:
+                self._state[AGARI_LAST_INGESTED_POLICY_EVENT_DATE] = policy_event.get('created_at')
+                self._state[AGARI_LAST_INGESTED_POLICY_EVENT_ID] = policy_event.get('id')
                 self.save_state(self._state)
                 self.debug_print(AGARI_INGESTION_STATUS_UPDATED)
                 self.save_progress(AGARI_INGESTION_STATUS_UPDATED)
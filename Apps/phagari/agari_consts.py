@@ -23,7 +23,7 @@ AGARI_API_SUPPORT_DATE_FORMAT = '%Y-%m-%dT%H:%M:%S.000-00:00'
 AGARI_DEFAULT_NUM_RETRIES = 5
 AGARI_DEFAULT_MAX_WORKERS = 1
 AGARI_DEFAULT_BACKOFF_FACTOR = 0.3
-AGARI_DEFAULT_UPDATE_STATE_AFTER = 1
+AGARI_DEFAULT_UPDATE_STATE_AFTER = 100
 AGARI_DEFAULT_DAYS = 14
 AGARI_MAX_DAYS = 14
 AGARI_LAST_INGESTED_POLICY_EVENT_DATE = 'last_ingested_policy_event_date'
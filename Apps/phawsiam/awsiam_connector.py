@@ -7,9 +7,11 @@ import json
 import hmac
 import hashlib
 import datetime
-import collections
 import sys
+import time
+import random
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import requests
 import xmltodict
 from bs4 import BeautifulSoup
@@ -44,6 +46,9 @@ class AwsIamConnector(BaseConnector):
         self._secret_key = None
         self._response_metadata_dict = None
         self._python_version = None
+        self._session = None
+        self._signing_key = None
+        self._signing_key_date = None
 
     def _handle_py_ver_compat_for_input_str(self, input_str, always_encode=False):
         """
@@ -253,17 +258,23 @@ class AwsIamConnector(BaseConnector):
         :param service_name: Service name whose requests are called
         return: Signature key generated using AWS Signature Version 4
         """
+        # The signing key only depends on the date, region and service, hence it is derived once per day
+        if self._signing_key_date == date_stamp:
+            return self._signing_key
+
         k_date = self._aws_sign(self._handle_py_ver_compat_for_input_str('{}{}'.format(AWSIAM_SIGNATURE_V4, self._secret_key), always_encode=True), date_stamp)
         k_region = self._aws_sign(k_date, region_name)
         k_service = self._aws_sign(k_region, service_name)
         k_signing = self._aws_sign(k_service, AWSIAM_SIGNATURE_V4_REQUEST)
+
+        self._signing_key, self._signing_key_date = k_signing, date_stamp
         return k_signing
 
     def _get_headers(self, current_time, params):
         """ This function is used to get headers for requests to be signed using AWS Signature Version 4.
 
         :param current_time: Current timestamp at time of making request
-        :param params: Request URL params
+        :param params: Canonical query string of the request, the exact one that is sent
         return: Headers generated by following AWS IAM Signature Version 4 authentication for making request call
         """
 
@@ -324,24 +335,93 @@ class AwsIamConnector(BaseConnector):
             params = OrderedDict()
         params[AWSIAM_JSON_VERSION] = AWSIAM_API_VERSION
 
-        # Sort the params based on the keys in alphabetical order because of Signature Signing Process of AWS IAM
-        params = collections.OrderedDict(sorted(params.items()))
+        # Sort the params based on the keys in alphabetical order because of Signature Signing Process of AWS IAM.
+        # The query string is encoded once and sent as is, so that the signed string is the one received by AWS.
+        query_string = urlencode(sorted(params.items()))
 
         try:
-            request_func = getattr(requests, method)
+            request_func = getattr(self._session, method)
         except AttributeError:
             return RetVal(action_result.set_status(phantom.APP_ERROR, "Invalid method: {0}".format(method)), resp_json)
 
-        try:
-            request_response = request_func(AWSIAM_SERVER_URL, data=data, params=params, timeout=timeout,
-                                            headers=self._get_headers(current_time=datetime.datetime.utcnow(),
-                                                                      params=urlencode(params)))
-        except Exception as e:
-            return RetVal(action_result.set_status(phantom.APP_ERROR, "Error Connecting to server. Details: {0}".
-                                                   format(self._get_error_message_from_exception(e))), resp_json)
+        for attempt in range(AWSIAM_MAX_RETRIES + 1):
+            # The headers are signed again for every attempt as the signature is bound to the request time
+            try:
+                request_response = request_func('{0}/?{1}'.format(AWSIAM_SERVER_URL, query_string), data=data, timeout=timeout,
+                                                headers=self._get_headers(current_time=datetime.datetime.utcnow(),
+                                                                          params=query_string))
+            except Exception as e:
+                return RetVal(action_result.set_status(phantom.APP_ERROR, "Error Connecting to server. Details: {0}".
+                                                       format(self._get_error_message_from_exception(e))), resp_json)
+
+            if attempt == AWSIAM_MAX_RETRIES or not self._is_throttled(request_response):
+                break
+
+            # Exponential backoff with jitter, so that the concurrent requests do not retry in lockstep
+            wait_time = min(2 ** attempt + random.random(), AWSIAM_RETRY_MAX_WAIT)
+            self.debug_print(AWSIAM_REQUEST_THROTTLED_MSG.format(wait_time=round(wait_time, 2)))
+            time.sleep(wait_time)
 
         return self._process_response(request_response, action_result)
 
+    def _is_throttled(self, response):
+        """ This function is used to check if the request was rejected because of the request rate.
+
+        :param response: Response data
+        :return: True if the request should be retried and False otherwise
+        """
+
+        if response.status_code in AWSIAM_RETRY_STATUS_CODES:
+            return True
+
+        return response.status_code == 400 and \
+            '<Code>{0}</Code>'.format(AWSIAM_THROTTLING_ERROR_CODE) in (response.text or '')
+
+    def _make_concurrent_rest_calls(self, action_result, params_list):
+        """ This function is used to make independent REST calls concurrently.
+
+        :param action_result: Object of ActionResult class
+        :param params_list: List of request parameters, one for every REST call
+        :return: Status phantom.APP_ERROR/phantom.APP_SUCCESS(along with appropriate message)
+        """
+
+        if not params_list:
+            return phantom.APP_SUCCESS
+
+        # Every call gets its own action result, the first failure is then reported on the action result of the action
+        call_results = [ActionResult() for _ in params_list]
+
+        with ThreadPoolExecutor(max_workers=min(AWSIAM_MAX_CONCURRENT_REQUESTS, len(params_list))) as executor:
+            ret_vals = list(executor.map(lambda call: self._make_rest_call(action_result=call[0], params=call[1])[0],
+                                         zip(call_results, params_list)))
+
+        for ret_val, call_result in zip(ret_vals, call_results):
+            if phantom.is_fail(ret_val):
+                return action_result.set_status(phantom.APP_ERROR, call_result.get_message())
+
+        return phantom.APP_SUCCESS
+
+    def _get_list_items_concurrently(self, action_result, list_requests):
+        """ This function is used to fetch the paginated response lists of independent requests concurrently.
+
+        :param action_result: Object of ActionResult class
+        :param list_requests: List of (params, key) tuples as expected by _get_list_items
+        :return: List of dictionaries as returned by _get_list_items in the order of the requests, None on failure
+        """
+
+        call_results = [ActionResult() for _ in list_requests]
+
+        with ThreadPoolExecutor(max_workers=min(AWSIAM_MAX_CONCURRENT_REQUESTS, len(list_requests))) as executor:
+            responses = list(executor.map(lambda call: self._get_list_items(call[0], call[1][0], call[1][1]),
+                                          zip(call_results, list_requests)))
+
+        for response, call_result in zip(responses, call_results):
+            if response is None:
+                action_result.set_status(phantom.APP_ERROR, call_result.get_message())
+                return None
+
+        return responses
+
     def _handle_test_connectivity(self, param):
         """ This function is used to handle the test connectivity action.
 
@@ -670,73 +750,64 @@ class AwsIamConnector(BaseConnector):
             return action_result.set_status(phantom.APP_SUCCESS, AWSIAM_NO_NEED_TO_REMOVE_ROLE_MSG.
                                             format(role_name=role_name))
 
-        # 1. Delete all attached instance profiles with the role
-        # a) List all attached instance profiles with the role
-        params = OrderedDict()
-        params[AWSIAM_JSON_ACTION] = AWSIAM_GET_ROLE_INSTANCE_PROFILES_ENDPOINT
-        params[AWSIAM_JSON_ROLE_NAME] = role_name
+        # 1. List all attached instance profiles and policies with the role, both lists are independent of each other
+        instance_profiles_params = OrderedDict()
+        instance_profiles_params[AWSIAM_JSON_ACTION] = AWSIAM_GET_ROLE_INSTANCE_PROFILES_ENDPOINT
+        instance_profiles_params[AWSIAM_JSON_ROLE_NAME] = role_name
+
+        policies_params = OrderedDict()
+        policies_params[AWSIAM_JSON_ACTION] = AWSIAM_GET_ROLE_POLICIES_ENDPOINT
+        policies_params[AWSIAM_JSON_ROLE_NAME] = role_name
 
-        instance_profiles_dict = self._get_list_items(action_result, params, AWSIAM_JSON_INSTANCE_PROFILES)
+        list_responses = self._get_list_items_concurrently(action_result, [
+            (instance_profiles_params, AWSIAM_JSON_INSTANCE_PROFILES),
+            (policies_params, AWSIAM_JSON_ROLE_POLICIES)])
 
-        if instance_profiles_dict is None:
+        if list_responses is None:
             return action_result.get_status()
 
+        instance_profiles_dict, policies_dict = list_responses
         list_instance_profiles = instance_profiles_dict[AWSIAM_JSON_LIST_RESPONSE]
+        list_policies = policies_dict[AWSIAM_JSON_LIST_RESPONSE]
 
+        # 2. Remove role from every instance profile and detach every policy from the role
+        params_list = []
         for instance_profile in list_instance_profiles:
-            # b) Remove role from instance profile
             params = OrderedDict()
             params[AWSIAM_JSON_ACTION] = AWSIAM_DETACH_ROLE_INSTANCE_PROFILE_ENDPOINT
             params[AWSIAM_JSON_INSTANCE_PROFILE_NAME] = instance_profile[AWSIAM_JSON_INSTANCE_PROFILE_NAME].\
                 encode('utf-8')
             params[AWSIAM_JSON_ROLE_NAME] = role_name
+            params_list.append(params)
 
-            # make rest call
-            ret_val, response = self._make_rest_call(action_result=action_result, params=params)
+        for policy in list_policies:
+            params = OrderedDict()
+            params[AWSIAM_JSON_ACTION] = AWSIAM_DETACH_ROLE_POLICY_ENDPOINT
+            params[AWSIAM_JSON_POLICY_ARN] = self._handle_py_ver_compat_for_input_str(policy[AWSIAM_JSON_POLICY_ARN])
+            params[AWSIAM_JSON_ROLE_NAME] = role_name
+            params_list.append(params)
 
-            if phantom.is_fail(ret_val):
-                return action_result.get_status()
+        ret_val = self._make_concurrent_rest_calls(action_result, params_list)
+
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
 
-            # c) Delete the instance profiles also to maintain consistency with the role to role instance profile
+        # 3. Delete the instance profiles also to maintain consistency with the role to role instance profile
+        params_list = []
+        for instance_profile in list_instance_profiles:
             params = OrderedDict()
             params[AWSIAM_JSON_ACTION] = AWSIAM_DELETE_INSTANCE_PROFILE_ENDPOINT
             params[AWSIAM_JSON_INSTANCE_PROFILE_NAME] = instance_profile[AWSIAM_JSON_INSTANCE_PROFILE_NAME].\
                 encode('utf-8')
+            params_list.append(params)
 
-            # make rest call
-            ret_val, response = self._make_rest_call(action_result=action_result, params=params)
-
-            if phantom.is_fail(ret_val):
-                self.save_progress(AWSIAM_ACTION_FAILED_MESSAGE.format(action_name=self.get_action_identifier()))
-                return action_result.get_status()
-
-        # 2. Delete all attached policies with the role
-        # a) List all attached policies with the role
-        params = OrderedDict()
-        params[AWSIAM_JSON_ACTION] = AWSIAM_GET_ROLE_POLICIES_ENDPOINT
-        params[AWSIAM_JSON_ROLE_NAME] = role_name
-
-        policies_dict = self._get_list_items(action_result, params, AWSIAM_JSON_ROLE_POLICIES)
+        ret_val = self._make_concurrent_rest_calls(action_result, params_list)
 
-        if policies_dict is None:
+        if phantom.is_fail(ret_val):
+            self.save_progress(AWSIAM_ACTION_FAILED_MESSAGE.format(action_name=self.get_action_identifier()))
             return action_result.get_status()
 
-        list_policies = policies_dict[AWSIAM_JSON_LIST_RESPONSE]
-
-        for policy in list_policies:
-            # b) Remove user from every policy
-            params = OrderedDict()
-            params[AWSIAM_JSON_ACTION] = AWSIAM_DETACH_ROLE_POLICY_ENDPOINT
-            params[AWSIAM_JSON_POLICY_ARN] = self._handle_py_ver_compat_for_input_str(policy[AWSIAM_JSON_POLICY_ARN])
-            params[AWSIAM_JSON_ROLE_NAME] = role_name
-
-            # make rest call
-            ret_val, response = self._make_rest_call(action_result=action_result, params=params)
-
-            if phantom.is_fail(ret_val):
-                return action_result.get_status()
-
-        # 3. Delete role
+        # 4. Delete role
         params = OrderedDict()
         params[AWSIAM_JSON_ACTION] = AWSIAM_DELETE_ROLE_ENDPOINT
         params[AWSIAM_JSON_ROLE_NAME] = role_name
@@ -897,8 +968,8 @@ class AwsIamConnector(BaseConnector):
         return action_result.set_status(phantom.APP_SUCCESS, AWSIAM_ADD_ROLE_MSG.format(role_name=role_name))
 
     def _handle_delete_user(self, param):
-        """ This function is used to delete the user and all associations with login profile, polices, roles, groups,
-        and access keys for the same user.
+        """ This function is used to delete the users and all associations with login profile, polices, roles, groups,
+        and access keys for the same users.
 
         :param param: Dictionary of input parameters
         :return: Status(phantom.APP_SUCCESS/phantom.APP_ERROR)
@@ -907,7 +978,59 @@ class AwsIamConnector(BaseConnector):
         self.save_progress("In action handler for: {0}".format(self.get_action_identifier()))
         action_result = self.add_action_result(ActionResult(dict(param)))
 
-        username = param[AWSIAM_PARAM_USERNAME]
+        # The username parameter is taken as is since AWS IAM user names can contain commas,
+        # only the usernames parameter is a comma-separated list meant for bulk deletion
+        usernames = []
+        username = param.get(AWSIAM_PARAM_USERNAME)
+        if username:
+            usernames.append(username)
+
+        for username in param.get(AWSIAM_PARAM_USERNAMES, '').split(','):
+            username = username.strip()
+            if username and username not in usernames:
+                usernames.append(username)
+
+        if not usernames:
+            return action_result.set_status(phantom.APP_ERROR, AWSIAM_EMPTY_USERNAME_LIST_MSG)
+
+        # A failure for one of the users does not stop the deletion of the remaining users
+        failed_users = []
+        for username in usernames:
+            self.send_progress("Deleting user {0}".format(username))
+            ret_val, response = self._delete_user(action_result, username)
+
+            if phantom.is_fail(ret_val):
+                failed_users.append('{0}: {1}'.format(username, action_result.get_message()))
+                continue
+
+            action_result.add_data(response)
+
+        summary = action_result.update_summary({})
+        summary['total_users_deleted'] = len(usernames) - len(failed_users)
+        summary['total_users_failed'] = len(failed_users)
+
+        # For a single user, the message of the deletion is reported as is
+        if len(usernames) == 1:
+            if failed_users:
+                return action_result.get_status()
+
+            return action_result.set_status(phantom.APP_SUCCESS, AWSIAM_USER_DELETED_MSG.format(username=usernames[0]))
+
+        if failed_users:
+            return action_result.set_status(phantom.APP_ERROR, AWSIAM_USERS_DELETION_FAILED_MSG.format(
+                failed=len(failed_users), total=len(usernames), details='; '.join(failed_users)))
+
+        return action_result.set_status(phantom.APP_SUCCESS, AWSIAM_USERS_DELETED_MSG.format(count=len(usernames)))
+
+    def _delete_user(self, action_result, username):
+        """ This function is used to delete the user and all associations with login profile, polices, groups, and
+        access keys for the same user.
+
+        :param action_result: Object of ActionResult class
+        :param username: AWS IAM user name to delete
+        :return: Status phantom.APP_ERROR/phantom.APP_SUCCESS(along with appropriate message),
+        response metadata of the delete user request along with the user name
+        """
 
         # 1. Delete login profile of the user
         params = OrderedDict()
@@ -922,87 +1045,54 @@ class AwsIamConnector(BaseConnector):
             # 404 error is thrown and it needs to be handled for delete user action
             if not AWSIAM_USER_LOGIN_PROFILE_ALREADY_DELETED_MSG.format(username=username).lower() in \
                    action_result.get_message().lower():
-                return action_result.get_status()
+                return RetVal(action_result.get_status())
 
-        # 2. Delete all attached policies of user
-        # a) List all user policies
-        params = OrderedDict()
-        params[AWSIAM_JSON_ACTION] = AWSIAM_GET_USER_POLICIES_ENDPOINT
-        params[AWSIAM_JSON_USERNAME] = username
+        # 2. List all attached policies, groups and access keys of the user, the lists are independent of each other
+        list_requests = []
+        for endpoint, key in ((AWSIAM_GET_USER_POLICIES_ENDPOINT, AWSIAM_JSON_POLICIES),
+                              (AWSIAM_GET_USER_GROUPS_ENDPOINT, AWSIAM_JSON_GROUPS),
+                              (AWSIAM_LIST_ACCESS_KEYS_ENDPOINT, AWSIAM_JSON_ACCESS_KEYS)):
+            params = OrderedDict()
+            params[AWSIAM_JSON_ACTION] = endpoint
+            params[AWSIAM_JSON_USERNAME] = username
+            list_requests.append((params, key))
 
-        policies_dict = self._get_list_items(action_result, params, AWSIAM_JSON_POLICIES)
+        list_responses = self._get_list_items_concurrently(action_result, list_requests)
 
-        if policies_dict is None:
-            return action_result.get_status()
+        if list_responses is None:
+            return RetVal(action_result.get_status())
 
-        list_policies = policies_dict[AWSIAM_JSON_LIST_RESPONSE]
+        policies_dict, groups_dict, access_keys_dict = list_responses
 
-        for policy in list_policies:
-            # b) Remove user from every policy
+        # 3. Detach every policy, remove user from every group and delete every access key of the user
+        params_list = []
+        for policy in policies_dict[AWSIAM_JSON_LIST_RESPONSE]:
             params = OrderedDict()
             params[AWSIAM_JSON_ACTION] = AWSIAM_DETACH_USER_POLICY_ENDPOINT
             params[AWSIAM_JSON_POLICY_ARN] = self._handle_py_ver_compat_for_input_str(policy[AWSIAM_JSON_POLICY_ARN])
             params[AWSIAM_JSON_USERNAME] = username
+            params_list.append(params)
 
-            # make rest call
-            ret_val, response = self._make_rest_call(action_result=action_result, params=params)
-
-            if phantom.is_fail(ret_val):
-                return action_result.get_status()
-
-        # 3. Remove user from all groups
-        # a) List all user groups
-        params = OrderedDict()
-        params[AWSIAM_JSON_ACTION] = AWSIAM_GET_USER_GROUPS_ENDPOINT
-        params[AWSIAM_JSON_USERNAME] = username
-
-        groups_dict = self._get_list_items(action_result, params, AWSIAM_JSON_GROUPS)
-
-        if groups_dict is None:
-            return action_result.get_status()
-
-        list_groups = groups_dict[AWSIAM_JSON_LIST_RESPONSE]
-
-        for group in list_groups:
-            # b) Remove user from every group
+        for group in groups_dict[AWSIAM_JSON_LIST_RESPONSE]:
             params = OrderedDict()
             params[AWSIAM_JSON_ACTION] = AWSIAM_REMOVE_USER_FROM_GROUP_ENDPOINT
             params[AWSIAM_JSON_GROUP_NAME] = self._handle_py_ver_compat_for_input_str(group[AWSIAM_JSON_GROUP_NAME])
             params[AWSIAM_JSON_USERNAME] = username
+            params_list.append(params)
 
-            # make rest call
-            ret_val, response = self._make_rest_call(action_result=action_result, params=params)
-
-            if phantom.is_fail(ret_val):
-                return action_result.get_status()
-
-        # 4. Remove user access keys
-        # a) List all user access keys
-        params = OrderedDict()
-        params[AWSIAM_JSON_ACTION] = AWSIAM_LIST_ACCESS_KEYS_ENDPOINT
-        params[AWSIAM_JSON_USERNAME] = username
-
-        access_keys_dict = self._get_list_items(action_result, params, AWSIAM_JSON_ACCESS_KEYS)
-
-        if access_keys_dict is None:
-            return action_result.get_status()
-
-        list_access_keys = access_keys_dict[AWSIAM_JSON_LIST_RESPONSE]
-
-        for access_key in list_access_keys:
-            # b) Remove user from every group
+        for access_key in access_keys_dict[AWSIAM_JSON_LIST_RESPONSE]:
             params = OrderedDict()
             params[AWSIAM_JSON_ACCESS_KEY_ID] = self._handle_py_ver_compat_for_input_str(access_key[AWSIAM_JSON_ACCESS_KEY_ID])
             params[AWSIAM_JSON_ACTION] = AWSIAM_DELETE_ACCESS_KEYS_ENDPOINT
             params[AWSIAM_JSON_USERNAME] = username
+            params_list.append(params)
 
-            # make rest call
-            ret_val, response = self._make_rest_call(action_result=action_result, params=params)
+        ret_val = self._make_concurrent_rest_calls(action_result, params_list)
 
-            if phantom.is_fail(ret_val):
-                return action_result.get_status()
+        if phantom.is_fail(ret_val):
+            return RetVal(action_result.get_status())
 
-        # 5. Delete user
+        # 4. Delete user
         params = OrderedDict()
         params[AWSIAM_JSON_ACTION] = AWSIAM_DELETE_USER_ENDPOINT
         params[AWSIAM_JSON_USERNAME] = username
@@ -1011,11 +1101,12 @@ class AwsIamConnector(BaseConnector):
         ret_val, response = self._make_rest_call(action_result=action_result, params=params)
 
         if phantom.is_fail(ret_val):
-            return action_result.get_status()
+            return RetVal(action_result.get_status())
 
-        action_result.add_data(response[AWSIAM_JSON_DELETE_USER_RESPONSE][AWSIAM_JSON_RESPONSE_METADATA])
+        response_dict = response[AWSIAM_JSON_DELETE_USER_RESPONSE][AWSIAM_JSON_RESPONSE_METADATA]
+        response_dict[AWSIAM_JSON_USERNAME] = username
 
-        return action_result.set_status(phantom.APP_SUCCESS, AWSIAM_USER_DELETED_MSG.format(username=username))
+        return RetVal(phantom.APP_SUCCESS, response_dict)
 
     def _handle_remove_user(self, param):
         """ This function is used to remove user from the specified group.
@@ -1395,6 +1486,9 @@ class AwsIamConnector(BaseConnector):
         self._secret_key = config[AWSIAM_SECRET_KEY]
         self._response_metadata_dict = self._get_response_metadata_dict()
 
+        # Keep-alive session shared by all the requests of this run
+        self._session = requests.Session()
+
         return phantom.APP_SUCCESS
 
     def finalize(self):
@@ -1408,6 +1502,10 @@ class AwsIamConnector(BaseConnector):
 
         # Save the state, this data is saved across actions and app upgrades
         self.save_state(self._state)
+
+        if self._session:
+            self._session.close()
+
         return phantom.APP_SUCCESS
 
 
@@ -13,6 +13,11 @@ AWSIAM_API_VERSION = '2010-05-08'
 AWSIAM_SIGNATURE_V4_REQUEST = 'aws4_request'
 AWSIAM_REQUESTS_SIGNING_ALGO = 'AWS4-HMAC-SHA256'
 AWSIAM_SIGNED_HEADERS = 'host;x-amz-date'
+AWSIAM_MAX_CONCURRENT_REQUESTS = 5
+AWSIAM_MAX_RETRIES = 5
+AWSIAM_RETRY_MAX_WAIT = 30
+AWSIAM_RETRY_STATUS_CODES = (429, 503)
+AWSIAM_THROTTLING_ERROR_CODE = 'Throttling'
 AWSIAM_TEST_CONNECTIVITY_ENDPOINT = 'GetUser'
 AWSIAM_GET_USER_GROUPS_ENDPOINT = 'ListGroupsForUser'
 AWSIAM_GET_USER_POLICIES_ENDPOINT = 'ListAttachedUserPolicies'
@@ -43,6 +48,7 @@ AWSIAM_GET_ROLE_INSTANCE_PROFILE_ENDPOINT = 'GetInstanceProfile'
 AWSIAM_DELETE_INSTANCE_PROFILE_ENDPOINT = 'DeleteInstanceProfile'
 AWSIAM_LIST_GROUPS_ENDPOINT = 'ListGroups'
 AWSIAM_PARAM_USERNAME = 'username'
+AWSIAM_PARAM_USERNAMES = 'usernames'
 AWSIAM_PARAM_PASSWORD = 'password'
 AWSIAM_PARAM_GROUP_NAME = 'group_name'
 AWSIAM_PARAM_ROLE_NAME = 'role_name'
@@ -147,6 +153,11 @@ AWSIAM_USER_DELETED_MSG = 'User {username} deleted successfully along with all i
                           'access keys, groups, and policies'
 AWSIAM_ROLE_DELETED_MSG = 'Role {role_name} removed successfully along with all its associations with login instance ' \
                           'profiles and policies'
+AWSIAM_USERS_DELETED_MSG = '{count} users deleted successfully along with all their associations with login profile, ' \
+                           'access keys, groups, and policies'
+AWSIAM_USERS_DELETION_FAILED_MSG = 'Failed to delete {failed} out of {total} users. Details: {details}'
+AWSIAM_EMPTY_USERNAME_LIST_MSG = 'Please provide at least one valid username in the username or usernames parameter'
+AWSIAM_REQUEST_THROTTLED_MSG = 'Request throttled by AWS IAM, retrying in {wait_time} seconds'
 AWSIAM_USER_LOGIN_PROFILE_ALREADY_DELETED_MSG = 'Login profile for user {username} cannot be found'
 AWSIAM_USER_LOGIN_PROFILE_ALREADY_EXISTS_MSG = 'Login profile for user {username} already exists'
 AWSIAM_ROLE_DOES_NOT_EXISTS_MSG = 'Name {role_name} cannot be found'
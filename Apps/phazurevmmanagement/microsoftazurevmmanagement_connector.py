@@ -16,6 +16,8 @@ from bs4 import UnicodeDammit
 
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
 import time
 import pwd
 import grp
@@ -253,6 +255,9 @@ class MicrosoftAzureVmManagementConnector(BaseConnector):
         self._access_token = None
         self._refresh_token = None
         self._python_version = None
+        self._session = None
+        self._operation_timeout = None
+        self._token_lock = Lock()
 
     def _process_empty_response(self, response, action_result):
         """ This function is used to process empty response.
@@ -486,7 +491,7 @@ class MicrosoftAzureVmManagementConnector(BaseConnector):
                                                                 asset_name)
         return phantom.APP_SUCCESS, url_to_app_rest
 
-    def _make_rest_call(self, endpoint, action_result, verify=True, headers=None, params=None, data=None, json=None, method="get"):
+    def _make_rest_call(self, endpoint, action_result, verify=True, headers=None, params=None, data=None, json=None, method="get", response_info=None):
         """ Function that makes the REST call to the app.
 
         :param endpoint: REST endpoint that needs to appended to the service address
@@ -497,6 +502,7 @@ class MicrosoftAzureVmManagementConnector(BaseConnector):
         :param json: JSON object
         :param method: GET/POST/PUT/DELETE/PATCH (Default will be GET)
         :param verify: verify server certificate (Default True)
+        :param response_info: dictionary that receives the status code and headers of the response (Default None)
         :return: status phantom.APP_ERROR/phantom.APP_SUCCESS(along with appropriate message),
         response obtained by making an API call
         """
@@ -504,7 +510,7 @@ class MicrosoftAzureVmManagementConnector(BaseConnector):
         resp_json = None
 
         try:
-            request_func = getattr(requests, method)
+            request_func = getattr(self._session, method)
         except AttributeError:
             return RetVal(action_result.set_status(phantom.APP_ERROR, "Invalid method: {0}".format(method)), resp_json)
 
@@ -518,12 +524,15 @@ class MicrosoftAzureVmManagementConnector(BaseConnector):
             return RetVal(action_result.set_status(phantom.APP_ERROR, "Error Connecting to server. Details: {0}"
                                                    .format(error_msg)), resp_json)
 
+        if response_info is not None:
+            response_info.update({'status_code': r.status_code, 'headers': r.headers})
+
         return self._process_response(r, action_result)
 
-    def _make_rest_call_helper(self, endpoint, action_result, verify=True, headers=None, params=None, data=None, json=None, method="get"):
+    def _make_rest_call_helper(self, endpoint, action_result, verify=True, headers=None, params=None, data=None, json=None, method="get", response_info=None):
         """ Function that helps setting REST call to the app.
 
-        :param endpoint: REST endpoint that needs to appended to the service address
+        :param endpoint: REST endpoint that needs to appended to the service address, or an absolute URL returned by ARM
         :param action_result: object of ActionResult class
         :param headers: request headers
         :param params: request parameters
@@ -531,43 +540,142 @@ class MicrosoftAzureVmManagementConnector(BaseConnector):
         :param json: JSON object
         :param method: GET/POST/PUT/DELETE/PATCH (Default will be GET)
         :param verify: verify server certificate (Default True)
+        :param response_info: dictionary that receives the status code and headers of the response (Default None)
         :return: status phantom.APP_ERROR/phantom.APP_SUCCESS(along with appropriate message),
         response obtained by making an API call
         """
 
-        url = "{0}{1}".format(MS_BASE_URL.format(subscriptionId=self._subscription), endpoint)
+        if endpoint.startswith(MS_AZURE_MANAGEMENT_URL):
+            # nextLink and operation URLs returned by ARM are already absolute
+            url = endpoint
+        else:
+            url = "{0}{1}".format(MS_BASE_URL.format(subscriptionId=self._subscription), endpoint)
         if (headers is None):
             headers = {}
 
-        token = self._state.get('token', {})
-        if not token.get('access_token'):
-            ret_val = self._get_token(action_result)
+        ret_val, access_token = self._get_access_token(action_result)
 
-            if phantom.is_fail(ret_val):
-                return action_result.get_status(), None
+        if phantom.is_fail(ret_val):
+            return action_result.get_status(), None
 
         headers.update({
-                'Authorization': 'Bearer {0}'.format(self._access_token),
+                'Authorization': 'Bearer {0}'.format(access_token),
                 'Accept': 'application/json',
                 'Content-Type': 'application/json'})
 
-        ret_val, resp_json = self._make_rest_call(url, action_result, verify, headers, params, data, json, method)
+        ret_val, resp_json = self._make_rest_call(url, action_result, verify, headers, params, data, json, method, response_info)
 
         # If token is expired, generate a new token
         msg = action_result.get_message()
 
-        if msg and 'token is invalid' in msg or 'Access token has expired' in msg or 'ExpiredAuthenticationToken' in msg or 'AuthenticationFailed' in msg:
-            ret_val = self._get_token(action_result)
+        if msg and ('token is invalid' in msg or 'Access token has expired' in msg or 'ExpiredAuthenticationToken' in msg or 'AuthenticationFailed' in msg):
+            ret_val, access_token = self._get_access_token(action_result, expired_token=access_token)
+
+            if phantom.is_fail(ret_val):
+                return action_result.get_status(), None
 
-            headers.update({ 'Authorization': 'Bearer {0}'.format(self._access_token)})
+            headers.update({ 'Authorization': 'Bearer {0}'.format(access_token)})
 
-            ret_val, resp_json = self._make_rest_call(url, action_result, verify, headers, params, data, json, method)
+            ret_val, resp_json = self._make_rest_call(url, action_result, verify, headers, params, data, json, method, response_info)
 
         if phantom.is_fail(ret_val):
             return action_result.get_status(), None
 
         return phantom.APP_SUCCESS, resp_json
 
+    def _get_access_token(self, action_result, expired_token=None):
+        """ Function that returns the current access token, generating one when there is none or when it has expired.
+
+        The workers of the concurrent VM operations and resource group listings share the token, so only the first of
+        them that sees it expire generates a new one, the others pick up the refreshed token.
+
+        :param action_result: object of ActionResult class
+        :param expired_token: token that was rejected by the API (Default None)
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS(along with appropriate message), access token
+        """
+
+        with self._token_lock:
+            if self._access_token and self._access_token != expired_token:
+                return RetVal(phantom.APP_SUCCESS, self._access_token)
+
+            ret_val = self._get_token(action_result)
+
+            if phantom.is_fail(ret_val):
+                return RetVal(action_result.get_status(), None)
+
+            return RetVal(phantom.APP_SUCCESS, self._access_token)
+
+    def _list_resources(self, endpoint, action_result, add_item):
+        """ This function is used to list all the resources of an ARM collection, following nextLink across pages.
+
+        :param endpoint: REST endpoint of the first page
+        :param action_result: object of ActionResult class
+        :param add_item: function called with each resource as soon as its page is received
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS(along with appropriate message), number of resources listed
+        """
+
+        count = 0
+        while endpoint:
+            ret_val, response = self._make_rest_call_helper(endpoint, action_result)
+
+            if phantom.is_fail(ret_val):
+                return RetVal(action_result.get_status(), count)
+
+            values = response.get('value', [])
+            for value in values:
+                add_item(value)
+            count += len(values)
+
+            endpoint = response.get('nextLink')
+
+        return RetVal(phantom.APP_SUCCESS, count)
+
+    def _list_resources_in_groups(self, action_result, resource_group_names, get_endpoint):
+        """ This function is used to list the resources of one or more resource groups into the action result.
+        Multiple resource groups are listed concurrently.
+
+        :param action_result: object of ActionResult class
+        :param resource_group_names: list of resource group names, empty to list the whole subscription
+        :param get_endpoint: function returning the REST endpoint of a resource group name (None for the whole subscription)
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS(along with appropriate message), number of resources listed
+        """
+
+        if len(resource_group_names) <= 1:
+            resource_group_name = resource_group_names[0] if resource_group_names else None
+            return self._list_resources(get_endpoint(resource_group_name), action_result, action_result.add_data)
+
+        def list_resource_group(resource_group_name):
+            # Each worker reports errors on its own action result, the resources go straight into the shared one
+            group_result = ActionResult()
+            ret_val, count = self._list_resources(get_endpoint(resource_group_name), group_result, action_result.add_data)
+            return resource_group_name, ret_val, group_result.get_message(), count
+
+        total_count = 0
+        with ThreadPoolExecutor(max_workers=min(MS_AZURE_MAX_CONCURRENT_REQUESTS, len(resource_group_names))) as executor:
+            for resource_group_name, ret_val, message, count in executor.map(list_resource_group, resource_group_names):
+                if phantom.is_fail(ret_val):
+                    return RetVal(action_result.set_status(phantom.APP_ERROR, "Error occurred while listing the resource group '{0}'. {1}".format(
+                        resource_group_name, message)), total_count)
+                total_count += count
+
+        return RetVal(phantom.APP_SUCCESS, total_count)
+
+    def _get_resource_group_names(self, param):
+        """ This function is used to get the list of resource group names from a comma-separated action parameter.
+
+        :param param: Dictionary of input parameters
+        :return: list of unique resource group names
+        """
+
+        resource_group_names = []
+        value = self._handle_py_ver_compat_for_input_str(param.get('resource_group_name'))
+        for name in (value or '').split(','):
+            name = name.strip()
+            if name and name not in resource_group_names:
+                resource_group_names.append(name)
+
+        return resource_group_names
+
     def _get_admin_access(self, action_result, app_rest_url, app_state):
         """ This function is used to get admin access for given credentials.
 
@@ -635,6 +743,146 @@ class MicrosoftAzureVmManagementConnector(BaseConnector):
 
         return self.set_status(phantom.APP_SUCCESS)
 
+    def _get_retry_after(self, headers):
+        """ This function is used to get the number of seconds to wait before polling an operation again.
+
+        :param headers: headers of the last response received for the operation
+        :return: number of seconds to wait
+        """
+
+        try:
+            retry_after = int(headers.get('Retry-After', MS_AZURE_OPERATION_POLL_INTERVAL))
+        except (TypeError, ValueError):
+            retry_after = MS_AZURE_OPERATION_POLL_INTERVAL
+
+        return min(max(retry_after, 1), MS_AZURE_OPERATION_MAX_POLL_INTERVAL)
+
+    def _wait_for_operation(self, action_result, response_info, response):
+        """ This function is used to wait for a long-running ARM operation to reach a terminal state.
+        The Azure-AsyncOperation URL is preferred over the Location URL, and Retry-After is honored between polls.
+
+        :param action_result: object of ActionResult class
+        :param response_info: status code and headers of the response that accepted the operation
+        :param response: body of the response that accepted the operation
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS(along with appropriate message), final result of the operation
+        """
+
+        headers = response_info.get('headers', {})
+        operation_url = headers.get('Azure-AsyncOperation')
+        location_url = headers.get('Location')
+
+        if not (operation_url or location_url):
+            # The operation completed synchronously
+            return RetVal(phantom.APP_SUCCESS, response)
+
+        deadline = time.time() + self._operation_timeout
+        while True:
+            time.sleep(self._get_retry_after(headers))
+
+            if time.time() > deadline:
+                return RetVal(action_result.set_status(phantom.APP_ERROR, MS_AZURE_OPERATION_TIMEOUT_MSG.format(timeout=self._operation_timeout)), None)
+
+            response_info = {}
+            ret_val, response = self._make_rest_call_helper(operation_url or location_url, action_result, response_info=response_info)
+
+            if phantom.is_fail(ret_val):
+                return RetVal(action_result.get_status(), None)
+
+            headers = response_info.get('headers', {})
+
+            if operation_url:
+                status = response.get('status')
+                if status not in MS_AZURE_OPERATION_TERMINAL_STATES:
+                    continue
+                if status != 'Succeeded':
+                    error = response.get('error', {}).get('message', 'Unavailable')
+                    return RetVal(action_result.set_status(phantom.APP_ERROR, MS_AZURE_OPERATION_FAILED_MSG.format(status=status, err_msg=error)), response)
+                return RetVal(phantom.APP_SUCCESS, response)
+
+            # The Location URL keeps answering 202 until the operation is done
+            if response_info.get('status_code') != 202:
+                return RetVal(phantom.APP_SUCCESS, response)
+
+    def _get_vm_names(self, param):
+        """ This function is used to get the list of VM names from a comma-separated action parameter.
+
+        :param param: Dictionary of input parameters
+        :return: list of unique VM names
+        """
+
+        vm_names = []
+        value = self._handle_py_ver_compat_for_input_str(param.get('vm_name'))
+        for name in (value or '').split(','):
+            name = name.strip()
+            if name and name not in vm_names:
+                vm_names.append(name)
+
+        return vm_names
+
+    def _run_vm_operations(self, vm_names, get_endpoint, wait, method='post', json=None):
+        """ This function is used to start the same operation on one or more VMs concurrently,
+        optionally waiting for each of them to complete.
+
+        :param vm_names: list of VM names
+        :param get_endpoint: function returning the REST endpoint of the operation for a VM name
+        :param wait: whether to wait for the operations to reach a terminal state
+        :param method: HTTP method of the request starting the operation
+        :param json: request body of the operation
+        :return: list of (VM name, status, message, response) in the order of vm_names
+        """
+
+        def run_vm_operation(vm_name):
+            # Each worker reports errors on its own action result
+            vm_result = ActionResult()
+            response_info = {}
+            ret_val, response = self._make_rest_call_helper(get_endpoint(vm_name), vm_result, json=json, method=method, response_info=response_info)
+
+            if phantom.is_success(ret_val) and wait:
+                ret_val, response = self._wait_for_operation(vm_result, response_info, response)
+
+            return vm_name, ret_val, vm_result.get_message(), response
+
+        with ThreadPoolExecutor(max_workers=min(MS_AZURE_MAX_CONCURRENT_REQUESTS, len(vm_names))) as executor:
+            return list(executor.map(run_vm_operation, vm_names))
+
+    def _set_vm_operations_status(self, action_result, results, success_message):
+        """ This function is used to add the results of _run_vm_operations to the action result.
+
+        :param action_result: object of ActionResult class
+        :param results: list of (VM name, status, message, response)
+        :param success_message: status to put in the summary when every operation succeeded
+        :return: status(phantom.APP_SUCCESS/phantom.APP_ERROR)
+        """
+
+        failed = []
+        for vm_name, ret_val, message, response in results:
+            if phantom.is_fail(ret_val):
+                failed.append((vm_name, message))
+                if response is None:
+                    continue
+
+            # Add the response into the data section
+            data = dict(response) if isinstance(response, dict) else {'response': response}
+            data['vm_name'] = vm_name
+            action_result.add_data(data)
+
+        # Add a dictionary that is made up of the most important values from data into the summary
+        summary = action_result.update_summary({})
+        if len(results) > 1:
+            summary['num_vms_succeeded'] = len(results) - len(failed)
+            summary['num_vms_failed'] = len(failed)
+
+        if len(results) == 1 and failed:
+            return action_result.set_status(phantom.APP_ERROR, failed[0][1])
+
+        if failed:
+            message = '; '.join("{0}: {1}".format(vm_name, message) for vm_name, message in failed)
+            return action_result.set_status(phantom.APP_ERROR, "Operation failed on {0} VM(s). {1}".format(len(failed), message))
+
+        summary['status'] = success_message
+
+        return action_result.set_status(phantom.APP_SUCCESS)
+
     def _handle_test_connectivity(self, param):
         """ This function is used to test the connectivity of an asset with given credentials.
 
@@ -787,27 +1035,22 @@ class MicrosoftAzureVmManagementConnector(BaseConnector):
 
         action_result = self.add_action_result(ActionResult(dict(param)))
 
-        resource_group_name = self._handle_py_ver_compat_for_input_str(param.get('resource_group_name'))
+        resource_group_names = self._get_resource_group_names(param)
 
-        if resource_group_name:
-            endpoint = VM_LIST_VMS_RESOURCE_GROUP_ENDPOINT.format(resourceGroupName=resource_group_name)
-        else:
-            endpoint = VM_LIST_VMS_ALL_ENDPOINT
+        def get_endpoint(resource_group_name):
+            if resource_group_name:
+                return VM_LIST_VMS_RESOURCE_GROUP_ENDPOINT.format(resourceGroupName=resource_group_name)
+            return VM_LIST_VMS_ALL_ENDPOINT
 
-        # make rest call
-        ret_val, response = self._make_rest_call_helper(endpoint, action_result, params=None, headers=None)
+        # make rest calls, the VMs are added to the data section page by page
+        ret_val, num_vms = self._list_resources_in_groups(action_result, resource_group_names, get_endpoint)
 
         if (phantom.is_fail(ret_val)):
             return action_result.get_status()
 
-        # Add the response into the data section
-        values = response.get('value', [])
-        for vm in values:
-            action_result.add_data(vm)
-
         # Add a dictionary that is made up of the most important values from data into the summary
         summary = action_result.update_summary({})
-        summary['num_vms'] = len(values)
+        summary['num_vms'] = num_vms
 
         # Return success, no need to set the message, only the status
         # BaseConnector will create a textual message based off of the summary dictionary
@@ -852,11 +1095,25 @@ class MicrosoftAzureVmManagementConnector(BaseConnector):
         if source_uri:
             body['properties']['creationData'].update({ 'sourceUri': source_uri })
 
-        ret_val, response = self._make_rest_call_helper(endpoint, action_result, json=body, method='put')
+        response_info = {}
+        ret_val, response = self._make_rest_call_helper(endpoint, action_result, json=body, method='put', response_info=response_info)
 
         if (phantom.is_fail(ret_val)):
             return action_result.get_status()
 
+        if param.get('wait_for_completion', False):
+            ret_val, operation = self._wait_for_operation(action_result, response_info, response)
+
+            if (phantom.is_fail(ret_val)):
+                return action_result.get_status()
+
+            # Fetch the snapshot again to report its final provisioning state
+            if operation is not response:
+                ret_val, response = self._make_rest_call_helper(endpoint, action_result)
+
+                if (phantom.is_fail(ret_val)):
+                    return action_result.get_status()
+
         # Add the response into the data section
         action_result.add_data(response)
 
@@ -883,23 +1140,19 @@ class MicrosoftAzureVmManagementConnector(BaseConnector):
         action_result = self.add_action_result(ActionResult(dict(param)))
 
         resource_group_name = self._handle_py_ver_compat_for_input_str(param.get('resource_group_name'))
-        vm_name = self._handle_py_ver_compat_for_input_str(param.get('vm_name'))
+        vm_names = self._get_vm_names(param)
+        wait = param.get('wait_for_completion', False)
 
-        # make rest call
-        endpoint = VM_ACTION_ENDPOINT.format(resourceGroupName=resource_group_name, vmName=vm_name, action="/start")
-        ret_val, response = self._make_rest_call_helper(endpoint, action_result, params=None, headers=None, method="post")
+        if not vm_names:
+            return action_result.set_status(phantom.APP_ERROR, MS_AZURE_INVALID_VM_NAME_MSG)
 
-        if (phantom.is_fail(ret_val)):
-            return action_result.get_status()
+        # make rest calls, one per VM
+        def get_endpoint(vm_name):
+            return VM_ACTION_ENDPOINT.format(resourceGroupName=resource_group_name, vmName=vm_name, action="/start")
 
-        # Add the response into the data section
-        action_result.add_data(response)
-
-        # Add a dictionary that is made up of the most important values from data into the summary
-        summary = action_result.update_summary({})
-        summary['status'] = "Successfully started VM"
+        results = self._run_vm_operations(vm_names, get_endpoint, wait)
 
-        return action_result.set_status(phantom.APP_SUCCESS)
+        return self._set_vm_operations_status(action_result, results, "Successfully started VM")
 
     def _handle_stop_vm(self, param):
         """ This function is used to handle the stop vm action.
@@ -915,23 +1168,19 @@ class MicrosoftAzureVmManagementConnector(BaseConnector):
         action_result = self.add_action_result(ActionResult(dict(param)))
 
         resource_group_name = self._handle_py_ver_compat_for_input_str(param.get('resource_group_name'))
-        vm_name = self._handle_py_ver_compat_for_input_str(param.get('vm_name'))
+        vm_names = self._get_vm_names(param)
+        wait = param.get('wait_for_completion', False)
 
-        # make rest call
-        endpoint = VM_ACTION_ENDPOINT.format(resourceGroupName=resource_group_name, vmName=vm_name, action="/powerOff")
-        ret_val, response = self._make_rest_call_helper(endpoint, action_result, params=None, headers=None, method="post")
+        if not vm_names:
+            return action_result.set_status(phantom.APP_ERROR, MS_AZURE_INVALID_VM_NAME_MSG)
 
-        if (phantom.is_fail(ret_val)):
-            return action_result.get_status()
+        # make rest calls, one per VM
+        def get_endpoint(vm_name):
+            return VM_ACTION_ENDPOINT.format(resourceGroupName=resource_group_name, vmName=vm_name, action="/powerOff")
 
-        # Add the response into the data section
-        action_result.add_data(response)
+        results = self._run_vm_operations(vm_names, get_endpoint, wait)
 
-        # Add a dictionary that is made up of the most important values from data into the summary
-        summary = action_result.update_summary({})
-        summary['status'] = "Successfully stopped VM"
-
-        return action_result.set_status(phantom.APP_SUCCESS)
+        return self._set_vm_operations_status(action_result, results, "Successfully stopped VM")
 
     def _handle_deallocate_vm(self, param):
         """ This function is used to handle the deallocate vm action.
@@ -947,23 +1196,19 @@ class MicrosoftAzureVmManagementConnector(BaseConnector):
         action_result = self.add_action_result(ActionResult(dict(param)))
 
         resource_group_name = self._handle_py_ver_compat_for_input_str(param.get('resource_group_name'))
-        vm_name = self._handle_py_ver_compat_for_input_str(param.get('vm_name'))
+        vm_names = self._get_vm_names(param)
+        wait = param.get('wait_for_completion', False)
 
-        # make rest call
-        endpoint = VM_ACTION_ENDPOINT.format(resourceGroupName=resource_group_name, vmName=vm_name, action="/deallocate")
-        ret_val, response = self._make_rest_call_helper(endpoint, action_result, params=None, headers=None, method="post")
+        if not vm_names:
+            return action_result.set_status(phantom.APP_ERROR, MS_AZURE_INVALID_VM_NAME_MSG)
 
-        if (phantom.is_fail(ret_val)):
-            return action_result.get_status()
+        # make rest calls, one per VM
+        def get_endpoint(vm_name):
+            return VM_ACTION_ENDPOINT.format(resourceGroupName=resource_group_name, vmName=vm_name, action="/deallocate")
 
-        # Add the response into the data section
-        action_result.add_data(response)
+        results = self._run_vm_operations(vm_names, get_endpoint, wait)
 
-        # Add a dictionary that is made up of the most important values from data into the summary
-        summary = action_result.update_summary({})
-        summary['status'] = "Successfully deallocated VM"
-
-        return action_result.set_status(phantom.APP_SUCCESS)
+        return self._set_vm_operations_status(action_result, results, "Successfully deallocated VM")
 
     def _handle_list_tags(self, param):
         """ This function is used to handle the list tags action.
@@ -978,20 +1223,15 @@ class MicrosoftAzureVmManagementConnector(BaseConnector):
         # Add an action result object to self (BaseConnector) to represent the action for this param
         action_result = self.add_action_result(ActionResult(dict(param)))
 
-        # make rest call
-        ret_val, response = self._make_rest_call_helper(VM_LIST_TAGS_ENDPOINT, action_result, params=None, headers=None)
+        # make rest calls, the tags are added to the data section page by page
+        ret_val, num_tags = self._list_resources(VM_LIST_TAGS_ENDPOINT, action_result, action_result.add_data)
 
         if (phantom.is_fail(ret_val)):
             return action_result.get_status()
 
-        # Add the response into thetag
-        values = response.get('value', [])
-        for tag in values:
-            action_result.add_data(tag)
-
         # Add a dictionary that is made up of the most important values from data into the summary
         summary = action_result.update_summary({})
-        summary['num_tags'] = len(values)
+        summary['num_tags'] = num_tags
 
         # Return success, no need to set the message, only the status
         # BaseConnector will create a textual message based off of the summary dictionary
@@ -1081,20 +1321,15 @@ class MicrosoftAzureVmManagementConnector(BaseConnector):
         # Add an action result object to self (BaseConnector) to represent the action for this param
         action_result = self.add_action_result(ActionResult(dict(param)))
 
-        # make rest call
-        ret_val, response = self._make_rest_call_helper(VM_RESOURCE_GROUP_ENDPOINT, action_result, params=None, headers=None)
+        # make rest calls, the resource groups are added to the data section page by page
+        ret_val, num_resource_groups = self._list_resources(VM_RESOURCE_GROUP_ENDPOINT, action_result, action_result.add_data)
 
         if (phantom.is_fail(ret_val)):
             return action_result.get_status()
 
-        # Add the response into the data section
-        values = response.get('value', [])
-        for rg in values:
-            action_result.add_data(rg)
-
         # Add a dictionary that is made up of the most important values from data into the summary
         summary = action_result.update_summary({})
-        summary['num_resource_groups'] = len(values)
+        summary['num_resource_groups'] = num_resource_groups
 
         # Return success, no need to set the message, only the status
         # BaseConnector will create a textual message based off of the summary dictionary
@@ -1114,28 +1349,23 @@ class MicrosoftAzureVmManagementConnector(BaseConnector):
         # Add an action result object to self (BaseConnector) to represent the action for this param
         action_result = self.add_action_result(ActionResult(dict(param)))
 
-        resource_group_name = self._handle_py_ver_compat_for_input_str(param.get('resource_group_name'))
+        resource_group_names = self._get_resource_group_names(param)
 
-        if resource_group_name:
-            resource_part = VM_RESOURCE_GROUP_VALUE_PART.format(resourceGroupName=resource_group_name)
-            endpoint = VM_LIST_SNAPSHOTS_ENDPOINT.format(resourceValue=resource_part)
-        else:
-            endpoint = VM_LIST_SNAPSHOTS_ENDPOINT.format(resourceValue='')
+        def get_endpoint(resource_group_name):
+            if resource_group_name:
+                resource_part = VM_RESOURCE_GROUP_VALUE_PART.format(resourceGroupName=resource_group_name)
+                return VM_LIST_SNAPSHOTS_ENDPOINT.format(resourceValue=resource_part)
+            return VM_LIST_SNAPSHOTS_ENDPOINT.format(resourceValue='')
 
-        # make rest call
-        ret_val, response = self._make_rest_call_helper(endpoint, action_result, params=None, headers=None)
+        # make rest calls, the snapshots are added to the data section page by page
+        ret_val, num_snapshots = self._list_resources_in_groups(action_result, resource_group_names, get_endpoint)
 
         if (phantom.is_fail(ret_val)):
             return action_result.get_status()
 
-        # Add the response into the data section
-        values = response.get('value', [])
-        for s in values:
-            action_result.add_data(s)
-
         # Add a dictionary that is made up of the most important values from data into the summary
         summary = action_result.update_summary({})
-        summary['num_snapshots'] = len(values)
+        summary['num_snapshots'] = num_snapshots
 
         # Return success, no need to set the message, only the status
         # BaseConnector will create a textual message based off of the summary dictionary
@@ -1155,28 +1385,29 @@ class MicrosoftAzureVmManagementConnector(BaseConnector):
         # Add an action result object to self (BaseConnector) to represent the action for this param
         action_result = self.add_action_result(ActionResult(dict(param)))
 
-        resource_group_name = self._handle_py_ver_compat_for_input_str(param.get('resource_group_name'))
+        resource_group_names = self._get_resource_group_names(param)
         group_type = param.get('group_type')
 
+        if not resource_group_names:
+            return action_result.set_status(phantom.APP_ERROR, "Please provide a valid value in the 'resource_group_name' action parameter")
+
         if group_type == 'network':
-            endpoint = VM_SECURITY_GROUP_ENDPOINT.format(resourceGroupName=resource_group_name, groupType='networkSecurityGroups', groupName='')
+            group_type = 'networkSecurityGroups'
         else:  # group_type == 'application'
-            endpoint = VM_SECURITY_GROUP_ENDPOINT.format(resourceGroupName=resource_group_name, groupType='applicationSecurityGroups', groupName='')
+            group_type = 'applicationSecurityGroups'
 
-        # make rest call
-        ret_val, response = self._make_rest_call_helper(endpoint, action_result, params=None, headers=None)
+        def get_endpoint(resource_group_name):
+            return VM_SECURITY_GROUP_ENDPOINT.format(resourceGroupName=resource_group_name, groupType=group_type, groupName='')
+
+        # make rest calls, the security groups are added to the data section page by page
+        ret_val, num_security_groups = self._list_resources_in_groups(action_result, resource_group_names, get_endpoint)
 
         if (phantom.is_fail(ret_val)):
             return action_result.get_status()
 
-        # Add the response into the data section
-        values = response.get('value', [])
-        for s in values:
-            action_result.add_data(s)
-
         # Add a dictionary that is made up of the most important values from data into the summary
         summary = action_result.update_summary({})
-        summary['num_security_groups'] = len(values)
+        summary['num_security_groups'] = num_security_groups
 
         # Return success, no need to set the message, only the status
         # BaseConnector will create a textual message based off of the summary dictionary
@@ -1309,27 +1540,22 @@ class MicrosoftAzureVmManagementConnector(BaseConnector):
         # Add an action result object to self (BaseConnector) to represent the action for this param
         action_result = self.add_action_result(ActionResult(dict(param)))
 
-        resource_group_name = self._handle_py_ver_compat_for_input_str(param.get('resource_group_name'))
+        resource_group_names = self._get_resource_group_names(param)
 
-        if resource_group_name:
-            endpoint = VM_LIST_VIRTUAL_NETWORKS_ENDPOINT.format(resourceGroup='/resourceGroups/{}'.format(resource_group_name))
-        else:
-            endpoint = VM_LIST_VIRTUAL_NETWORKS_ENDPOINT.format(resourceGroup='')
+        def get_endpoint(resource_group_name):
+            if resource_group_name:
+                return VM_LIST_VIRTUAL_NETWORKS_ENDPOINT.format(resourceGroup='/resourceGroups/{}'.format(resource_group_name))
+            return VM_LIST_VIRTUAL_NETWORKS_ENDPOINT.format(resourceGroup='')
 
-        # make rest call
-        ret_val, response = self._make_rest_call_helper(endpoint, action_result, params=None, headers=None)
+        # make rest calls, the virtual networks are added to the data section page by page
+        ret_val, num_virtual_networks = self._list_resources_in_groups(action_result, resource_group_names, get_endpoint)
 
         if (phantom.is_fail(ret_val)):
             return action_result.get_status()
 
-        # Add the response into the data section
-        values = response.get('value', [])
-        for s in values:
-            action_result.add_data(s)
-
         # Add a dictionary that is made up of the most important values from data into the summary
         summary = action_result.update_summary({})
-        summary['num_virtual_networks'] = len(values)
+        summary['num_virtual_networks'] = num_virtual_networks
 
         # Return success, no need to set the message, only the status
         # BaseConnector will create a textual message based off of the summary dictionary
@@ -1352,21 +1578,16 @@ class MicrosoftAzureVmManagementConnector(BaseConnector):
         resource_group_name = self._handle_py_ver_compat_for_input_str(param.get('resource_group_name'))
         virtual_network_name = self._handle_py_ver_compat_for_input_str(param.get('virtual_network_name'))
 
-        # make rest call
+        # make rest calls, the subnets are added to the data section page by page
         endpoint = VM_LIST_SUBNETS_ENDPOINT.format(resourceGroupName=resource_group_name, virtualNetworkName=virtual_network_name)
-        ret_val, response = self._make_rest_call_helper(endpoint, action_result, params=None, headers=None)
+        ret_val, num_subnets = self._list_resources(endpoint, action_result, action_result.add_data)
 
         if (phantom.is_fail(ret_val)):
             return action_result.get_status()
 
-        # Add the response into the data section
-        values = response.get('value', [])
-        for s in values:
-            action_result.add_data(s)
-
         # Add a dictionary that is made up of the most important values from data into the summary
         summary = action_result.update_summary({})
-        summary['num_subnets'] = len(values)
+        summary['num_subnets'] = num_subnets
 
         # Return success, no need to set the message, only the status
         # BaseConnector will create a textual message based off of the summary dictionary
@@ -1457,29 +1678,26 @@ class MicrosoftAzureVmManagementConnector(BaseConnector):
         action_result = self.add_action_result(ActionResult(dict(param)))
 
         resource_group_name = self._handle_py_ver_compat_for_input_str(param.get('resource_group_name'))
-        vm_name = self._handle_py_ver_compat_for_input_str(param.get('vm_name'))
+        vm_names = self._get_vm_names(param)
+        wait = param.get('wait_for_completion', False)
 
-        # make rest call
-        endpoint = VM_ACTION_ENDPOINT.format(resourceGroupName=resource_group_name, vmName=vm_name, action='generalize')
-        ret_val, response = self._make_rest_call_helper(endpoint, action_result, params=None, headers=None, method='post')
+        if not vm_names:
+            return action_result.set_status(phantom.APP_ERROR, MS_AZURE_INVALID_VM_NAME_MSG)
 
-        # Add a dictionary that is made up of the most important values from data into the summary
-        summary = action_result.update_summary({})
+        # make rest calls, one per VM
+        def get_endpoint(vm_name):
+            return VM_ACTION_ENDPOINT.format(resourceGroupName=resource_group_name, vmName=vm_name, action='generalize')
+
+        results = self._run_vm_operations(vm_names, get_endpoint, wait)
+        ret_val = self._set_vm_operations_status(action_result, results, "Successfully generalized the vm")
 
         if 'OperationNotAllowed' in action_result.get_message() and 'Please power off' in action_result.get_message():
+            summary = action_result.update_summary({})
             summary['status'] = "Virtual machine must be powered off. Please power off the vm before generalizing it."
 
-        if (phantom.is_fail(ret_val)):
-            return action_result.get_status()
-
-        # Add the response into the data section
-        action_result.add_data(response)
-
-        summary['status'] = "Successfully generalized the vm"
-
         # Return success, no need to set the message, only the status
         # BaseConnector will create a textual message based off of the summary dictionary
-        return action_result.set_status(phantom.APP_SUCCESS)
+        return ret_val
 
     def _handle_redeploy_vm(self, param):
         """ This function is used to handle the redeploy vm action.
@@ -1496,32 +1714,31 @@ class MicrosoftAzureVmManagementConnector(BaseConnector):
         action_result = self.add_action_result(ActionResult(dict(param)))
 
         resource_group_name = self._handle_py_ver_compat_for_input_str(param.get('resource_group_name'))
-        vm_name = self._handle_py_ver_compat_for_input_str(param.get('vm_name'))
+        vm_names = self._get_vm_names(param)
+        wait = param.get('wait_for_completion', False)
 
-        # make rest call
-        endpoint = VM_ACTION_ENDPOINT.format(resourceGroupName=resource_group_name, vmName=vm_name, action='redeploy')
-        ret_val, response = self._make_rest_call_helper(endpoint, action_result, params=None, headers=None, method='post')
+        if not vm_names:
+            return action_result.set_status(phantom.APP_ERROR, MS_AZURE_INVALID_VM_NAME_MSG)
 
-        # Add a dictionary that is made up of the most important values from data into the summary
-        summary = action_result.update_summary({})
+        # make rest calls, one per VM
+        def get_endpoint(vm_name):
+            return VM_ACTION_ENDPOINT.format(resourceGroupName=resource_group_name, vmName=vm_name, action='redeploy')
 
-        if 'was not found' in action_result.get_message():
-            summary['status'] = "Virtual machine not found under resource"
+        results = self._run_vm_operations(vm_names, get_endpoint, wait)
+        ret_val = self._set_vm_operations_status(action_result, results, "Successfully redeployed the vm")
 
-        if 'could not be found' in action_result.get_message():
-            summary['status'] = "Resource group could not be found"
+        if len(vm_names) == 1 and phantom.is_fail(ret_val):
+            summary = action_result.update_summary({})
 
-        if (phantom.is_fail(ret_val)):
-            return action_result.get_status()
-
-        # Add the response into the data section
-        action_result.add_data(response)
+            if 'was not found' in action_result.get_message():
+                summary['status'] = "Virtual machine not found under resource"
 
-        summary['status'] = "Successfully redeployed the vm"
+            if 'could not be found' in action_result.get_message():
+                summary['status'] = "Resource group could not be found"
 
         # Return success, no need to set the message, only the status
         # BaseConnector will create a textual message based off of the summary dictionary
-        return action_result.set_status(phantom.APP_SUCCESS)
+        return ret_val
 
     def _handle_run_command(self, param):
         """ This function is used to handle the run command action.
@@ -1538,7 +1755,11 @@ class MicrosoftAzureVmManagementConnector(BaseConnector):
         action_result = self.add_action_result(ActionResult(dict(param)))
 
         resource_group_name = self._handle_py_ver_compat_for_input_str(param.get('resource_group_name'))
-        vm_name = self._handle_py_ver_compat_for_input_str(param.get('vm_name'))
+        vm_names = self._get_vm_names(param)
+        wait = param.get('wait_for_completion', False)
+
+        if not vm_names:
+            return action_result.set_status(phantom.APP_ERROR, MS_AZURE_INVALID_VM_NAME_MSG)
 
         try:
             body = json.loads(param.get('body', {}))
@@ -1546,23 +1767,15 @@ class MicrosoftAzureVmManagementConnector(BaseConnector):
             error_msg = self._get_error_message_from_exception(e)
             return action_result.set_status(phantom.APP_ERROR, MS_AZURE_INVALID_JSON.format(err_msg=error_msg))
 
-        # make rest call
-        endpoint = VM_RUN_COMMAND_ENDPOINT.format(resourceGroupName=resource_group_name, vmName=vm_name)
-        ret_val, response = self._make_rest_call_helper(endpoint, action_result, params=None, headers=None, json=body, method='post')
+        # make rest calls, one per VM
+        def get_endpoint(vm_name):
+            return VM_RUN_COMMAND_ENDPOINT.format(resourceGroupName=resource_group_name, vmName=vm_name)
 
-        if (phantom.is_fail(ret_val)):
-            return action_result.get_status()
-
-        # Add the response into the data section
-        action_result.add_data(response)
-
-        # Add a dictionary that is made up of the most important values from data into the summary
-        summary = action_result.update_summary({})
-        summary['status'] = "Successfully executed command"
+        results = self._run_vm_operations(vm_names, get_endpoint, wait, json=body)
 
         # Return success, no need to set the message, only the status
         # BaseConnector will create a textual message based off of the summary dictionary
-        return action_result.set_status(phantom.APP_SUCCESS)
+        return self._set_vm_operations_status(action_result, results, "Successfully executed command")
 
     def _get_token(self, action_result, from_action=False):
         """ This function is used to get a token via REST Call.
@@ -1757,6 +1970,18 @@ class MicrosoftAzureVmManagementConnector(BaseConnector):
         self._access_token = self._state.get(MS_AZURE_TOKEN_STRING, {}).get(MS_AZURE_ACCESS_TOKEN_STRING)
         self._refresh_token = self._state.get(MS_AZURE_TOKEN_STRING, {}).get(MS_AZURE_REFRESH_TOKEN_STRING)
 
+        try:
+            self._operation_timeout = int(config.get(MS_AZURE_CONFIG_OPERATION_TIMEOUT, MS_AZURE_DEFAULT_OPERATION_TIMEOUT))
+        except (TypeError, ValueError):
+            self._operation_timeout = 0
+        if self._operation_timeout <= 0:
+            return self.set_status(phantom.APP_ERROR, MS_AZURE_INVALID_OPERATION_TIMEOUT_MSG)
+
+        # Keep-alive session shared by all the REST calls of this run, sized for the concurrent resource group listing
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=MS_AZURE_MAX_CONCURRENT_REQUESTS)
+        self._session.mount('https://', adapter)
+
         return phantom.APP_SUCCESS
 
     def finalize(self):
@@ -1768,6 +1993,9 @@ class MicrosoftAzureVmManagementConnector(BaseConnector):
         :return: status (success/failure)
         """
 
+        if self._session:
+            self._session.close()
+
         # Save the state, this data is saved across actions and app upgrades
         self.save_state(self._state)
         _save_app_state(self._state, self.get_asset_id(), self)
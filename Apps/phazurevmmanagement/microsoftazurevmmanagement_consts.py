@@ -5,7 +5,9 @@
 
 # Define your constants here
 
-MS_BASE_URL = "https://management.azure.com/subscriptions/{subscriptionId}"
+MS_AZURE_MANAGEMENT_URL = "https://management.azure.com"
+MS_BASE_URL = MS_AZURE_MANAGEMENT_URL + "/subscriptions/{subscriptionId}"
+MS_AZURE_MAX_CONCURRENT_REQUESTS = 5
 
 VM_GET_SYSTEM_INFO_ENDPOINT = "/resourceGroups/{resourceGroupName}/providers/Microsoft.Compute/virtualMachines/{vmName}?api-version=2018-06-01"
 VM_LIST_VMS_RESOURCE_GROUP_ENDPOINT = "/resourceGroups/{resourceGroupName}/providers/Microsoft.Compute/virtualMachines?api-version=2018-06-01"
@@ -34,6 +36,7 @@ MS_AZURE_CONFIG_CLIENT_ID = 'client_id'
 MS_AZURE_CONFIG_CLIENT_SECRET = 'client_secret'
 MS_AZURE_CONFIG_ADMIN_ACCESS = 'admin_access'
 MS_AZURE_CONFIG_ADMIN_CONSENT = 'admin_consent'
+MS_AZURE_CONFIG_OPERATION_TIMEOUT = 'operation_timeout'
 MS_AZURE_TOKEN_STRING = 'token'
 MS_AZURE_ACCESS_TOKEN_STRING = 'access_token'
 MS_AZURE_REFRESH_TOKEN_STRING = 'refresh_token'
@@ -67,3 +70,13 @@ Please try again."
 MS_AZURE_ERR_MSG = "Status Code: {status_code}. Data from server: {err_msg}"
 MS_AZURE_SERVER_ERR_MSG = "Error from server"
 MS_AZURE_INVALID_JSON = "{err_msg}: Invalid format of body. Please provide valid JSON format"
+MS_AZURE_INVALID_VM_NAME_MSG = "Please provide a valid value in the 'vm_name' action parameter"
+
+# For long-running operations
+MS_AZURE_DEFAULT_OPERATION_TIMEOUT = 600
+MS_AZURE_OPERATION_POLL_INTERVAL = 5
+MS_AZURE_OPERATION_MAX_POLL_INTERVAL = 60
+MS_AZURE_OPERATION_TERMINAL_STATES = ["Succeeded", "Failed", "Canceled"]
+MS_AZURE_OPERATION_TIMEOUT_MSG = "The operation did not complete within {timeout} seconds"
+MS_AZURE_OPERATION_FAILED_MSG = "The operation ended with status '{status}'. Error: {err_msg}"
+MS_AZURE_INVALID_OPERATION_TIMEOUT_MSG = "Please provide a valid non-zero positive integer value in the 'operation_timeout' asset configuration parameter"
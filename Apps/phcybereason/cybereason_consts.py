@@ -23,3 +23,13 @@ INVALID_NON_NEGATIVE_INTEGER_ERR_MSG = "Please provide a valid non-negative inte
 
 MALOP_HISTORICAL_DAYS_KEY = "malop_historical_days asset configuration parameter"
 MALWARE_HISTORICAL_DAYS_KEY = "malware_historical_days asset configuration parameter"
+MALOP_ENRICHMENT_WORKERS_KEY = "malop_enrichment_workers asset configuration parameter"
+DEFAULT_MALOP_ENRICHMENT_WORKERS = 5
+
+# Constants relating to the sensor queries made while polling
+SENSOR_QUERY_LIMIT = 500
+SENSOR_QUERY_MAX_PAGES = 100
+SENSOR_QUERY_MACHINE_BATCH_SIZE = 100
+
+# Artifact fields compared to decide whether an existing artifact needs to be updated
+ARTIFACT_COMPARED_FIELDS = ["name", "description", "type", "label", "cef", "cef_types"]
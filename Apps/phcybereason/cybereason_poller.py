@@ -6,8 +6,11 @@
 import datetime
 import requests
 import hashlib
+import threading
+import time
 import traceback
 import json
+from concurrent.futures import ThreadPoolExecutor
 
 # Phantom App imports
 import phantom.app as phantom
@@ -27,6 +30,9 @@ class CybereasonPoller:
         try:
             # Declare data that will be lazy-loaded if required
             self.feature_translation = None
+            self.sensor_index = {}
+            self.stage_timings = {}
+            self.stage_timings_lock = threading.Lock()
             config = connector.get_config()
             state = connector.get_state()
             current_time = datetime.datetime.now()
@@ -40,6 +46,12 @@ class CybereasonPoller:
             if phantom.is_fail(ret_val):
                 return action_result.get_status()
 
+            ret_val, malop_enrichment_workers = connector._validate_integer(
+                action_result, config.get("malop_enrichment_workers", DEFAULT_MALOP_ENRICHMENT_WORKERS), MALOP_ENRICHMENT_WORKERS_KEY)
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+            self.malop_enrichment_workers = max(malop_enrichment_workers or 1, 1)
+
             if is_first_poll:
                 connector.save_progress("This is a first time poll. We will poll for malops from the last {days} days", days=malop_historical_days)
                 malop_start_time = current_time + datetime.timedelta(days=-malop_historical_days)
@@ -56,11 +68,16 @@ class CybereasonPoller:
 
             # Initialize the session that will be used throughout the poller
             self.cr_session = CybereasonSession(connector).get_session()
+            # Size the connection pool so every enrichment worker can keep its own connection alive
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.malop_enrichment_workers)
+            self.cr_session.mount("https://", adapter)
+            self.cr_session.mount("http://", adapter)
             malop_start_time_microsec_timestamp = round(malop_start_time.timestamp() * 1000)
             # When called as a scheduled poll, max_container count comes as 4294967295 which causes a Cybereason API error.
             container_count = min(int(param.get(phantom.APP_JSON_CONTAINER_COUNT)), 5000)
             success = success & self._fetch_and_ingest_malops(connector, config, malop_start_time_microsec_timestamp, container_count)
             success = success & self._fetch_and_ingest_malwares(connector, config, malware_millisec_since_last_poll, container_count)
+            action_result.update_summary(self._get_stage_timings_summary())
         except Exception as e:
             success = False
             err = connector._get_error_message_from_exception(e)
@@ -83,17 +100,31 @@ class CybereasonPoller:
         malop_ids = list(malops_dict.keys())
         connector.save_progress("Fetched {number_of_malops} malops from Cybereason console", number_of_malops=len(malop_ids))
 
+        # Fetch the sensors of all affected machines once for the whole poll
+        machine_names = []
+        for malop_data in malops_dict.values():
+            affected_machines = malop_data.get("elementValues", {}).get("affectedMachines", {}).get("elementValues", [])
+            machine_names = machine_names + [machine["name"] for machine in affected_machines if machine.get("name")]
+        self._build_sensor_index(connector, machine_names)
+
+        # The feature translation table is shared by all workers, so load it before enrichment starts
+        if malop_ids:
+            self._load_feature_translation(connector)
+
         # Ingest Malops
+        # Enrichment queries run concurrently in a bounded pool, while containers are saved in the order the malops were fetched
         connector.save_progress("Ingesting malops...")
         ingested_count = 0
         percent_complete = 0
         show_progress_after = max(int(len(malop_ids) / 10), 1)
-        for malop_id, malop_data in malops_dict.items():
-            success = success & self._ingest_malop(connector, config, malop_id, malop_data)
-            ingested_count = ingested_count + 1
-            if ingested_count % show_progress_after == 0:
-                percent_complete = round(float(ingested_count) / len(malop_ids) * 100)
-                connector.save_progress("{percent_complete}% complete", percent_complete=percent_complete)
+        with ThreadPoolExecutor(max_workers=self.malop_enrichment_workers) as executor:
+            containers = executor.map(lambda malop: self._enrich_malop(connector, config, malop[0], malop[1]), malops_dict.items())
+            for malop_id, container in zip(malop_ids, containers):
+                success = success & self._ingest_malop(connector, config, malop_id, container)
+                ingested_count = ingested_count + 1
+                if ingested_count % show_progress_after == 0:
+                    percent_complete = round(float(ingested_count) / len(malop_ids) * 100)
+                    connector.save_progress("{percent_complete}% complete", percent_complete=percent_complete)
         if percent_complete != 100:
             connector.save_progress("100% complete")
         return success
@@ -119,13 +150,20 @@ class CybereasonPoller:
             connector.save_progress("100% complete")
         return success
 
-    def _get_decision_feature_translation(self, connector, decision_feature):
-        connector.debug_print("Getting decision feature translation table")
-        feature_description = decision_feature  # Default to the name of the decision feature
+    def _load_feature_translation(self, connector):
         try:
             if not self.feature_translation:
+                connector.debug_print("Getting decision feature translation table")
                 url = "{0}/rest/translate/features/all".format(connector._base_url)
                 self.feature_translation = self.cr_session.get(url).json()
+        except Exception as e:
+            err = connector._get_error_message_from_exception(e)
+            connector.debug_print("Warning: Exception when getting feature translation table. {0}".format(err))
+
+    def _get_decision_feature_translation(self, connector, decision_feature):
+        feature_description = decision_feature  # Default to the name of the decision feature
+        try:
+            self._load_feature_translation(connector)
             # At this point we are guaranteed to have a feature translation
             (decision_feature_type, decision_feature_key) = self._get_decision_feature_details(decision_feature)
             feature_description = self.feature_translation[decision_feature_type][decision_feature_key]["translatedName"]
@@ -141,14 +179,24 @@ class CybereasonPoller:
         decision_feature_key = decision_feature.split(".")[1].split("(")[0]  # "lsassMemoryAccessMalop" in our example
         return (decision_feature_type, decision_feature_key)
 
-    def _get_sensor_details(self, connector, machine_name):
+    def _build_sensor_index(self, connector, machine_names):
+        # Index the sensors of every machine affected in this poll by guid, so that building
+        # the artifacts of each malop does not need its own sensor queries
+        self.sensor_index = {}
+        machine_names = sorted(set(machine_names))
+        for i in range(0, len(machine_names), SENSOR_QUERY_MACHINE_BATCH_SIZE):
+            for sensor in self._get_sensor_details(connector, machine_names[i:i + SENSOR_QUERY_MACHINE_BATCH_SIZE]):
+                self.sensor_index[sensor["guid"]] = sensor
+        connector.debug_print("Indexed {0} sensors for {1} affected machines".format(len(self.sensor_index), len(machine_names)))
+
+    def _get_sensor_details(self, connector, machine_names):
         url = "{0}/rest/sensors/query".format(connector._base_url)
         query = {
             "filters": [
                 {
                     "fieldName": "machineName",
                     "operator": "ContainsIgnoreCase",
-                    "values": [machine_name]
+                    "values": machine_names
                 },
                 {
                     "fieldName": "status",
@@ -158,19 +206,19 @@ class CybereasonPoller:
             ],
             "sortingFieldName": "machineName",
             "sortDirection": "ASC",
-            "limit": 500,
+            "limit": SENSOR_QUERY_LIMIT,
             "offset": 0,
             "batchId": None
         }
         sensors = []
         hasMoreSensors = True
-        iterCount = 0
         try:
-            while hasMoreSensors and iterCount < 100:
+            while hasMoreSensors and query["offset"] < SENSOR_QUERY_MAX_PAGES:
                 response = self.cr_session.post(url=url, json=query, headers=connector._headers)
                 result = response.json()
                 sensors = sensors + result["sensors"]
                 hasMoreSensors = result["hasMoreResults"]
+                query["offset"] = query["offset"] + 1
         except Exception as e:
             err = connector._get_error_message_from_exception(e)
             connector.debug_print("Unable to fetch sensor details: {0}".format(err))
@@ -327,9 +375,19 @@ class CybereasonPoller:
 
         return user_details
 
-    def _ingest_malop(self, connector, config, malop_id, malop_data):
+    def _enrich_malop(self, connector, config, malop_id, malop_data):
+        # Runs on a worker thread. Errors are logged here so that one bad malop does not stop the others from being ingested.
+        try:
+            return self._get_container_dict_for_malop(connector, config, malop_id, malop_data)
+        except Exception as e:
+            err = connector._get_error_message_from_exception(e)
+            connector.debug_print("Error occurred while enriching malop {0}. {1}".format(malop_id, err))
+            return None
+
+    def _ingest_malop(self, connector, config, malop_id, container):
         success = phantom.APP_ERROR
-        container = self._get_container_dict_for_malop(connector, config, malop_id, malop_data)
+        if container is None:
+            return phantom.APP_ERROR
         existing_container_id = self._does_container_exist_for_malop_malware(connector, malop_id)
         if not existing_container_id:
             # Container does not exist. Go ahead and save it
@@ -375,8 +433,7 @@ class CybereasonPoller:
             r = requests.post(url, json=update_json, verify=False)
             resp_json = r.json()
 
-            for artifact in container["artifacts"]:
-                self._save_or_update_artifact(connector, config, existing_container_id, artifact)
+            self._save_changed_artifacts(connector, existing_container_id, container["artifacts"])
             if r.status_code != 200 or resp_json.get('failed'):
                 connector.debug_print("Error while updating the container. Error is: ", resp_json.get('failed'))
                 return False
@@ -387,41 +444,48 @@ class CybereasonPoller:
 
         return True
 
-    def _save_or_update_artifact(self, connector, config, container_id, artifact):
-        existing_artifact = self._get_artifact(connector, config, artifact["source_data_identifier"], container_id)
-        if existing_artifact:
-            # We have an existing artifact. Update it.
-            artifact["container_id"] = existing_artifact["container"]
-            artifact["id"] = existing_artifact["id"]
-            connector.debug_print('Updating artifact {0}'.format(artifact["name"]), artifact)
-            connector.save_artifacts([artifact])
-        else:
-            # This is a new artifact. Save it directly.
-            connector.debug_print('Saving new artifact {0}'.format(artifact["name"]), artifact)
-            artifact["container_id"] = container_id
-            connector.save_artifact(artifact)
-
-    def _get_artifact(self, connector, config, source_data_identifier, container_id):
-        url = '{0}rest/artifact?_filter_source_data_identifier="{1}"&_filter_container_id={2}&sort=id&order=desc'.format(
-                        connector.get_phantom_base_url(), source_data_identifier, container_id)
+    def _save_changed_artifacts(self, connector, container_id, artifacts):
+        # Diff the artifacts against the ones already in the container and save only the new and changed ones, in one bulk call
+        existing_artifacts = self._get_container_artifacts(connector, container_id)
+        artifacts_to_save = []
+        for artifact in artifacts:
+            existing_artifact = existing_artifacts.get(artifact["source_data_identifier"])
+            if existing_artifact:
+                if self._get_artifact_hash(existing_artifact) == self._get_artifact_hash(artifact):
+                    continue
+                # We have an existing artifact that changed. Update it.
+                artifact["container_id"] = existing_artifact["container"]
+                artifact["id"] = existing_artifact["id"]
+                connector.debug_print('Updating artifact {0}'.format(artifact["name"]), artifact)
+            else:
+                # This is a new artifact
+                connector.debug_print('Saving new artifact {0}'.format(artifact["name"]), artifact)
+                artifact["container_id"] = container_id
+            artifacts_to_save.append(artifact)
+
+        connector.debug_print("{0} of {1} artifacts changed in container {2}".format(len(artifacts_to_save), len(artifacts), container_id))
+        if artifacts_to_save:
+            connector.save_artifacts(artifacts_to_save)
+
+    def _get_artifact_hash(self, artifact):
+        compared_fields = {field: artifact.get(field) for field in ARTIFACT_COMPARED_FIELDS}
+        return hashlib.sha256(json.dumps(compared_fields, sort_keys=True).encode()).hexdigest()
+
+    def _get_container_artifacts(self, connector, container_id):
+        # Returns the artifacts of the container, keyed by source data identifier. The newest artifact wins on duplicates.
+        url = '{0}rest/artifact?_filter_container_id={1}&sort=id&order=desc&page_size=0'.format(connector.get_phantom_base_url(), container_id)
         try:
             r = requests.get(url, verify=False)
             resp_json = r.json()
         except Exception as e:
             err = connector._get_error_message_from_exception(e)
-            connector.debug_print("Exception when querying for artifact ID: {0}".format(err))
-            return None
-
-        if resp_json.get('count', 0) <= 0:
-            connector.debug_print("No artifact matched the source_data_identifier {0} and container id {1}".format(source_data_identifier, container_id))
-            return None
+            connector.debug_print("Exception when querying for the artifacts of container {0}: {1}".format(container_id, err))
+            return {}
 
-        try:
-            return resp_json.get('data', [])[0]
-        except Exception as e:
-            err = connector._get_error_message_from_exception(e)
-            connector.debug_print("Exception when parsing artifact results: {0}".format(err))
-            return None
+        existing_artifacts = {}
+        for existing_artifact in resp_json.get('data', []):
+            existing_artifacts.setdefault(existing_artifact.get("source_data_identifier"), existing_artifact)
+        return existing_artifacts
 
     def _get_malops(self, connector, malop_timestamp, max_number_malops):
         malops_dict = {}
@@ -473,16 +537,29 @@ class CybereasonPoller:
     def _get_artifacts_for_malop(self, connector, malop_id, malop_data):
         connector.debug_print("Building artifacts for malop {0}".format(malop_id))
         artifacts = []
-        artifacts = artifacts + self._get_affected_machines_artifacts(connector, malop_data)
-        artifacts = artifacts + self._get_affected_users_artifacts(connector, malop_id)
-        artifacts = artifacts + self._get_suspicious_processes_artifacts(connector, malop_id, malop_data)
-        artifacts = artifacts + self._get_connection_artifacts(connector, malop_id)
-        artifacts = artifacts + self._get_comments_artifacts(connector, malop_id)
+        artifacts = artifacts + self._timed_stage("affected_machines", self._get_affected_machines_artifacts, connector, malop_data)
+        artifacts = artifacts + self._timed_stage("affected_users", self._get_affected_users_artifacts, connector, malop_id)
+        artifacts = artifacts + self._timed_stage("suspicious_processes", self._get_suspicious_processes_artifacts, connector, malop_id, malop_data)
+        artifacts = artifacts + self._timed_stage("connections", self._get_connection_artifacts, connector, malop_id)
+        artifacts = artifacts + self._timed_stage("comments", self._get_comments_artifacts, connector, malop_id)
         artifacts = artifacts + self._get_link_to_cr_artifacts(connector, malop_id)
         artifacts = artifacts + self._get_last_updated_time_artifact(connector, malop_id, malop_data)
         self._add_cef_types_to_artifacts(artifacts)
         return artifacts
 
+    def _timed_stage(self, stage, stage_function, *args):
+        # Adds the time spent in an enrichment stage to the totals reported in the poll summary
+        start_time = time.time()
+        try:
+            return stage_function(*args)
+        finally:
+            elapsed = time.time() - start_time
+            with self.stage_timings_lock:
+                self.stage_timings[stage] = self.stage_timings.get(stage, 0) + elapsed
+
+    def _get_stage_timings_summary(self):
+        return {"{0}_enrichment_seconds".format(stage): round(elapsed, 2) for stage, elapsed in self.stage_timings.items()}
+
     def _get_affected_machines_artifacts(self, connector, malop_data):
         connector.debug_print("Building affected machines artifacts")
         artifacts = []
@@ -495,10 +572,8 @@ class CybereasonPoller:
                 "label": "machine",
                 "cef": {}
             }
-            sensors = self._get_sensor_details(connector, machine["name"])
-            matching_sensors = [s for s in sensors if s["guid"] == machine["guid"]]
-            if len(matching_sensors) == 1:
-                matching_sensor = matching_sensors[0]
+            matching_sensor = self.sensor_index.get(machine["guid"])
+            if matching_sensor:
                 cef = { }
                 cef["osVersion"] = matching_sensor["osVersionType"].replace("_", " ")
                 cef["isolated"] = "Isolated" if matching_sensor["isolated"] else "Unisolated"
@@ -24,6 +24,8 @@ DS_LOOKUP_USERNAME_NOT_FOUND = 'Username not found in Digital Shadows Breach dat
 # OnPoll action messages
 DS_POLL_BREACH_COMPLETE = 'Digital Shadows Breach {} ingested ({} of {})'
 DS_POLL_INCIDENT_COMPLETE = 'Digital Shadows Incident {} ingested ({} of {})'
+DS_POLL_LAST_INCIDENT_KEY = 'last_incident_published'
+DS_POLL_LAST_INTEL_INCIDENT_KEY = 'last_intel_incident_published'
 
 DS_GET_INCIDENT_SUCCESS = 'Digital Shadows incident fetched'
 
@@ -137,7 +137,7 @@ class DSDataBreachConnector(object):
             return action_result.set_status(phantom.APP_ERROR, "{0} {1}".format(SERVICE_ERR_MSG, error_message))
         self._connector.save_progress(str(breach_record_view))
         try:
-            breach_record_pages = breach_record_service.read_all_records(view=breach_record_view)
+            breach_record_pages = breach_record_service.read_all_records(view=breach_record_view, lazy=True)
             breach_record_total = len(breach_record_pages)
         except StopIteration:
             error_message = 'No DataBreach objects retrieved from the Digital Shadows API in page groups'
@@ -178,7 +178,7 @@ class DSDataBreachConnector(object):
         if phantom.is_fail(ret_val):
             return action_result.get_status()
         try:
-            breach_record_pages = breach_record_service.find_all_pages(breach_id)
+            breach_record_pages = breach_record_service.find_all_pages(breach_id, lazy=True)
             breach_record_total = len(breach_record_pages)
         except StopIteration:
             error_message = 'No data breach record retrieved from the Digital Shadows API in page groups'
@@ -224,7 +224,7 @@ class DSDataBreachConnector(object):
             breach_record_view = DataBreachRecordService.data_breach_records_view(username=user_name, published=published_date_range,
                                                                 domain_names=domain_names_param, review_statuses=review_statuses_param)
             self._connector.save_progress("Breach record View: {}".format(breach_record_view))
-            breach_record_pages = breach_record_service.read_all_records(view=breach_record_view)
+            breach_record_pages = breach_record_service.read_all_records(view=breach_record_view, lazy=True)
         except StopIteration:
             error_message = 'No DataBreach objects retrieved from the Digital Shadows API in page groups'
             return action_result.set_status(phantom.APP_ERROR, "Error Details: {0}".format(error_message))
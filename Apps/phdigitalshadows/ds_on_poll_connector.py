@@ -45,6 +45,8 @@ class DSOnPollConnector(object):
         self._inc_typ_physical_security = config.get('inc_typ_physical_security', False)
         self._inc_typ_social_media_compliance = config.get('inc_typ_social_media_compliance', False)
         self._inc_typ_cyber_threat = config.get('inc_typ_cyber_threat', False)
+        self._state = {}
+        self._is_poll_now = False
 
     def on_poll(self, param): # noqa
 
@@ -61,7 +63,10 @@ class DSOnPollConnector(object):
             ret_val, self._history_days_interval = self._handle_exception_object.validate_integer(action_result, self._history_days_interval, HISTORY_DAYS_INTERVAL_KEY)
             if phantom.is_fail(ret_val):
                 return action_result.get_status()
-            date_range = "P{}D".format(self._history_days_interval)
+            # Scheduled polls only query what was published since the last checkpoint of each incident type,
+            # the full history window is used on the first run and for poll now
+            self._state = self._connector.load_state() or {}
+            self._is_poll_now = self._connector.is_poll_now()
 
             incident_types = []
             if self._inc_typ_data_leakage:
@@ -81,7 +86,8 @@ class DSOnPollConnector(object):
                 try:
                     incident_service = IncidentService(self._ds_api_key, self._ds_api_secret_key)
 
-                    incident_view = IncidentService.incidents_view(date_range=date_range, date_range_field='published', statuses=['READ', 'UNREAD'], types=incident_types)
+                    incident_view = IncidentService.incidents_view(date_range=self._get_date_range(DS_POLL_LAST_INCIDENT_KEY), date_range_field='published',
+                                                                   statuses=['READ', 'UNREAD'], types=incident_types)
                     self._connector.save_progress("incident req view: {}".format(json.dumps(incident_view, ensure_ascii=False)))
                 except Exception as e:
                     error_message = self._handle_exception_object.get_error_message_from_exception(e)
@@ -97,11 +103,13 @@ class DSOnPollConnector(object):
                 except Exception as e:
                     error_message = self._handle_exception_object.get_error_message_from_exception(e)
                     return action_result.set_status(phantom.APP_ERROR, "Error Connecting to server. {}".format(error_message))
+                last_published = None
                 for incident_page in incident_pages:
                     for incident in incident_page:
                         status, message = self._save_incident(incident)
                         if status == phantom.APP_SUCCESS:
                             j += 1
+                            last_published = max(last_published or '', incident.payload['published'])
                             self._connector.save_progress(DS_POLL_INCIDENT_COMPLETE.format(incident.id, j, incident_total))
                         else:
                             self._connector.error_print("Did not ingest incident {}".format(incident.id))
@@ -114,12 +122,13 @@ class DSOnPollConnector(object):
                     action_result.set_status(phantom.APP_ERROR,
                                          status_message='Did not receive all the incident from Digital Shadows')
                 else:
+                    self._save_checkpoint(DS_POLL_LAST_INCIDENT_KEY, last_published)
                     action_result.set_status(phantom.APP_SUCCESS)
 
             if self._global_incident:
                 try:
                     intelligence_incident_service = IntelligenceIncidentService(self._ds_api_key, self._ds_api_secret_key)
-                    intelligence_incident_view = IntelligenceIncidentService.intelligence_incidents_view(date_range=date_range,
+                    intelligence_incident_view = IntelligenceIncidentService.intelligence_incidents_view(date_range=self._get_date_range(DS_POLL_LAST_INTEL_INCIDENT_KEY),
                                                                                   date_range_field='published', types=incident_types)
                     self._connector.save_progress('intelligence_incident_view: {}'.format(json.dumps(intelligence_incident_view, ensure_ascii=False)))
                 except Exception as e:
@@ -137,12 +146,14 @@ class DSOnPollConnector(object):
                     error_message = self._handle_exception_object.get_error_message_from_exception(e)
                     return action_result.set_status(phantom.APP_ERROR, "Error Connecting to server. {}".format(error_message))
 
+                last_published = None
                 for intelligence_incident_page in intelligence_incident_pages:
                     for intelligence_incident in intelligence_incident_page:
                         self._connector.save_progress('count: {}'.format(k))
                         status, message = self._save_intel_incident(intelligence_incident)
                         if status == phantom.APP_SUCCESS:
                             k += 1
+                            last_published = max(last_published or '', intelligence_incident.payload['published'])
                             self._connector.save_progress(DS_POLL_INCIDENT_COMPLETE.format(intelligence_incident.id, k, intelligence_incident_total))
                         else:
                             self._connector.error_print("Did not ingest intel-incident {}".format(intelligence_incident.id))
@@ -154,6 +165,7 @@ class DSOnPollConnector(object):
                     action_result.set_status(phantom.APP_ERROR,
                                          status_message='Did not receive all the intelligence incident from Digital Shadows')
                 else:
+                    self._save_checkpoint(DS_POLL_LAST_INTEL_INCIDENT_KEY, last_published)
                     action_result.set_status(phantom.APP_SUCCESS)
 
                 self._connector.save_progress("Ingesting DS Intelligence Incidents Completed.")
@@ -190,6 +202,36 @@ class DSOnPollConnector(object):
 
         return action_result.get_status()
 
+    def _get_date_range(self, checkpoint_key):
+        """
+        Build the dateRange filter of an incident view.
+        Covers the time since the last checkpoint when there is one, else the full history window.
+
+        :param checkpoint_key: state key of the last published timestamp ingested for the incident type
+        :return: ISO 8601 interval or duration
+        """
+        last_published = self._state.get(checkpoint_key)
+        if last_published and not self._is_poll_now:
+            now = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+            return "{}/{}".format(last_published, now)
+
+        return "P{}D".format(self._history_days_interval)
+
+    def _save_checkpoint(self, checkpoint_key, last_published):
+        """
+        Store the last published timestamp ingested for an incident type, once all its incidents are saved.
+        Poll now does not move the checkpoint.
+
+        :param checkpoint_key: state key of the incident type
+        :param last_published: latest published timestamp ingested, None if nothing was ingested
+        """
+        if self._is_poll_now or last_published is None:
+            return
+
+        if last_published > self._state.get(checkpoint_key, ''):
+            self._state[checkpoint_key] = last_published
+            self._connector.save_state(self._state)
+
     def _phantom_daterange(self, param):
         """
         Extract Phantom start time and end time as datetime objects.
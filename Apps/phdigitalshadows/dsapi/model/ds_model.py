@@ -21,3 +21,51 @@ class DSModel(object, metaclass=ABCMeta):
         """
         Create a DSModel object from json dictionary.
         """
+
+
+class DSRecord(object):
+    """
+    Lightweight view over a Digital Shadows API object.
+
+    The DSModel is only built on first access of one of its attributes, so callers that
+    only need the id or the raw payload never pay for hydrating every object of a page.
+    """
+
+    __slots__ = ('_json', '_cls', '_model')
+
+    def __init__(self, json, cls, fields=None):
+        """
+        :type json: dict
+        :type cls: DSModel
+        :param fields: keys of the API object to keep, all keys are kept when None
+        """
+        if fields is not None:
+            json = {field: json[field] for field in fields if field in json}
+        self._json = json
+        self._cls = cls
+        self._model = None
+
+    @property
+    def id(self):
+        return DSModel.cast(self._json.get('id'), int)
+
+    @property
+    def payload(self):
+        return self._json
+
+    def get(self, field, default=None):
+        return self._json.get(field, default)
+
+    def model(self):
+        """
+        :return: DSModel built from the record, on first call only
+        """
+        if self._model is None:
+            self._model = self._cls.from_json(self._json)
+        return self._model
+
+    def __getattr__(self, name):
+        return getattr(self.model(), name)
+
+    def __str__(self):
+        return 'DSRecord[{}, id={}]'.format(self._cls.__name__, self.id)
@@ -3,7 +3,7 @@
 # Licensed under Apache 2.0 (https://www.apache.org/licenses/LICENSE-2.0.txt)
 #
 
-from .ds_model import DSModel
+from .ds_model import DSModel, DSRecord
 
 
 class DSPaginationGroupingIterator(object):
@@ -22,13 +22,17 @@ class DSPaginationGroupingIterator(object):
     }
     """
 
-    def __init__(self, provider, cls):
+    def __init__(self, provider, cls, lazy=False, fields=None):
         """
         :type provider: generator
         :type cls: DSModel
+        :param lazy: stream DSRecord views that only build the DSModel when one of its attributes is read
+        :param fields: keys to keep from each API object, implies lazy
         """
         self._provider = provider
         self._cls = cls
+        self._lazy = lazy or fields is not None
+        self._fields = fields
 
         self._page = next(self._provider)
 
@@ -38,6 +42,11 @@ class DSPaginationGroupingIterator(object):
     def current_page_size(self):
         return int(self._page['current_page']['size'])
 
+    def _build(self, ds_model_json):
+        if self._lazy:
+            return DSRecord(ds_model_json, self._cls, self._fields)
+        return self._cls.from_json(ds_model_json)
+
     def __len__(self):
         return int(self._page['total'])
 
@@ -50,7 +59,7 @@ class DSPaginationGroupingIterator(object):
 
         ds_model_group = []
         for ds_model_json in self._page['content']:
-            ds_model_group.append(self._cls.from_json(ds_model_json))
+            ds_model_group.append(self._build(ds_model_json))
 
         self._page = None
         return ds_model_group
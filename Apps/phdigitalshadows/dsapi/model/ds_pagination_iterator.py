@@ -3,7 +3,7 @@
 # Licensed under Apache 2.0 (https://www.apache.org/licenses/LICENSE-2.0.txt)
 #
 
-from .ds_model import DSModel
+from .ds_model import DSModel, DSRecord
 
 
 class DSPaginationIterator(object):
@@ -22,13 +22,17 @@ class DSPaginationIterator(object):
     }
     """
 
-    def __init__(self, provider, cls):
+    def __init__(self, provider, cls, lazy=False, fields=None):
         """
         :type provider: generator
         :type cls: DSModel
+        :param lazy: stream DSRecord views that only build the DSModel when one of its attributes is read
+        :param fields: keys to keep from each API object, implies lazy
         """
         self._provider = provider
         self._cls = cls
+        self._lazy = lazy or fields is not None
+        self._fields = fields
 
         self._page = next(self._provider)
         self._i = 0
@@ -40,6 +44,11 @@ class DSPaginationIterator(object):
     def current_page_size(self):
         return int(self._page['current_page']['size'])
 
+    def _build(self, ds_model_json):
+        if self._lazy:
+            return DSRecord(ds_model_json, self._cls, self._fields)
+        return self._cls.from_json(ds_model_json)
+
     def __len__(self):
         return int(self._page['total'])
 
@@ -54,4 +63,4 @@ class DSPaginationIterator(object):
 
         ds_model_json = self._page['content'][self._i]
         self._i += 1
-        return self._cls.from_json(ds_model_json)
+        return self._build(ds_model_json)
@@ -15,7 +15,7 @@ class DataBreachRecordService(DSBaseService):
     def __init__(self, ds_api_key, ds_api_secret_key, proxy=None):
         super(DataBreachRecordService, self).__init__(ds_api_key, ds_api_secret_key, proxy=proxy)
 
-    def find_all(self, data_breach_id, view=None):
+    def find_all(self, data_breach_id, view=None, lazy=False, fields=None):
 
         if view is None:
             view = DataBreachRecordService.data_breach_records_view()
@@ -24,9 +24,9 @@ class DataBreachRecordService(DSBaseService):
         provider = self._scrolling_request(path,
                                            method='POST',
                                            body=view)
-        return DSPaginationIterator(provider, DataBreachRecord)
+        return DSPaginationIterator(provider, DataBreachRecord, lazy=lazy, fields=fields)
 
-    def find_all_pages(self, data_breach_id, view=None):
+    def find_all_pages(self, data_breach_id, view=None, lazy=False, fields=None):
 
         if view is None:
             view = DataBreachRecordService.data_breach_records_view()
@@ -35,14 +35,16 @@ class DataBreachRecordService(DSBaseService):
         provider = self._scrolling_request(path,
                                            method='POST',
                                            body=view)
-        return DSPaginationGroupingIterator(provider, DataBreachRecord)
+        return DSPaginationGroupingIterator(provider, DataBreachRecord, lazy=lazy, fields=fields)
 
 
-    def read_all_records(self, view=None):
+    def read_all_records(self, view=None, lazy=False, fields=None):
         """
         Streams all DataBreach objects retrieved from the Digital Shadows API in page groups.
 
         :param view: DataBreachRecordService
+        :param lazy: stream DSRecord views instead of DataBreachRecord objects
+        :param fields: keys to keep from each record, implies lazy
         :return: DataBreachRecord generator
         """
 
@@ -52,7 +54,7 @@ class DataBreachRecordService(DSBaseService):
         provider = self._scrolling_request(path,
                                            method='POST',
                                            body=view)
-        return DSPaginationGroupingIterator(provider, DataBreachRecord)
+        return DSPaginationGroupingIterator(provider, DataBreachRecord, lazy=lazy, fields=fields)
 
     def find_data_breach_record_reviews(self, breach_id=None):
         """
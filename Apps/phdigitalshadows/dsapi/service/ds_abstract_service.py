@@ -4,11 +4,53 @@
 #
 
 from abc import ABCMeta
+from queue import LifoQueue, Empty
+from threading import Lock
+
 from ..httplib2 import Http, ProxyInfo, socks, proxy_info_from_environment
 
 from dsapi.config.ds_proxy_config import DSProxyConfig
 
 
+class HttpPool(object):
+    """
+    Pool of Http objects shared by every service using the same proxy settings.
+
+    An Http object keeps its connections alive but is not thread safe, so each request
+    borrows one from the pool and hands it back once the response has been read.
+    """
+
+    _pools = {}
+    _pools_lock = Lock()
+
+    def __init__(self, proxy_info):
+        self._proxy_info = proxy_info
+        self._idle = LifoQueue()
+
+    @classmethod
+    def for_proxy(cls, proxy_info):
+        """
+        :type proxy_info: ProxyInfo
+        :return: HttpPool shared by all services configured with these proxy settings
+        """
+        key = proxy_info.astuple()[:6] if proxy_info is not None else None
+        with cls._pools_lock:
+            if key not in cls._pools:
+                cls._pools[key] = cls(proxy_info)
+            return cls._pools[key]
+
+    def request(self, url, method='GET', body=None, headers=None):
+        try:
+            http = self._idle.get_nowait()
+        except Empty:
+            http = Http(proxy_info=self._proxy_info)
+
+        try:
+            return http.request(url, method=method, body=body, headers=headers)
+        finally:
+            self._idle.put(http)
+
+
 class DSAbstractService(object, metaclass=ABCMeta):
     """
     Abstract Service that provides http methods to implementing services.
@@ -24,7 +66,7 @@ class DSAbstractService(object, metaclass=ABCMeta):
         else:
             proxy = self._prepare_proxy(proxy)
 
-        self._http = Http(proxy_info=proxy)
+        self._http = HttpPool.for_proxy(proxy)
 
     def _request(self, url, method='GET', body=None, headers=None):
         return self._http.request(url, method=method, body=body, headers=headers)
@@ -7,12 +7,16 @@ import json
 import time
 import base64
 
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
 
 from ..config import ds_api_host, ds_api_base
 
 from .ds_abstract_service import DSAbstractService
 
+RATE_LIMIT_MAX_RETRIES = 10
+RATE_LIMIT_MAX_WAIT = 60
+
 
 class DSBaseService(DSAbstractService):
     """
@@ -50,7 +54,7 @@ class DSBaseService(DSAbstractService):
         headers = self._headers() if headers is None else headers
         response, content = super(DSBaseService, self)._request(url,
                                                                 method=method,
-                                                                body=str(body).replace("'", '"'),
+                                                                body=self._encode_body(body),
                                                                 headers=headers)
         if int(response['status']) == 200:
             return json.loads(content)
@@ -72,7 +76,7 @@ class DSBaseService(DSAbstractService):
         
         response, content = super(DSBaseService, self)._request(url,
                                                                 method=method,
-                                                                body=str(body).replace("'", '"'),
+                                                                body=self._encode_body(body),
                                                                 headers=headers)
         if int(response['status']) in (200, 204):
             if content != "":
@@ -99,32 +103,76 @@ class DSBaseService(DSAbstractService):
         :return: tuple(response, content)
         """
         assert 'pagination' in body
-        paginated_view = body
         url = '{}{}'.format(self._url_base, path)
         headers = self._headers() if headers is None else headers
 
-        scrolling = True
-        while scrolling:
-            response, content = super(DSBaseService, self)._request(url,
-                                                                    method,
-                                                                    body=str(paginated_view).replace("'", '"'),
-                                                                    headers=headers)
+        # the next page is requested in the background while the caller consumes the current one,
+        # its offset is known as soon as the current page tells the total
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            next_page = executor.submit(self._fetch_page, url, method, body, body['pagination']['offset'], headers)
+            while next_page is not None:
+                data = next_page.result()
+                if data is None:
+                    break
 
-            if int(response['status']) == 200:
-                data = json.loads(content)
                 offset = data['currentPage']['offset']
                 size = data['currentPage']['size']
                 total = data['total']
-                if offset + size < total:
-                    paginated_view['pagination']['offset'] = offset + size
+                if size and offset + size < total:
+                    next_page = executor.submit(self._fetch_page, url, method, body, offset + size, headers)
                 else:
-                    scrolling = False
+                    next_page = None
                 yield data
-            elif int(response['status']) == 429:
+        finally:
+            executor.shutdown(wait=False)
+
+    def _fetch_page(self, url, method, view, offset, headers):
+        """
+        Fetch one page of a paginated view, backing off while the API rate limits the requests.
+
+        :param url: API endpoint url
+        :param method:
+        :param view: View object - requires pagination field, see DSBaseService.paginated decorator
+        :param offset: offset of the page to fetch
+        :param headers:
+        :return: Digital Shadows page dictionary, None if the page could not be retrieved
+        """
+        paginated_view = dict(view, pagination=dict(view['pagination'], offset=offset))
+        body = self._encode_body(paginated_view)
+
+        for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+            response, content = super(DSBaseService, self)._request(url,
+                                                                    method,
+                                                                    body=body,
+                                                                    headers=headers)
+            if int(response['status']) == 200:
+                return json.loads(content)
+            elif int(response['status']) == 429 and attempt < RATE_LIMIT_MAX_RETRIES:
                 # rate limited, wait before resuming scroll requests
-                time.sleep(1)
+                time.sleep(self._rate_limit_wait(response, attempt))
             else:
-                scrolling = False
+                return None
+
+    @staticmethod
+    def _rate_limit_wait(response, attempt):
+        """
+        Seconds to wait after a rate limited response.
+        Honors the Retry-After header when the API sends one, else backs off exponentially.
+
+        :param response: httplib2 response, header names are lower case
+        :param attempt: number of rate limited attempts made so far for this request
+        :return: int
+        """
+        try:
+            wait = int(response['retry-after'])
+        except (KeyError, ValueError):
+            wait = 2 ** attempt
+        return max(1, min(wait, RATE_LIMIT_MAX_WAIT))
+
+    @staticmethod
+    def _encode_body(body):
+        return None if body is None else json.dumps(body)
 
     def valid_credentials(self):
         """
@@ -17,7 +17,7 @@ class DSFindService(DSBaseService):
     def __init__(self, ds_api_key, ds_api_secret_key, proxy=None):
         super(DSFindService, self).__init__(ds_api_key, ds_api_secret_key, proxy=proxy)
 
-    def _find_all(self, endpoint, view, cls):
+    def _find_all(self, endpoint, view, cls, lazy=False, fields=None):
         """
         Streams all DSModel objects retrieved from the Digital Shadows API.
 
@@ -27,6 +27,8 @@ class DSFindService(DSBaseService):
         :param endpoint: Digital Shadows API endpoint eg. /api/data-breach
         :param view: Digital Shadows endpoint View
         :param cls: DSModel class to be instantiated
+        :param lazy: stream DSRecord views instead of DSModel objects
+        :param fields: keys to keep from each API object, implies lazy
         :return: DSModel
         """
 
@@ -34,9 +36,9 @@ class DSFindService(DSBaseService):
         provider = self._scrolling_request(path,
                                            method='POST',
                                            body=view)
-        return DSPaginationIterator(provider, cls)
+        return DSPaginationIterator(provider, cls, lazy=lazy, fields=fields)
 
-    def _find_all_pages(self, endpoint, view, cls):
+    def _find_all_pages(self, endpoint, view, cls, lazy=False, fields=None):
         """
         Streams all DSModel objects retrieved from the Digital Shadows API in page groups.
 
@@ -46,6 +48,8 @@ class DSFindService(DSBaseService):
         :param endpoint: Digital Shadows API endpoint eg. /api/data-breach
         :param view: Digital Shadows endpoint View
         :param cls: DSModel class to be instantiated
+        :param lazy: stream DSRecord views instead of DSModel objects
+        :param fields: keys to keep from each API object, implies lazy
         :return: DSModel
         """
 
@@ -53,9 +57,9 @@ class DSFindService(DSBaseService):
         provider = self._scrolling_request(path,
                                            method='POST',
                                            body=view)
-        return DSPaginationGroupingIterator(provider, cls)
+        return DSPaginationGroupingIterator(provider, cls, lazy=lazy, fields=fields)
 
-    def _read_all_pages(self, endpoint, view, cls):
+    def _read_all_pages(self, endpoint, view, cls, lazy=False, fields=None):
         """
         Streams all DSModel objects retrieved from the Digital Shadows API in page groups.
 
@@ -65,6 +69,8 @@ class DSFindService(DSBaseService):
         :param endpoint: Digital Shadows API endpoint eg. /api/data-breach
         :param view: Digital Shadows endpoint View
         :param cls: DSModel class to be instantiated
+        :param lazy: stream DSRecord views instead of DSModel objects
+        :param fields: keys to keep from each API object, implies lazy
         :return: DSModel
         """
 
@@ -72,4 +78,4 @@ class DSFindService(DSBaseService):
         provider = self._scrolling_request(path,
                                            method='POST',
                                            body=view)
-        return DSPaginationGroupingIterator(provider, cls)
+        return DSPaginationGroupingIterator(provider, cls, lazy=lazy, fields=fields)
@@ -23,6 +23,7 @@ import os
 import hashlib
 import pytz
 import sys
+from collections import deque
 try:
     from urllib import unquote
 except:
@@ -376,30 +377,28 @@ class FireeyeEtpConnector(BaseConnector):
 
         return phantom.APP_SUCCESS, items_list
 
-    def _paginator2(self, endpoint, action_result, data, limit=None, method="get", **kwargs):
-        """ This function is used to handle the gathering of alerts for the on_poll action.
+    def _paginate_alerts(self, endpoint, action_result, data, limit=None, method="get", **kwargs):
+        """ This function is used to stream the pages of alerts for the on_poll action.
         :param endpoint: API endpoint to use to get the alerts
         :param action results: Action results for Phantom
         :param data: dict of parameters to send to the API endpoint
         :param limit: The number of alerts to ingest
         :param method: HTTP method to use when calling the API endpoint
         :param **kwargs: Optional and additional arguments to use for calling the API endpoint. Note: these parameters need to be valid Python Requests parameters
-        :return: a list of alerts
+        :return: generator of status(success/failure) and the list of alerts of each page
         """
 
-        items_list = list()
-
         while limit > 0:
             ret_val, items = self._make_rest_call(endpoint, action_result, json=data, method=method, **kwargs)
 
             if phantom.is_fail(ret_val):
-                return action_result.get_status(), None
+                yield action_result.get_status(), None
+                return
 
-            if items.get('data'):
-                for item in items.get("data"):
-                    items_list.append(item)
-            else:
-                break
+            if not items.get('data'):
+                return
+
+            yield phantom.APP_SUCCESS, items.get('data')
 
             try:
                 if limit and items.get('meta', {}).get('total') >= limit:
@@ -407,11 +406,10 @@ class FireeyeEtpConnector(BaseConnector):
                     data['fromLastModifiedOn'] = items.get('meta', {}).get('fromLastModifiedOn', {}).get('end')
 
                 if items.get('meta', {}).get('total') < limit:
-                    break
+                    return
             except:
-                return action_result.set_status(phantom.APP_ERROR, "Unable to access attributes of items response"), None
-
-        return phantom.APP_SUCCESS, items_list
+                yield action_result.set_status(phantom.APP_ERROR, "Unable to access attributes of items response"), None
+                return
 
     def _handle_test_connectivity(self, param):
         action_result = self.add_action_result(ActionResult(dict(param)))
@@ -1186,39 +1184,55 @@ class FireeyeEtpConnector(BaseConnector):
 
         endpoint = FIREETEETP_LIST_ALERTS_ENDPOINT
 
-        # make rest call
-        ret_val, response = self._paginator2(endpoint, action_result, data, limit=limit, method="post")
-        if phantom.is_fail(ret_val):
-            return action_result.get_status()
+        is_limited_poll = self.is_poll_now() or self._state.get('first_run', True)
 
-        # Start creating events and artifacts
-        if response:
+        # A manual poll or first run only ingests the latest 'limit' alerts, hence only those are kept in memory.
+        # A scheduled poll saves the alerts of each page as soon as it is received.
+        latest_containers = deque(maxlen=limit)
+        latest_alerts = deque(maxlen=limit)
+        seen_hashes = set()
+        ingested_count = 0
 
-            if self.is_poll_now() or self._state.get('first_run', True):
-                # If we want to get a limited of alerts then just return the list with that number of items
-                response = response[-limit:]
+        # make rest call
+        for ret_val, alerts in self._paginate_alerts(endpoint, action_result, data, limit=limit, method="post"):
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
 
-            self.save_progress('Ingesting {} alerts'.format(len(response)))
+            containers = []
+            for alert in alerts:
+                container = self._prepare_container(alert)
 
-            for alert in response:
-                # Create a container for each alert
-                container_creation_status, container_id = self._create_container(action_result, alert)
-
-                if phantom.is_fail(container_creation_status) or not container_id:
-                    self.debug_print('Error while creating container with ID {container_id}. {error_msg}'.
-                                format(container_id=container_id, error_msg=container_creation_status))
+                # Pages overlap on their 'fromLastModifiedOn' boundary
+                if container['source_data_identifier'] in seen_hashes:
                     continue
+                seen_hashes.add(container['source_data_identifier'])
+
+                if is_limited_poll:
+                    latest_containers.append(container)
+                    latest_alerts.append(alert)
                 else:
-                    # Create artifacts for specific alert
-                    artifacts_creation_status, artifacts_creation_msg = self._create_artifacts(alert=alert,
-                                                                                            container_id=container_id)
+                    containers.append(container)
 
-                    if phantom.is_fail(artifacts_creation_status):
-                        self.debug_print('Error while creating artifacts for container with ID {container_id}. {error_msg}'.
-                                        format(container_id=container_id, error_msg=artifacts_creation_msg))
-        else:
+            if containers:
+                ret_val = self._save_alert_containers(action_result, containers)
+                if phantom.is_fail(ret_val):
+                    return action_result.get_status()
+                ingested_count += len(containers)
+
+        if latest_containers:
+            ret_val = self._save_alert_containers(action_result, list(latest_containers))
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+            ingested_count += len(latest_containers)
+
+            # Add the ingested alerts into the data section
+            action_result.add_data(list(latest_alerts))
+
+        if not ingested_count:
             self.save_progress('No alerts found')
 
+        action_result.update_summary({'total_alerts_ingested': ingested_count})
+
         # Mark the first_run as False once the scheduled or ingestion polling
         # first run or every run has been successfully completed
         if not self.is_poll_now():
@@ -1226,9 +1240,6 @@ class FireeyeEtpConnector(BaseConnector):
 
         self._state['last_ingestion_time'] = data['fromLastModifiedOn']
 
-        # Add the response into the data section
-        action_result.add_data(response)
-
         # Return success, no need to set the message, only the status
         # BaseConnector will create a textual message based off of the summary dictionary
         return action_result.set_status(phantom.APP_SUCCESS)
@@ -1244,13 +1255,11 @@ class FireeyeEtpConnector(BaseConnector):
 
         return date_time.strftime('%Y-%m-%dT%H:%M:%S:%fZ')
 
-    def _create_container(self, action_result, alert):
-        """ This function is used to create the container in Phantom using alert data.
+    def _prepare_container(self, alert):
+        """ This function is used to build the container, along with its artifact, of an alert.
         :param alert: Data of single alert
-        :return: status(success/failure), container_id
+        :return: container dictionary
         """
-        container_dict = dict()
-
         # Creating a description and name for the alert
         # ETP does not provide good data to create a name or description so I am manually creating a standardized convention
 
@@ -1261,93 +1270,76 @@ class FireeyeEtpConnector(BaseConnector):
 
         name = "Fireeye ETP Alert - {}".format(alert.get('attributes', {}).get('meta', {}).get('last_malware'))
 
-        container_dict['name'] = '{alert_name}'.format(alert_name=name)
-        container_dict['source_data_identifier'] = self._create_dict_hash(alert)
-        container_dict['description'] = description
-
-        container_creation_status, container_creation_msg, container_id = self.save_container(container=container_dict)
-
-        if phantom.is_fail(container_creation_status):
-            self.debug_print(container_creation_msg)
-            self.save_progress('Error while creating container for alert {alert_name}. '
-                               '{error_message}'.format(alert_name=name, error_message=container_creation_msg))
-            return action_result.set_status(phantom.APP_ERROR), None
-
-        return action_result.set_status(phantom.APP_SUCCESS), container_id
-
-    def _create_artifacts(self, alert, container_id):
-        """ This function is used to create artifacts in given container using alert data.
-        :param alert: Data of single alert
-        :param container_id: ID of container in which we have to create the artifacts
-        :return: status(success/failure), message
-        """
-        artifacts_list = []
-        temp_dict = {}
-        cef = {}
-
         # Add the contains data to the artifact
         cef_types = {"malware_md5": ["fileHashMd5"], "source_ip": ["sourceAddress"], "etp_message_id": ["fireeyeetp message id"],
         "legacy_id": ["fireeyeetp legacy id"], "id": ["fireeyeetp alert id"], "rcpt_to": ["email"], "mail_from": ["email"],
         "to": ["email"], "cc": ["email"], "from": ["email"]}
 
-        # Flatten the alert data
-        cef = self.flatten_json(alert)
+        cef, alert_hash = self._flatten_and_hash(alert)
 
-        # Add into artifacts dictionary if it is available
-        if cef:
-            temp_dict['cef'] = cef
-            temp_dict['cef_types'] = cef_types
-            temp_dict['name'] = alert.get('attributes', {}).get('meta', {}).get('last_malware')
-            temp_dict['container_id'] = container_id
-            temp_dict['source_data_identifier'] = self._create_dict_hash(temp_dict)
-
-        artifacts_list.append(temp_dict)
-
-        create_artifact_status, create_artifact_msg, _ = self.save_artifact(temp_dict)
-
-        if phantom.is_fail(create_artifact_status):
-            return self.set_status(phantom.APP_ERROR), create_artifact_msg
-
-        return self.set_status(phantom.APP_SUCCESS), 'Artifacts created successfully'
+        container = {
+            'name': name,
+            'source_data_identifier': alert_hash,
+            'description': description,
+            'artifacts': []
+        }
 
-    def _create_dict_hash(self, input_dict):
-        """ This function is used to generate the hash from dictionary.
-        :param input_dict: Dictionary for which we have to generate the hash
-        :return: hash
+        # Add into artifacts list if it is available
+        if cef:
+            container['artifacts'].append({
+                'cef': cef,
+                'cef_types': cef_types,
+                'name': alert.get('attributes', {}).get('meta', {}).get('last_malware'),
+                'source_data_identifier': alert_hash
+            })
+
+        return container
+
+    def _save_alert_containers(self, action_result, containers):
+        """ This function is used to save the containers, along with their artifacts, in bulk.
+        :param action_result: Action results for Phantom
+        :param containers: list of containers to save
+        :return: status(success/failure)
         """
-        if not input_dict:
-            return None
+        for index in range(0, len(containers), FIREEYEETP_SAVE_CONTAINERS_CHUNK_SIZE):
+            chunk = containers[index:index + FIREEYEETP_SAVE_CONTAINERS_CHUNK_SIZE]
+            ret_val, message, _ = self.save_containers(chunk)
 
-        try:
-            input_dict_str = json.dumps(input_dict, sort_keys=True)
-        except Exception as e:
-            err = self._get_error_message_from_exception(e)
-            self.debug_print('Handled exception in _create_dict_hash', err)
-            return None
+            if phantom.is_fail(ret_val):
+                self.debug_print(message)
+                return action_result.set_status(phantom.APP_ERROR, 'Error while creating containers. {}'.format(message))
 
-        return hashlib.md5(input_dict_str).hexdigest()
+            self.save_progress('Ingested {} alerts'.format(len(chunk)))
 
-    def flatten_json(self, y):
-        """ This function is used to generate a new JSON dictionary so the data flattened to the top most values. Helps with readability of the artifacts in the GUI.
-        :param y: JSON Dictionary of the data to flatten
-        :return out: new JSON dictionary
+        return phantom.APP_SUCCESS
+
+    def _flatten_and_hash(self, alert):
+        """ This function is used to flatten the alert data to its top most values and to hash it, in a single walk of the alert.
+        The flattened data helps with readability of the artifacts in the GUI, the hash is used to deduplicate the alerts.
+        :param alert: JSON Dictionary of the alert
+        :return: flattened JSON dictionary, hash
         """
         out = {}
+        alert_hash = hashlib.md5()
 
-        def flatten(x, name=''):
+        def walk(x, name=''):
             if type(x) is dict:
-                for a in x:
-                    flatten(x[a], a)
+                alert_hash.update(b'{')
+                for a in sorted(x):
+                    alert_hash.update(json.dumps(a).encode('utf-8'))
+                    walk(x[a], a)
+                alert_hash.update(b'}')
             elif type(x) is list:
-                i = 0
+                alert_hash.update(b'[')
                 for a in x:
-                    flatten(a, name)
-                    i += 1
+                    walk(a, name)
+                alert_hash.update(b']')
             else:
+                alert_hash.update(json.dumps(x).encode('utf-8'))
                 out[name] = x
 
-        flatten(y)
-        return out
+        walk(alert)
+        return out, alert_hash.hexdigest()
 
     def handle_action(self, param):
         """ This function gets current action identifier and calls member function of its own to handle the action.
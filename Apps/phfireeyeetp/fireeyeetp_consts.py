@@ -21,6 +21,9 @@ FIREEYEETP_BULK_DELETE_QUARANTINE_EMAILS_ENDPOINT = "quarantine/delete/"
 FIREEYEETP_DELETE_QUARANTINED_EMAIL_ENDPOINT = "quarantine/delete/{etp_message_id}"
 FIREEYEETP_LIST_QUARANTINED_EMAILS_ENDPOINT = "quarantine"
 
+# Constants relating to the on poll action
+FIREEYEETP_SAVE_CONTAINERS_CHUNK_SIZE = 100
+
 # Constants relating to '_get_error_message_from_exception'
 ERR_CODE_MSG = "Error code unavailable"
 ERR_MSG_UNAVAILABLE = "Error message unavailable. Please check the asset configuration and|or action parameters"
@@ -19,8 +19,8 @@ from bs4 import BeautifulSoup
 
 from datetime import datetime, timezone, timedelta
 import secrets
-import string
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
 
 
 class RetVal(tuple):
@@ -45,6 +45,11 @@ class TestConnector(BaseConnector):
         self._api_key = None
         self._advanced = None
         self._api_key_id = None
+        self._session = None
+        self._auth_headers = None
+        self._api_key_hash = None
+        self._ingest_incident_details = None
+        self._incident_detail_workers = None
 
     def _get_error_message_from_exception(self, e):
         """ This method is used to get appropriate error messages from the exception.
@@ -180,7 +185,7 @@ class TestConnector(BaseConnector):
         resp_json = None
 
         try:
-            request_func = getattr(requests, method)
+            request_func = getattr(self._session, method)
         except AttributeError:
             return RetVal(
                 action_result.set_status(phantom.APP_ERROR, "Invalid method: {0}".format(method)),
@@ -214,50 +219,107 @@ class TestConnector(BaseConnector):
 
     def authenticationHeaders(self):
 
-        if self._advanced:
-            # Generate a 64 bytes random string
-            nonce = "".join(secrets.choice(string.ascii_letters + string.digits) for _ in range(64))
-            # Get the current timestamp as milliseconds
-            timestamp = int(datetime.now(timezone.utc).timestamp()) * 1000
-            # Generate the auth key
-            auth_key = "%s%s%s" % (self._api_key, nonce, timestamp)
-            # Convert to bytes object
-            auth_key = auth_key.encode("utf-8")
-            # Calculate sha256
-            api_key_hash = hashlib.sha256(auth_key).hexdigest()
-            headers = {
-                "x-xdr-timestamp": str(timestamp),
-                "x-xdr-nonce": nonce,
-                "x-xdr-auth-id": str(self._api_key_id),
-                "Authorization": api_key_hash
-            }
-        else:
-            headers = {
-                "x-xdr-auth-id": str(self._api_key_id),
-                "Authorization": self._api_key
-            }
+        if not self._advanced:
+            # Standard keys send the same headers on every request
+            return dict(self._auth_headers)
+
+        # Generate a 64 character random string
+        nonce = secrets.token_hex(32)
+        # Get the current timestamp as milliseconds
+        timestamp = int(datetime.now(timezone.utc).timestamp()) * 1000
+        # The auth key is sha256(api_key + nonce + timestamp), continue from the hash state of the api key
+        api_key_hash = self._api_key_hash.copy()
+        api_key_hash.update("{0}{1}".format(nonce, timestamp).encode("utf-8"))
+
+        headers = dict(self._auth_headers)
+        headers.update({
+            "x-xdr-timestamp": str(timestamp),
+            "x-xdr-nonce": nonce,
+            "Authorization": api_key_hash.hexdigest()
+        })
 
         return headers
 
+    def _get_list_from_param(self, value):
+        # Split a comma-separated action parameter into a list of unique values, keeping their order
+        if not value:
+            return []
+
+        values = []
+        for item in str(value).split(","):
+            item = item.strip()
+            if item and item not in values:
+                values.append(item)
+
+        return values
+
+    def _make_chunked_rest_call(self, endpoint, action_result, values, build_request_data):
+        # Issue one request per chunk of at most MAX_FILTER_VALUES values, or a single request when there are no values
+        chunks = [values[i:i + MAX_FILTER_VALUES] for i in range(0, len(values), MAX_FILTER_VALUES)] or [[]]
+        responses = []
+
+        for chunk in chunks:
+            parameters = {"request_data": build_request_data(chunk)}
+            self.save_progress("Request JSON: {0}".format(parameters))
+
+            headers = self.authenticationHeaders()
+            ret_val, response = self._make_rest_call(endpoint, action_result, headers=headers, json=parameters)
+
+            if phantom.is_fail(ret_val):
+                return RetVal(action_result.get_status(), responses)
+
+            responses.append(response)
+
+        return RetVal(phantom.APP_SUCCESS, responses)
+
+    def _get_incident_extra_data(self, incident_id):
+        # Runs on a worker thread, so failures are logged instead of being set on the poll's action result
+        parameters = {"request_data": {"incident_id": str(incident_id)}}
+        headers = self.authenticationHeaders()
+        ret_val, response = self._make_rest_call(
+            '/incidents/get_incident_extra_data/', ActionResult(), headers=headers, json=parameters
+        )
+
+        if phantom.is_fail(ret_val):
+            self.debug_print("Failed to get extra data of incident {0}".format(incident_id))
+            return None
+
+        return response.get("reply")
+
+    def _create_incident_container(self, incident, extra_data=None):
+        cef = {"cortex_xdr": True}
+        cef.update(incident)
+
+        data = dict(incident)
+        if extra_data:
+            data["extra_data"] = extra_data
+
+        return {
+            "name": "Cortex XDR Incident {0}".format(incident["incident_id"]),
+            "description": "Cortex XDR Incident",
+            "source_data_identifier": str(incident["incident_id"]),
+            "data": data,
+            "artifacts": [{"label": "incident", "cef": cef}]
+        }
+
     def _handle_on_poll(self, param):
         # Add an action result object to self (BaseConnector) to represent the action for this param
         action_result = self.add_action_result(ActionResult(dict(param)))
 
         polled_count = 0
-        incidents = []
+        last_incident = self._state.get("last_incident", int((datetime.now(timezone.utc) - timedelta(days=7)).timestamp() * 1000))
 
+        # The filter is fixed for the whole poll so that the offsets stay consistent between pages
+        request_data = {
+            "filters": [{"field": "creation_time", "operator": "gte", "value": last_incident}],
+            "sort": {"field": "creation_time", "keyword": "asc"}
+        }
+
+        search_from = 0
         while True:
-            obj, sort, request_data, parameters = {}, {}, {}, {}
-            filters = []
-            obj["field"] = "creation_time"
-            obj["operator"] = "gte"
-            obj["value"] = self._state.get("last_incident", int((datetime.now(timezone.utc) - timedelta(days=7)).timestamp() * 1000))
-            filters.append(obj)
-            request_data["filters"] = filters
-            sort["field"] = "creation_time"
-            sort["keyword"] = "asc"
-            request_data["sort"] = sort
-            parameters["request_data"] = request_data
+            request_data["search_from"] = search_from
+            request_data["search_to"] = search_from + INCIDENTS_PAGE_SIZE
+            parameters = {"request_data": request_data}
 
             # make rest call
             headers = self.authenticationHeaders()
@@ -270,40 +332,33 @@ class TestConnector(BaseConnector):
                 return action_result.get_status()
 
             reply = response["reply"]
-            if reply["total_count"] == 0:
+            incidents = reply["incidents"]
+            if not incidents:
                 break
-            polled_count += reply["result_count"]
-            incidents += reply["incidents"]
-            self._state.update({"last_incident": incidents[-1]["creation_time"] + 1})
-            self.save_state(self._state)
 
-            if reply["total_count"] == reply["result_count"]:
-                break
+            if self._ingest_incident_details:
+                with ThreadPoolExecutor(max_workers=self._incident_detail_workers) as executor:
+                    extra_data = list(executor.map(self._get_incident_extra_data, [incident["incident_id"] for incident in incidents]))
+            else:
+                extra_data = [None] * len(incidents)
+
+            containers = [self._create_incident_container(incident, extra) for incident, extra in zip(incidents, extra_data)]
 
-        for incident in incidents:
-            cef, container = {}, {}
-            container["name"] = "Cortex XDR Incident {0}".format(incident["incident_id"])
-            container["description"] = "Cortex XDR Incident"
-
-            first_cef = True
-
-            for key, value in incident.items():
-                if first_cef:
-                    cef["cortex_xdr"] = True
-                    first_cef = False
-                cef[key] = value
-                artifacts = []
-                artifact = {"label": "incident", "cef": cef}
-                artifacts.append(artifact)
-                container["data"] = incident
-                container["artifacts"] = artifacts
-
-            status, message, container_id = self.save_container(container)
-            if status == phantom.APP_ERROR:
+            status, message, _ = self.save_containers(containers)
+            if phantom.is_fail(status):
                 self.debug_print("Failed to store: {0}".format(message))
-                self.debug_print("stat/msg {0}/{1}".format(status, message))
                 return action_result.set_status(phantom.APP_ERROR, "Container creation failed: {0}".format(message))
 
+            # Checkpoint once the whole page is committed
+            polled_count += len(incidents)
+            self._state.update({"last_incident": incidents[-1]["creation_time"] + 1})
+            self.save_state(self._state)
+            self.save_progress("{0} incident(s) ingested".format(polled_count))
+
+            search_from += len(incidents)
+            if len(incidents) < INCIDENTS_PAGE_SIZE or search_from >= reply["total_count"]:
+                break
+
         # Return success
         self.save_progress("{0} incident(s) polled".format(polled_count))
         return action_result.set_status(phantom.APP_SUCCESS)
@@ -577,27 +632,23 @@ class TestConnector(BaseConnector):
         action_result = self.add_action_result(ActionResult(dict(param)))
 
         # Access action parameters passed in the 'param' dictionary
-        endpoint_id = param["endpoint_id"]
+        endpoint_ids = self._get_list_from_param(param["endpoint_id"])
         file_path = param["file_path"]
         file_hash = param["file_hash"]
 
-        obj, request_data, parameters = {}, {}, {}
-        endpoints, filters = [], []
-        endpoints.append(endpoint_id)
-        obj["field"] = "endpoint_id_list"
-        obj["operator"] = "in"
-        obj["value"] = endpoints
-        filters.append(obj)
-        request_data["filters"] = filters
-        request_data["file_path"] = file_path
-        request_data["file_hash"] = file_hash
-        parameters["request_data"] = request_data
-        self.save_progress("Request JSON: {0}".format(parameters))
+        if not endpoint_ids:
+            return action_result.set_status(phantom.APP_ERROR, VALID_VALUE_MSG.format(key=ENDPOINTID_ACTION_PARAM))
 
-        # make rest call
-        headers = self.authenticationHeaders()
-        ret_val, response = self._make_rest_call(
-            '/endpoints/quarantine/', action_result, headers=headers, json=parameters
+        def build_request_data(endpoints_chunk):
+            return {
+                "filters": [{"field": "endpoint_id_list", "operator": "in", "value": endpoints_chunk}],
+                "file_path": file_path,
+                "file_hash": file_hash
+            }
+
+        # The endpoint IDs are split over as many requests as the filter size requires
+        ret_val, responses = self._make_chunked_rest_call(
+            '/endpoints/quarantine/', action_result, endpoint_ids, build_request_data
         )
 
         if phantom.is_fail(ret_val):
@@ -605,15 +656,18 @@ class TestConnector(BaseConnector):
             return action_result.get_status()
 
         # Add the response into the data section
-        action_result.add_data(response)
-        self.save_progress("Response JSON: {0}".format(response))
+        for response in responses:
+            action_result.add_data(response)
+            self.save_progress("Response JSON: {0}".format(response))
 
         try:
             # Add a dictionary that is made up of the most important values from data into the summary
             summary = action_result.update_summary({})
-            reply = response["reply"]
-            summary["action_id"] = reply["action_id"]
-            summary["raw"] = response
+            replies = [response["reply"] for response in responses]
+            summary["action_id"] = replies[0]["action_id"]
+            if len(replies) > 1:
+                summary["action_ids"] = [reply["action_id"] for reply in replies]
+            summary["raw"] = responses[0] if len(responses) == 1 else responses
         except Exception:
             self.debug_print(ERR_PARSING_RESPONSE)
 
@@ -673,12 +727,14 @@ class TestConnector(BaseConnector):
         action_result = self.add_action_result(ActionResult(dict(param)))
 
         # Access action parameters passed in the 'param' dictionary
-        file_hash = param["file_hash"]
+        file_hashes = self._get_list_from_param(param["file_hash"])
         comment = param.get("comment")
         incident_id = param.get("incident_id")
 
-        request_data, parameters = {}, {}
-        request_data["hash_list"] = [file_hash]
+        if not file_hashes:
+            return action_result.set_status(phantom.APP_ERROR, VALID_VALUE_MSG.format(key=FILEHASH_ACTION_PARAM))
+
+        request_data = {}
         if comment:
             request_data["comment"] = comment
         if incident_id:
@@ -688,13 +744,9 @@ class TestConnector(BaseConnector):
                 return action_result.get_status()
             request_data["incident_id"] = str(incident_id)
 
-        parameters["request_data"] = request_data
-        self.save_progress("Request JSON: {0}".format(parameters))
-
-        # make rest call
-        headers = self.authenticationHeaders()
-        ret_val, response = self._make_rest_call(
-            '/hash_exceptions/block_list/', action_result, headers=headers, json=parameters
+        # The hashes are split over as many requests as the list size requires
+        ret_val, responses = self._make_chunked_rest_call(
+            '/hash_exceptions/block_list/', action_result, file_hashes, lambda hashes_chunk: dict(request_data, hash_list=hashes_chunk)
         )
 
         if phantom.is_fail(ret_val):
@@ -702,14 +754,15 @@ class TestConnector(BaseConnector):
             return action_result.get_status()
 
         # Add the response into the data section
-        action_result.add_data(response)
-        self.save_progress("Response JSON: {0}".format(response))
+        for response in responses:
+            action_result.add_data(response)
+            self.save_progress("Response JSON: {0}".format(response))
 
         try:
             # Add a dictionary that is made up of the most important values from data into the summary
             summary = action_result.update_summary({})
-            summary["list_updated"] = response["reply"]
-            summary["raw"] = response
+            summary["list_updated"] = all(response["reply"] for response in responses)
+            summary["raw"] = responses[0] if len(responses) == 1 else responses
         except Exception:
             self.debug_print(ERR_PARSING_RESPONSE)
 
@@ -725,12 +778,14 @@ class TestConnector(BaseConnector):
         action_result = self.add_action_result(ActionResult(dict(param)))
 
         # Access action parameters passed in the 'param' dictionary
-        file_hash = param["file_hash"]
+        file_hashes = self._get_list_from_param(param["file_hash"])
         comment = param.get("comment")
         incident_id = param.get("incident_id")
 
-        request_data, parameters = {}, {}
-        request_data["hash_list"] = [file_hash]
+        if not file_hashes:
+            return action_result.set_status(phantom.APP_ERROR, VALID_VALUE_MSG.format(key=FILEHASH_ACTION_PARAM))
+
+        request_data = {}
         if comment:
             request_data["comment"] = comment
         if incident_id:
@@ -740,13 +795,9 @@ class TestConnector(BaseConnector):
                 return action_result.get_status()
             request_data["incident_id"] = str(incident_id)
 
-        parameters["request_data"] = request_data
-        self.save_progress("Request JSON: {0}".format(parameters))
-
-        # make rest call
-        headers = self.authenticationHeaders()
-        ret_val, response = self._make_rest_call(
-            '/hash_exceptions/allow_list/', action_result, headers=headers, json=parameters
+        # The hashes are split over as many requests as the list size requires
+        ret_val, responses = self._make_chunked_rest_call(
+            '/hash_exceptions/allow_list/', action_result, file_hashes, lambda hashes_chunk: dict(request_data, hash_list=hashes_chunk)
         )
 
         if phantom.is_fail(ret_val):
@@ -754,14 +805,15 @@ class TestConnector(BaseConnector):
             return action_result.get_status()
 
         # Add the response into the data section
-        action_result.add_data(response)
-        self.save_progress("Response JSON: {0}".format(response))
+        for response in responses:
+            action_result.add_data(response)
+            self.save_progress("Response JSON: {0}".format(response))
 
         try:
             # Add a dictionary that is made up of the most important values from data into the summary
             summary = action_result.update_summary({})
-            summary["list_updated"] = response["reply"]
-            summary["raw"] = response
+            summary["list_updated"] = all(response["reply"] for response in responses)
+            summary["raw"] = responses[0] if len(responses) == 1 else responses
         except Exception:
             self.debug_print(ERR_PARSING_RESPONSE)
 
@@ -853,16 +905,14 @@ class TestConnector(BaseConnector):
         # BaseConnector will create a textual message based off of the summary dictionary
         return action_result.set_status(phantom.APP_SUCCESS)
 
-    def _handle_scan_endpoint(self, param):
-        # use self.save_progress(...) to send progress messages back to the platform
-        self.save_progress("In action handler for: {0}".format(self.get_action_identifier()))
-
+    def _scan_endpoints(self, param, endpoint, count_key):
+        # Shared by 'scan endpoint' and 'cancel scan endpoint', which only differ in the API endpoint they call
         # Add an action result object to self (BaseConnector) to represent the action for this param
         action_result = self.add_action_result(ActionResult(dict(param)))
 
         # Access action parameters passed in the 'param' dictionary
         scan_all = param.get("scan_all", False)
-        endpoint_id = param.get("endpoint_id")
+        endpoint_ids = self._get_list_from_param(param.get("endpoint_id"))
         dist_name = param.get("dist_name")
         first_seen = param.get("first_seen")
         last_seen = param.get("last_seen")
@@ -874,19 +924,11 @@ class TestConnector(BaseConnector):
         hostname = param.get("hostname")
         scan_status = param.get("scan_status")
 
-        request_data, parameters = {}, {}
+        request_data = {}
         if scan_all:
             request_data["filters"] = "all"
         else:
             filters = []
-            if endpoint_id:
-                endpoints = []
-                obj = {}
-                endpoints.append(endpoint_id)
-                obj["field"] = "endpoint_id_list"
-                obj["operator"] = "in"
-                obj["value"] = endpoints
-                filters.append(obj)
             if dist_name:
                 dists = []
                 obj = {}
@@ -980,17 +1022,19 @@ class TestConnector(BaseConnector):
                     filters.append(obj)
                 else:
                     return action_result.set_status(phantom.APP_ERROR, VALID_VALUE_MSG.format(key=SCANSTATUS_ACTION_PARAM))
-            if not filters:
+            if not (filters or endpoint_ids):
                 return action_result.set_status(phantom.APP_ERROR, "Please provide at least one filter criterion")
             request_data["filters"] = filters
 
-        parameters["request_data"] = request_data
-        self.save_progress("Request JSON: {0}".format(parameters))
+        def build_request_data(endpoints_chunk):
+            if not endpoints_chunk:
+                return request_data
+            endpoint_filter = {"field": "endpoint_id_list", "operator": "in", "value": endpoints_chunk}
+            return dict(request_data, filters=[endpoint_filter] + request_data["filters"])
 
-        # make rest call
-        headers = self.authenticationHeaders()
-        ret_val, response = self._make_rest_call(
-            '/endpoints/scan/', action_result, headers=headers, json=parameters
+        # The endpoint IDs are split over as many requests as the filter size requires
+        ret_val, responses = self._make_chunked_rest_call(
+            endpoint, action_result, endpoint_ids if not scan_all else [], build_request_data
         )
 
         if phantom.is_fail(ret_val):
@@ -998,16 +1042,19 @@ class TestConnector(BaseConnector):
             return action_result.get_status()
 
         # Add the response into the data section
-        action_result.add_data(response)
-        self.save_progress("Response JSON: {0}".format(response))
+        for response in responses:
+            action_result.add_data(response)
+            self.save_progress("Response JSON: {0}".format(response))
 
         try:
             # Add a dictionary that is made up of the most important values from data into the summary
             summary = action_result.update_summary({})
-            reply = response["reply"]
-            summary["action_id"] = reply["action_id"]
-            summary["endpoint_scanning"] = reply["endpoints_count"]
-            summary["raw"] = response
+            replies = [response["reply"] for response in responses]
+            summary["action_id"] = replies[0]["action_id"]
+            if len(replies) > 1:
+                summary["action_ids"] = [reply["action_id"] for reply in replies]
+            summary[count_key] = sum(reply["endpoints_count"] for reply in replies)
+            summary["raw"] = responses[0] if len(responses) == 1 else responses
         except Exception:
             self.debug_print(ERR_PARSING_RESPONSE)
 
@@ -1015,167 +1062,17 @@ class TestConnector(BaseConnector):
         # BaseConnector will create a textual message based off of the summary dictionary
         return action_result.set_status(phantom.APP_SUCCESS)
 
-    def _handle_cancel_scan_endpoint(self, param):
+    def _handle_scan_endpoint(self, param):
         # use self.save_progress(...) to send progress messages back to the platform
         self.save_progress("In action handler for: {0}".format(self.get_action_identifier()))
 
-        # Add an action result object to self (BaseConnector) to represent the action for this param
-        action_result = self.add_action_result(ActionResult(dict(param)))
-
-        # Access action parameters passed in the 'param' dictionary
-        scan_all = param.get("scan_all", False)
-        endpoint_id = param.get("endpoint_id")
-        dist_name = param.get("dist_name")
-        first_seen = param.get("first_seen")
-        last_seen = param.get("last_seen")
-        ip_list = param.get("ip_list")
-        group_name = param.get("group_name")
-        platform = param.get("platform")
-        alias = param.get("alias")
-        isolate = param.get("isolate", False)
-        hostname = param.get("hostname")
-        scan_status = param.get("scan_status")
-
-        request_data, parameters = {}, {}
-        if scan_all:
-            request_data["filters"] = "all"
-        else:
-            filters = []
-            if endpoint_id:
-                endpoints = []
-                obj = {}
-                endpoints.append(endpoint_id)
-                obj["field"] = "endpoint_id_list"
-                obj["operator"] = "in"
-                obj["value"] = endpoints
-                filters.append(obj)
-            if dist_name:
-                dists = []
-                obj = {}
-                dists.append(dist_name)
-                obj["field"] = "dist_name"
-                obj["operator"] = "in"
-                obj["value"] = dists
-                filters.append(obj)
-            if first_seen:
-                # Validate 'first_seen' action parameter
-                ret_val, first_seen = self._validate_integer(action_result, first_seen, FIRSTSEEN_ACTION_PARAM)
-                if phantom.is_fail(ret_val):
-                    return action_result.get_status()
-                obj = {}
-                obj["field"] = "first_seen"
-                obj["operator"] = "gte"
-                obj["value"] = first_seen
-                filters.append(obj)
-            if last_seen:
-                # Validate 'last_seen' action parameter
-                ret_val, last_seen = self._validate_integer(action_result, last_seen, LASTSEEN_ACTION_PARAM)
-                if phantom.is_fail(ret_val):
-                    return action_result.get_status()
-                obj = {}
-                obj["field"] = "last_seen"
-                obj["operator"] = "gte"
-                obj["value"] = last_seen
-                filters.append(obj)
-            if ip_list:
-                ips = []
-                obj = {}
-                ips.append(ip_list)
-                obj["field"] = "ip_list"
-                obj["operator"] = "in"
-                obj["value"] = ips
-                filters.append(obj)
-            if group_name:
-                groups = []
-                obj = {}
-                groups.append(group_name)
-                obj["field"] = "group_name"
-                obj["operator"] = "in"
-                obj["value"] = groups
-                filters.append(obj)
-            if platform:
-                if any(value == platform for value in PLATFORMS_LIST):
-                    temp = []
-                    obj = {}
-                    temp.append(platform)
-                    obj["field"] = "platform"
-                    obj["operator"] = "in"
-                    obj["value"] = temp
-                    filters.append(obj)
-                else:
-                    return action_result.set_status(phantom.APP_ERROR, VALID_VALUE_MSG.format(key=PLATFORM_ACTION_PARAM))
-            if alias:
-                aliases = []
-                obj = {}
-                aliases.append(alias)
-                obj["field"] = "alias"
-                obj["operator"] = "in"
-                obj["value"] = aliases
-                filters.append(obj)
-            if isolate is True or isolate is False:
-                isolates = []
-                obj = {}
-                if isolate is True:
-                    isolates.append("isolated")
-                else:
-                    isolates.append("unisolated")
-                obj["field"] = "isolate"
-                obj["operator"] = "in"
-                obj["value"] = isolates
-                filters.append(obj)
-            if hostname:
-                hostnames = []
-                obj = {}
-                hostnames.append(hostname)
-                obj["field"] = "hostname"
-                obj["operator"] = "in"
-                obj["value"] = hostnames
-                filters.append(obj)
-            if scan_status:
-                if any(value == scan_status for value in SCAN_STATUSES):
-                    status = []
-                    obj = {}
-                    status.append(scan_status)
-                    obj["field"] = "scan_status"
-                    obj["operator"] = "in"
-                    obj["value"] = status
-                    filters.append(obj)
-                else:
-                    return action_result.set_status(phantom.APP_ERROR, VALID_VALUE_MSG.format(key=SCANSTATUS_ACTION_PARAM))
-            if not filters:
-                return action_result.set_status(phantom.APP_ERROR, "Please provide at least one filter criterion")
-            request_data["filters"] = filters
-
-        parameters["request_data"] = request_data
-        self.save_progress("Request JSON: {0}".format(parameters))
-
-        # make rest call
-        headers = self.authenticationHeaders()
-        ret_val, response = self._make_rest_call(
-            '/endpoints/abort_scan/', action_result, headers=headers, json=parameters
-        )
+        return self._scan_endpoints(param, '/endpoints/scan/', "endpoint_scanning")
 
-        if phantom.is_fail(ret_val):
-            # the call to the 3rd party device or service failed, action result should contain all the error details
-            return action_result.get_status()
-
-        # Add the response into the data section
-        action_result.add_data(response)
-        self.save_progress("Response JSON: {0}".format(response))
-
-        try:
-            # Add a dictionary that is made up of the most important values from data into the summary
-            summary = action_result.update_summary({})
-            reply = response["reply"]
-            summary["action_id"] = reply["action_id"]
-            summary["endpoint_cancelling"] = reply["endpoints_count"]
-            summary["raw"] = response
-        except Exception:
-            self.debug_print(ERR_PARSING_RESPONSE)
+    def _handle_cancel_scan_endpoint(self, param):
+        # use self.save_progress(...) to send progress messages back to the platform
+        self.save_progress("In action handler for: {0}".format(self.get_action_identifier()))
 
-        # Return success, no need to set the message, only the status
-        # BaseConnector will create a textual message based off of the summary dictionary
-        return action_result.set_status(phantom.APP_SUCCESS)
+        return self._scan_endpoints(param, '/endpoints/abort_scan/', "endpoint_cancelling")
 
     def _handle_get_incidents(self, param):
         # use self.save_progress(...) to send progress messages back to the platform
@@ -1580,9 +1477,29 @@ class TestConnector(BaseConnector):
         self._api_key_id = config['api_id']
         self._verify = config.get('verify_server_cert', False)
 
+        # One keep-alive session per connector run, so bulk actions reuse the TLS connection
+        self._session = requests.Session()
+        self._auth_headers = {"x-xdr-auth-id": str(self._api_key_id)}
+        if self._advanced:
+            self._api_key_hash = hashlib.sha256(self._api_key.encode("utf-8"))
+        else:
+            self._auth_headers["Authorization"] = self._api_key
+        self._ingest_incident_details = config.get('ingest_incident_details', False)
+
+        ret_val, self._incident_detail_workers = self._validate_integer(
+            self, config.get('incident_detail_workers', DEFAULT_INCIDENT_DETAIL_WORKERS), INCIDENTDETAILWORKERS_CONFIG_PARAM
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+        if not self._incident_detail_workers:
+            self._incident_detail_workers = DEFAULT_INCIDENT_DETAIL_WORKERS
+
         return phantom.APP_SUCCESS
 
     def finalize(self):
+        if self._session:
+            self._session.close()
+
         # Save the state, this data is saved across actions and app upgrades
         self.save_state(self._state)
         return phantom.APP_SUCCESS
@@ -25,6 +25,9 @@ SEARCHFROM_ACTION_PARAM = "'search_from' action parameter"
 SEARCHTO_ACTION_PARAM = "'search_to' action parameter"
 ALERTSLIMIT_ACTION_PARAM = "'alerts_limit' action parameter"
 ALERTID_ACTION_PARAM = "'alert_id' action parameter"
+ENDPOINTID_ACTION_PARAM = "'endpoint_id' action parameter"
+FILEHASH_ACTION_PARAM = "'file_hash' action parameter"
+INCIDENTDETAILWORKERS_CONFIG_PARAM = "'incident_detail_workers' asset configuration parameter"
 
 SORTORDER_ACTION_PARAM = "'sort_order' action parameter"
 SORTFIELD_ACTION_PARAM = "'sort_field' action parameter"
@@ -37,3 +40,10 @@ SEVERITY_ACTION_PARAM = "'severity' action parameter"
 PLATFORMS_LIST = ["windows", "linux", "macos", "android"]
 SCAN_STATUSES = ["none", "pending", "in_progress", "canceled", "aborted", "pending_cancellation", "success", "error"]
 SORT_ORDERS = ["asc", "desc"]
+
+# On poll constants
+INCIDENTS_PAGE_SIZE = 100
+DEFAULT_INCIDENT_DETAIL_WORKERS = 5
+
+# Maximum number of values sent in a single filter or list of a request
+MAX_FILTER_VALUES = 100
@@ -17,6 +17,7 @@ import xmltodict
 import re
 import time
 from bs4 import UnicodeDammit
+from concurrent.futures import ThreadPoolExecutor
 
 
 class PanoramaConnector(BaseConnector):
@@ -41,6 +42,9 @@ class PanoramaConnector(BaseConnector):
         self._param = None
         self._dev_sys_key = None
         self._device_groups = {}
+        self._max_concurrent_commits = PAN_DEFAULT_MAX_CONCURRENT_COMMITS
+        self._coalesce_commits = False
+        self._queued_commits = {}
 
     def initialize(self):
 
@@ -57,6 +61,33 @@ class PanoramaConnector(BaseConnector):
 
         self._dev_sys_key = "device-group"
 
+        try:
+            self._max_concurrent_commits = int(config.get(PAN_JSON_MAX_CONCURRENT_COMMITS, PAN_DEFAULT_MAX_CONCURRENT_COMMITS))
+            if self._max_concurrent_commits <= 0:
+                raise ValueError
+        except (ValueError, TypeError):
+            return self.set_status(phantom.APP_ERROR, PAN_ERR_INVALID_MAX_CONCURRENT_COMMITS)
+
+        self._coalesce_commits = config.get(PAN_JSON_COALESCE_COMMITS, False)
+
+        return phantom.APP_SUCCESS
+
+    def finalize(self):
+
+        # Run the commits queued by the block and unblock actions of this run once, for all their device groups
+        if not self._queued_commits:
+            return phantom.APP_SUCCESS
+
+        commit_action_result = ActionResult()
+
+        self._commit_and_commit_all_device_groups(list(self._queued_commits.keys()), commit_action_result)
+
+        action_results = [action_result for queued in self._queued_commits.values() for action_result in queued]
+        for action_result in action_results:
+            action_result.append_to_message("\n{0}".format(commit_action_result.get_message()))
+
+        self._queued_commits = {}
+
         return phantom.APP_SUCCESS
 
     def _handle_py_ver_compat_for_input_str(self, input_str):
@@ -533,138 +564,176 @@ class PanoramaConnector(BaseConnector):
 
         return device_ar.set_status(status, status_message)
 
-    def _commit_device(self, device_group, device, dev_info, device_ar, param):
+    def _get_device_commit_data(self, device_group, dev_info):
 
-        device_group = self._handle_py_ver_compat_for_input_str(param[PAN_JSON_DEVICE_GRP])
-
-        self.save_progress("Commiting the config to device '{0}({1})' belonging to device group '{2}'".format(dev_info['hostname'], device, device_group))
+        self.save_progress("Commiting the config to device '{0}({1})' belonging to device group '{2}'".format(dev_info['hostname'], dev_info['serial'], device_group))
 
         cmd = COMMIT_ALL_DEV_GRP_DEV_CMD.format(device_group=device_group, dev_ser_num=dev_info['serial'])
 
-        data = {'type': 'commit',
+        return {'type': 'commit',
                 'action': 'all',
                 'cmd': cmd,
                 'key': self._key}
 
-        commit_dev_ar = ActionResult()
+    def _get_device_group_commit_data(self, device_group):
 
-        status = self._make_rest_call(data, commit_dev_ar)
+        self.save_progress("Commiting the config to the device group '{0}'".format(device_group))
+
+        return {'type': 'commit',
+                'action': 'all',
+                'cmd': '<commit-all><shared-policy><device-group><entry name="{0}"/></device-group></shared-policy></commit-all>'.format(device_group),
+                'key': self._key}
+
+    def _submit_commit(self, data, action_result):
+        """Submit a commit and return the id of its job"""
+
+        rest_call_action_result = ActionResult()
+
+        status = self._make_rest_call(data, rest_call_action_result)
 
         if phantom.is_fail(status):
-            return device_ar.set_status(commit_dev_ar.get_status(), commit_dev_ar.get_message())
+            return (action_result.set_status(rest_call_action_result.get_status(), rest_call_action_result.get_message()), None)
 
-        # Get the job id of the commit call from the result_data, also pop it since we don't need it
-        # to be in the action result
-        result_data = commit_dev_ar.get_data()
+        # Get the job id of the commit call from the result_data
+        result_data = rest_call_action_result.get_data()
 
         if len(result_data) == 0:
-            return device_ar.set_status(commit_dev_ar.get_status(), commit_dev_ar.get_message())
+            return (action_result.set_status(rest_call_action_result.get_status(), rest_call_action_result.get_message()), None)
 
-        result_data = result_data.pop(0)
-        job_id = result_data.get('job')
+        job_id = result_data[0].get('job')
 
         if not job_id:
-            return device_ar.set_status(phantom.APP_ERROR, PAN_ERR_NO_JOB_ID)
+            return (action_result.set_status(phantom.APP_ERROR, PAN_ERR_NO_JOB_ID), None)
 
         self.debug_print("commit job id: ", job_id)
 
-        while True:
-            data = {'type': 'op',
-                    'key': self._key,
-                    'cmd': '<show><jobs><id>{job}</id></jobs></show>'.format(job=job_id)}
+        return (phantom.APP_SUCCESS, job_id)
 
-            status_action_result = ActionResult()
+    def _get_jobs(self, action_result):
+        """Get the status of all the jobs in a single call"""
 
-            status = self._make_rest_call(data, status_action_result)
+        data = {'type': 'op',
+                'key': self._key,
+                'cmd': '<show><jobs><all></all></jobs></show>'}
 
-            if phantom.is_fail(status):
-                return device_ar.set_status(phantom.APP_SUCCESS, status_action_result.get_message())
+        status = self._make_rest_call(data, action_result)
 
-            self.debug_print("status", status_action_result)
+        if phantom.is_fail(status):
+            return (action_result.get_status(), None)
 
-            # get the result_data and the job status
-            result_data = status_action_result.get_data()
-            job = result_data[0].get('job')
-            if not job:
-                continue
-            try:
-                if job['status'] == 'FIN':
-                    self._parse_device_job_response(job, device_ar)
-                    break
-            except Exception as e:
-                err = self._get_error_message_from_exception(e)
-                return device_ar.set_status(phantom.APP_ERROR, "Error occurred while processing response from server. {}".format(err))
+        result_data = action_result.get_data()
 
-            # send the % progress
-            self.send_progress(PAN_PROG_COMMIT_PROGRESS, progress=job.get('progress'))
+        try:
+            jobs = result_data[0].get('job') or []
+        except Exception as e:
+            err = self._get_error_message_from_exception(e)
+            return (action_result.set_status(phantom.APP_ERROR, "Error occurred while processing response from server. {}".format(err)), None)
 
-            time.sleep(2)
+        if isinstance(jobs, dict):
+            jobs = [jobs]
 
-        return device_ar.get_status()
+        return (phantom.APP_SUCCESS, jobs)
 
-    def _commit_device_group(self, device_group, param, action_result):
+    def _get_job(self, job_id, action_result):
+        """Get the full details of a job, including the per device status of a commit-all job"""
 
-        self.save_progress("Commiting the config to the device group '{0}'".format(device_group))
+        data = {'type': 'op',
+                'key': self._key,
+                'cmd': '<show><jobs><id>{job}</id></jobs></show>'.format(job=job_id)}
 
-        data = {'type': 'commit',
-                'action': 'all',
-                'cmd': '<commit-all><shared-policy><device-group><entry name="{0}"/></device-group></shared-policy></commit-all>'.format(device_group),
-                'key': self._key}
+        status = self._make_rest_call(data, action_result)
 
-        rest_call_action_result = ActionResult()
+        if phantom.is_fail(status):
+            return (action_result.get_status(), None)
 
-        status = self._make_rest_call(data, rest_call_action_result)
+        self.debug_print("status", action_result)
 
-        if phantom.is_fail(status):
-            return action_result.set_status(rest_call_action_result.get_status(), rest_call_action_result.get_message())
+        result_data = action_result.get_data()
 
-        # Get the job id of the commit call from the result_data, also pop it since we don't need it
-        # to be in the action result
-        result_data = rest_call_action_result.get_data()
+        try:
+            job = result_data[0]['job']
+        except Exception as e:
+            err = self._get_error_message_from_exception(e)
+            return (action_result.set_status(phantom.APP_ERROR, "Error occurred while processing response from server. {}".format(err)), None)
 
-        if len(result_data) == 0:
-            return action_result.set_status(rest_call_action_result.get_status(), rest_call_action_result.get_message())
+        return (phantom.APP_SUCCESS, job)
 
-        result_data = result_data.pop(0)
-        job_id = result_data.get('job')
+    def _run_commits(self, commits):
+        """Run the commits, at most 'max_concurrent_commits' of them at a time.
 
-        if not job_id:
-            return action_result.set_status(phantom.APP_ERROR, PAN_ERR_NO_JOB_ID)
+        commits is a list of (commit data, action result, job response parser) tuples. Submissions are sent
+        concurrently and the jobs of all the commits in flight are tracked with a single 'show jobs all' call per poll,
+        the API does not take a list of job ids. That listing only carries a summary of every job, so once a job
+        finishes its full details are fetched with 'show jobs id' and parsed into the action result of its commit.
+        """
 
-        self.debug_print("commit job id: ", job_id)
+        pending = list(commits)
+        in_flight = {}
+        finished_count = 0
 
-        while True:
-            data = {'type': 'op',
-                    'key': self._key,
-                    'cmd': '<show><jobs><id>{job}</id></jobs></show>'.format(job=job_id)}
+        while pending or in_flight:
+
+            # Fill the free slots with new commits
+            free_slots = self._max_concurrent_commits - len(in_flight)
+            to_submit, pending = pending[:free_slots], pending[free_slots:]
+
+            if to_submit:
+                with ThreadPoolExecutor(max_workers=len(to_submit)) as executor:
+                    submissions = list(executor.map(lambda commit: self._submit_commit(commit[0], commit[1]), to_submit))
+
+                for (data, commit_ar, parse_job_response), (status, job_id) in zip(to_submit, submissions):
+                    if phantom.is_fail(status):
+                        finished_count += 1
+                        continue
+                    in_flight[job_id] = (commit_ar, parse_job_response)
+
+            if not in_flight:
+                continue
 
             status_action_result = ActionResult()
 
-            status = self._make_rest_call(data, status_action_result)
+            status, jobs = self._get_jobs(status_action_result)
 
             if phantom.is_fail(status):
-                action_result.set_status(phantom.APP_SUCCESS, status_action_result.get_message())
-                return action_result.get_status()
+                # Unable to get the status of the jobs, report the commits as submitted
+                for commit_ar, _ in in_flight.values():
+                    commit_ar.set_status(phantom.APP_SUCCESS, status_action_result.get_message())
+                finished_count += len(in_flight)
+                in_flight = {}
+                continue
 
-            self.debug_print("status", status_action_result)
+            finished_ids = [job.get('id') for job in jobs if job.get('id') in in_flight and job.get('status') == 'FIN']
 
-            # get the result_data and the job status
-            result_data = status_action_result.get_data()
-            try:
-                job = result_data[0]['job']
-                if job['status'] == 'FIN':
-                    self._parse_device_group_job_response(job, action_result)
-                    break
-            except Exception as e:
-                err = self._get_error_message_from_exception(e)
-                return action_result.set_status(phantom.APP_ERROR, "Error occurred while processing response from server. {}".format(err))
+            if finished_ids:
+                job_action_results = [ActionResult() for _ in finished_ids]
+                with ThreadPoolExecutor(max_workers=len(finished_ids)) as executor:
+                    job_details = list(executor.map(self._get_job, finished_ids, job_action_results))
+            else:
+                job_action_results = job_details = []
 
-            # send the % progress
-            self.send_progress(PAN_PROG_COMMIT_PROGRESS, progress=job.get('progress'))
+            for job_id, job_action_result, (status, job) in zip(finished_ids, job_action_results, job_details):
 
-            time.sleep(2)
+                commit_ar, parse_job_response = in_flight.pop(job_id)
+                finished_count += 1
 
-        return action_result.get_status()
+                if phantom.is_fail(status):
+                    # The commit went through, only its details could not be fetched
+                    commit_ar.set_status(phantom.APP_SUCCESS, job_action_result.get_message())
+                    continue
+
+                try:
+                    parse_job_response(job, commit_ar)
+                except Exception as e:
+                    err = self._get_error_message_from_exception(e)
+                    commit_ar.set_status(phantom.APP_ERROR, "Error occurred while processing response from server. {}".format(err))
+
+            # send the progress
+            self.send_progress(PAN_PROG_COMMIT_JOBS_PROGRESS.format(finished=finished_count, total=len(commits)))
+
+            if in_flight:
+                time.sleep(PAN_COMMIT_JOB_POLL_INTERVAL)
+
+        return phantom.APP_SUCCESS
 
     def _get_addr_name(self, ip):
 
@@ -675,12 +744,26 @@ class PanoramaConnector(BaseConnector):
 
         return name
 
-    def _add_address_entry(self, param, action_result):
+    def _get_list_from_param(self, value, delimiter=','):
+
+        values = [x.strip() for x in self._handle_py_ver_compat_for_input_str(value).split(delimiter)]
+
+        # Remove the empty and the duplicate values, keeping the order
+        return list(dict.fromkeys(x for x in values if x))
+
+    def _get_members_elem(self, names):
+
+        return ''.join(MEMBER_ELEM.format(name=name) for name in names)
+
+    def _get_members_xpath(self, names):
+
+        return DEL_MEMBERS_XPATH.format(condition=' or '.join("text()='{0}'".format(name) for name in names))
+
+    def _add_address_entries(self, param, block_ips, action_result):
 
-        ip_type = None
-        name = None
+        names = []
+        entries = ''
         tag = self.get_container_id()
-        block_ip = self._handle_py_ver_compat_for_input_str(param[PAN_JSON_IP])
 
         # Add the tag to the system
         data = {'type': 'config',
@@ -692,36 +775,39 @@ class PanoramaConnector(BaseConnector):
         status = self._make_rest_call(data, action_result)
 
         if phantom.is_fail(status):
-            return (action_result.get_status(), name)
-
-        # Try to figure out the type of ip
-        if block_ip.find('/') != -1:
-            ip_type = 'ip-netmask'
-        elif block_ip.find('-') != -1:
-            ip_type = 'ip-range'
-        elif phantom.is_ip(block_ip):
-            ip_type = 'ip-netmask'
-        elif phantom.is_hostname(block_ip):
-            ip_type = 'fqdn'
-        else:
-            return (action_result.set_status(phantom.APP_ERROR, PAN_ERR_INVALID_IP_FORMAT), name)
-
-        name = self._get_addr_name(block_ip)
+            return (action_result.get_status(), names)
+
+        for block_ip in block_ips:
+
+            # Try to figure out the type of ip
+            if block_ip.find('/') != -1:
+                ip_type = 'ip-netmask'
+            elif block_ip.find('-') != -1:
+                ip_type = 'ip-range'
+            elif phantom.is_ip(block_ip):
+                ip_type = 'ip-netmask'
+            elif phantom.is_hostname(block_ip):
+                ip_type = 'fqdn'
+            else:
+                return (action_result.set_status(phantom.APP_ERROR, "{0}: {1}".format(PAN_ERR_INVALID_IP_FORMAT, block_ip)), names)
 
-        address_xpath = IP_ADDR_XPATH.format(config_xpath=self._get_config_xpath(param), ip_addr_name=name)
+            name = self._get_addr_name(block_ip)
+            names.append(name)
+            entries = "{0}{1}".format(entries, IP_ADDR_ENTRY_ELEM.format(ip_addr_name=name, ip_type=ip_type, ip=block_ip, tag=tag))
 
+        # Add all the addresses in a single call
         data = {'type': 'config',
                 'action': 'set',
                 'key': self._key,
-                'xpath': address_xpath,
-                'element': IP_ADDR_ELEM.format(ip_type=ip_type, ip=block_ip, tag=tag)}
+                'xpath': IP_ADDRS_XPATH.format(config_xpath=self._get_config_xpath(param)),
+                'element': entries}
 
         status = self._make_rest_call(data, action_result)
 
         if phantom.is_fail(status):
-            return (action_result.get_status(), name)
+            return (action_result.get_status(), names)
 
-        return (phantom.APP_SUCCESS, name)
+        return (phantom.APP_SUCCESS, names)
 
     def _get_security_policy_xpath(self, param, action_result):
 
@@ -779,13 +865,16 @@ class PanoramaConnector(BaseConnector):
 
         action_result = self.add_action_result(ActionResult(dict(param)))
 
-        block_app = self._handle_py_ver_compat_for_input_str(param[PAN_JSON_APPLICATION])
+        block_apps = self._get_list_from_param(param[PAN_JSON_APPLICATION])
+
+        if not block_apps:
+            return action_result.set_status(phantom.APP_ERROR, PAN_ERR_EMPTY_LIST.format(PAN_JSON_APPLICATION))
 
         app_group_name = BLOCK_APP_GROUP_NAME.format(device_group=self._handle_py_ver_compat_for_input_str(param[PAN_JSON_DEVICE_GRP]))
         app_group_name = app_group_name[:MAX_NODE_NAME_LEN].strip()
 
         xpath = "{0}{1}".format(APP_GRP_XPATH.format(config_xpath=self._get_config_xpath(param), app_group_name=app_group_name),
-                DEL_APP_XPATH.format(app_name=block_app))
+                DEL_APP_XPATH.format(members=self._get_members_xpath(block_apps)))
 
         data = {'type': 'config',
                 'action': 'delete',
@@ -799,7 +888,7 @@ class PanoramaConnector(BaseConnector):
 
         message = action_result.get_message()
         # Now Commit the config
-        self._commit_and_commit_all(param, action_result)
+        self._commit_or_queue(param, action_result)
 
         return action_result.set_status(phantom.APP_SUCCESS, "Response Received: {}".format(message))
 
@@ -826,7 +915,10 @@ class PanoramaConnector(BaseConnector):
 
         self.debug_print("Creating the Application Group")
 
-        block_app = self._handle_py_ver_compat_for_input_str(param[PAN_JSON_APPLICATION])
+        block_apps = self._get_list_from_param(param[PAN_JSON_APPLICATION])
+
+        if not block_apps:
+            return action_result.set_status(phantom.APP_ERROR, PAN_ERR_EMPTY_LIST.format(PAN_JSON_APPLICATION))
 
         app_group_name = BLOCK_APP_GROUP_NAME.format(device_group=self._handle_py_ver_compat_for_input_str(param[PAN_JSON_DEVICE_GRP]))
         app_group_name = app_group_name[:MAX_NODE_NAME_LEN].strip()
@@ -835,7 +927,7 @@ class PanoramaConnector(BaseConnector):
                 'action': 'set',
                 'key': self._key,
                 'xpath': APP_GRP_XPATH.format(config_xpath=self._get_config_xpath(param), app_group_name=app_group_name),
-                'element': APP_GRP_ELEM.format(app_name=block_app)}
+                'element': APP_GRP_ELEM.format(members=self._get_members_elem(block_apps))}
 
         status = self._make_rest_call(data, action_result)
 
@@ -850,7 +942,7 @@ class PanoramaConnector(BaseConnector):
         if phantom.is_fail(status):
             return action_result.set_status(phantom.APP_ERROR, PAN_ERR_MSG.format("blocking application", action_result.get_message()))
 
-        self._commit_and_commit_all(param, action_result)
+        self._commit_or_queue(param, action_result)
 
         return action_result.set_status(phantom.APP_SUCCESS, "Response Received: {}".format(message))
 
@@ -866,12 +958,16 @@ class PanoramaConnector(BaseConnector):
         self.debug_print("Removing the Blocked URL")
 
         # Add the block url, will create the url profile if not present
-        block_url = self._handle_py_ver_compat_for_input_str(param[PAN_JSON_URL])
+        block_urls = self._get_list_from_param(param[PAN_JSON_URL], delimiter=PAN_URL_LIST_DELIMITER)
+
+        if not block_urls:
+            return action_result.set_status(phantom.APP_ERROR, PAN_ERR_EMPTY_LIST.format(PAN_JSON_URL))
+
         url_prof_name = BLOCK_URL_PROF_NAME.format(device_group=self._handle_py_ver_compat_for_input_str(param[PAN_JSON_DEVICE_GRP]))
         url_prof_name = url_prof_name[:MAX_NODE_NAME_LEN].strip()
 
         xpath = "{0}{1}".format(URL_PROF_XPATH.format(config_xpath=self._get_config_xpath(param), url_profile_name=url_prof_name),
-                DEL_URL_XPATH.format(url=block_url))
+                DEL_URL_XPATH.format(members=self._get_members_xpath(block_urls)))
 
         data = {'type': 'config',
                 'action': 'delete',
@@ -885,7 +981,7 @@ class PanoramaConnector(BaseConnector):
 
         message = action_result.get_message()
         # Now Commit the config
-        self._commit_and_commit_all(param, action_result)
+        self._commit_or_queue(param, action_result)
 
         return action_result.set_status(phantom.APP_SUCCESS, "Response Received: {}".format(message))
 
@@ -912,7 +1008,11 @@ class PanoramaConnector(BaseConnector):
 
         self.debug_print("Adding the Block URL")
         # Add the block url, will create the url profile if not present
-        block_url = self._handle_py_ver_compat_for_input_str(param[PAN_JSON_URL])
+        block_urls = self._get_list_from_param(param[PAN_JSON_URL], delimiter=PAN_URL_LIST_DELIMITER)
+
+        if not block_urls:
+            return action_result.set_status(phantom.APP_ERROR, PAN_ERR_EMPTY_LIST.format(PAN_JSON_URL))
+
         url_prof_name = BLOCK_URL_PROF_NAME.format(device_group=self._handle_py_ver_compat_for_input_str(param[PAN_JSON_DEVICE_GRP]))
         url_prof_name = url_prof_name[:MAX_NODE_NAME_LEN].strip()
 
@@ -920,7 +1020,7 @@ class PanoramaConnector(BaseConnector):
                 'action': 'set',
                 'key': self._key,
                 'xpath': URL_PROF_XPATH.format(config_xpath=self._get_config_xpath(param), url_profile_name=url_prof_name),
-                'element': URL_PROF_ELEM.format(url=block_url)}
+                'element': URL_PROF_ELEM.format(members=self._get_members_elem(block_urls))}
 
         status = self._make_rest_call(data, action_result)
 
@@ -936,7 +1036,7 @@ class PanoramaConnector(BaseConnector):
             return action_result.set_status(phantom.APP_ERROR, PAN_ERR_MSG.format("blocking url", action_result.get_message()))
 
         # Now Commit the config
-        self._commit_and_commit_all(param, action_result)
+        self._commit_or_queue(param, action_result)
 
         return action_result.set_status(phantom.APP_SUCCESS, "Response Received: {}".format(message))
 
@@ -1024,20 +1124,34 @@ class PanoramaConnector(BaseConnector):
 
         return action_result.set_status(status, status_message)
 
+    def _commit_or_queue(self, param, action_result):
+
+        if not self._coalesce_commits:
+            return self._commit_and_commit_all(param, action_result)
+
+        # The commit is run once in finalize, along with the ones of the other parameters of this run
+        device_group = self._handle_py_ver_compat_for_input_str(param[PAN_JSON_DEVICE_GRP])
+        self._queued_commits.setdefault(device_group, []).append(action_result)
+
+        return action_result.set_status(phantom.APP_SUCCESS, PAN_PROG_COMMIT_QUEUED)
+
     def _commit_and_commit_all(self, param, action_result):
 
+        device_group = self._handle_py_ver_compat_for_input_str(param[PAN_JSON_DEVICE_GRP])
+
+        return self._commit_and_commit_all_device_groups([device_group], action_result)
+
+    def _commit_and_commit_all_device_groups(self, device_groups, action_result):
+
         # Now Commit the config
         status = self._commit_config(action_result)
 
         if phantom.is_fail(status):
             return action_result.get_status()
 
-        device_group = self._handle_py_ver_compat_for_input_str(param[PAN_JSON_DEVICE_GRP])
-        device_groups = [device_group]
-
-        if device_group.lower() == PAN_DEV_GRP_SHARED:
+        if any(device_group.lower() == PAN_DEV_GRP_SHARED for device_group in device_groups):
             # get all the device groups
-            status, device_groups = self._get_all_device_groups(param, action_result)
+            status, device_groups = self._get_all_device_groups(None, action_result)
             if phantom.is_fail(status):
                 return action_result.get_status()
 
@@ -1048,10 +1162,13 @@ class PanoramaConnector(BaseConnector):
         action_result.set_status(phantom.APP_ERROR)
 
         dev_groups_ar = []
+        commits = []
         for device_group in device_groups:
             dev_grp_ar = ActionResult()
             dev_groups_ar.append(dev_grp_ar)
-            self._commit_device_group(device_group, param, dev_grp_ar)
+            commits.append((self._get_device_group_commit_data(device_group), dev_grp_ar, self._parse_device_group_job_response))
+
+        self._run_commits(commits)
 
         status = phantom.APP_ERROR
         status_message = ''
@@ -1100,6 +1217,7 @@ class PanoramaConnector(BaseConnector):
         # get back all the results and show it to the user
 
         dg_status = {}
+        commits = []
 
         for device_group in device_groups:
 
@@ -1131,7 +1249,9 @@ class PanoramaConnector(BaseConnector):
                     continue
 
                 # need to commit on this device
-                self._commit_device(device_group, device, dev_info, device_ar, param)
+                commits.append((self._get_device_commit_data(device_group, dev_info), device_ar, self._parse_device_job_response))
+
+        self._run_commits(commits)
 
         self._set_action_result_status(dg_status, action_result)
 
@@ -1147,9 +1267,12 @@ class PanoramaConnector(BaseConnector):
         action_result = self.add_action_result(ActionResult(dict(param)))
 
         # Create the ip addr name
-        unblock_ip = self._handle_py_ver_compat_for_input_str(param[PAN_JSON_IP])
+        unblock_ips = self._get_list_from_param(param[PAN_JSON_IP])
+
+        if not unblock_ips:
+            return action_result.set_status(phantom.APP_ERROR, PAN_ERR_EMPTY_LIST.format(PAN_JSON_IP))
 
-        addr_name = self._get_addr_name(unblock_ip)
+        addr_names = [self._get_addr_name(unblock_ip) for unblock_ip in unblock_ips]
 
         # Check if src or dst
         use_source = param.get(PAN_JSON_SOURCE_ADDRESS, PAN_DEFAULT_SOURCE_ADDRESS)
@@ -1164,7 +1287,7 @@ class PanoramaConnector(BaseConnector):
 
         xpath = "{0}{1}".format(ADDR_GRP_XPATH.format(config_xpath=self._get_config_xpath(param),
             ip_group_name=ip_group_name),
-                DEL_ADDR_GRP_XPATH.format(addr_name=addr_name))
+                DEL_ADDR_GRP_XPATH.format(members=self._get_members_xpath(addr_names)))
 
         # Remove the address from the phantom address group
         data = {'type': 'config',
@@ -1179,7 +1302,7 @@ class PanoramaConnector(BaseConnector):
 
         message = action_result.get_message()
         # Now Commit the config
-        self._commit_and_commit_all(param, action_result)
+        self._commit_or_queue(param, action_result)
 
         return action_result.set_status(phantom.APP_SUCCESS, "Response Received: {}".format(message))
 
@@ -1210,7 +1333,12 @@ class PanoramaConnector(BaseConnector):
         # Check where the IP should go
         use_source = param.get(PAN_JSON_SOURCE_ADDRESS, PAN_DEFAULT_SOURCE_ADDRESS)
 
-        status, addr_name = self._add_address_entry(param, action_result)
+        block_ips = self._get_list_from_param(param[PAN_JSON_IP])
+
+        if not block_ips:
+            return action_result.set_status(phantom.APP_ERROR, PAN_ERR_EMPTY_LIST.format(PAN_JSON_IP))
+
+        status, addr_names = self._add_address_entries(param, block_ips, action_result)
 
         if phantom.is_fail(status):
             return action_result.set_status(phantom.APP_ERROR, PAN_ERR_MSG.format("blocking ip", action_result.get_message()))
@@ -1228,7 +1356,7 @@ class PanoramaConnector(BaseConnector):
                 'action': 'set',
                 'key': self._key,
                 'xpath': ADDR_GRP_XPATH.format(config_xpath=self._get_config_xpath(param), ip_group_name=ip_group_name),
-                'element': ADDR_GRP_ELEM.format(addr_name=addr_name)}
+                'element': ADDR_GRP_ELEM.format(members=self._get_members_elem(addr_names))}
 
         status = self._make_rest_call(data, action_result)
 
@@ -1243,7 +1371,7 @@ class PanoramaConnector(BaseConnector):
         if phantom.is_fail(status):
             return action_result.get_status()
 
-        self._commit_and_commit_all(param, action_result)
+        self._commit_or_queue(param, action_result)
 
         return action_result.set_status(phantom.APP_SUCCESS, "Response Received: {}".format(message))
 
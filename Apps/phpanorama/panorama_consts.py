@@ -23,6 +23,8 @@ PAN_ERR_MESSAGE = "Unknown error occurred. Please check the asset configuration
 TYPE_ERR_MESSAGE = "Error occurred while connecting to the Panorama server. Please check the asset configuration and|or the action parameters"
 PARSE_ERR_MESSAGE = "Unable to parse the error message. Please check the asset configuration and|or action parameters"
 PAN_ERR_MSG = "Error occurred while {}. Details: {}"
+PAN_ERR_EMPTY_LIST = "Please provide at least one value in the '{}' action parameter"
+PAN_ERR_INVALID_MAX_CONCURRENT_COMMITS = "Please provide a valid non-zero positive integer value in the 'max_concurrent_commits' asset configuration parameter"
 
 PAN_PROG_USING_BASE_URL = "Using base URL '{base_url}'"
 PAN_PROG_GOT_REPLY = "Got reply, parsing..."
@@ -30,6 +32,8 @@ PAN_PROG_PARSED_REPLY = "Done"
 PAN_PROG_COMMIT_PROGRESS = "Commit completed {progress}%"
 PAN_PROG_COMMIT_ALL_PROGRESS = "Commit on device group: {device_group} completed {progress}%"
 PAN_PROG_COMMIT_PROGRESS_PENDING = "Commit completed {progress}%, but still Pending on remote device"
+PAN_PROG_COMMIT_QUEUED = "Config updated, commit queued until all the parameters of this action run are processed"
+PAN_PROG_COMMIT_JOBS_PROGRESS = "Commit jobs completed: {finished} of {total}"
 
 PAN_JSON_DEVICE_GRP = "device_group"
 PAN_JSON_URL = "url"
@@ -43,7 +47,13 @@ PAN_JSON_CREATE_POLICY = "create_policy"
 PAN_JSON_SOURCE_ADDRESS = "is_source_address"
 PAN_JSON_QUERY = "query"
 PAN_JSON_LOG_TYPE = "log_type"
+PAN_JSON_MAX_CONCURRENT_COMMITS = "max_concurrent_commits"
+PAN_JSON_COALESCE_COMMITS = "coalesce_commits"
 PAN_DEFAULT_SOURCE_ADDRESS = False
+PAN_DEFAULT_MAX_CONCURRENT_COMMITS = 5
+PAN_COMMIT_JOB_POLL_INTERVAL = 2
+# Commas are valid in URLs, so a list of URLs is newline-separated
+PAN_URL_LIST_DELIMITER = '\n'
 
 # Name consts
 SEC_POL_NAME = "Phantom {sec_policy_type} Security Policy"
@@ -87,19 +97,22 @@ IP_GRP_SEC_POL_ELEM_SRC = "<source><member>{ip_group_name}</member></source>"
 APP_GRP_SEC_POL_ELEM = "<application><member>{app_group_name}</member></application>"
 
 URL_PROF_XPATH = "{config_xpath}/profiles/url-filtering/entry[@name='{url_profile_name}']"
-URL_PROF_ELEM = "<description>Created by Phantom for Panorama</description><action>block</action><block-list><member>{url}</member></block-list>"
-DEL_URL_XPATH = "/block-list/member[text()='{url}']"
+URL_PROF_ELEM = "<description>Created by Phantom for Panorama</description><action>block</action><block-list>{members}</block-list>"
+DEL_URL_XPATH = "/block-list{members}"
 
 APP_GRP_XPATH = "{config_xpath}/application-group/entry[@name='{app_group_name}']"
-APP_GRP_ELEM = "<members><member>{app_name}</member></members>"
-DEL_APP_XPATH = "/members/member[text()='{app_name}']"
+APP_GRP_ELEM = "<members>{members}</members>"
+DEL_APP_XPATH = "/members{members}"
 
 ADDR_GRP_XPATH = "{config_xpath}/address-group/entry[@name='{ip_group_name}']"
-ADDR_GRP_ELEM = "<static><member>{addr_name}</member></static>"
-DEL_ADDR_GRP_XPATH = "/static/member[text()='{addr_name}']"
+ADDR_GRP_ELEM = "<static>{members}</static>"
+DEL_ADDR_GRP_XPATH = "/static{members}"
 
-IP_ADDR_XPATH = "{config_xpath}/address/entry[@name='{ip_addr_name}']"
-IP_ADDR_ELEM = "<{ip_type}>{ip}</{ip_type}><tag><member>{tag}</member></tag>"
+IP_ADDRS_XPATH = "{config_xpath}/address"
+IP_ADDR_ENTRY_ELEM = "<entry name='{ip_addr_name}'><{ip_type}>{ip}</{ip_type}><tag><member>{tag}</member></tag></entry>"
+
+MEMBER_ELEM = "<member>{name}</member>"
+DEL_MEMBERS_XPATH = "/member[{condition}]"
 
 TAG_CONTAINER_COMMENT = "Phantom Container ID"
 TAG_COLOR = "color7"
@@ -7,6 +7,7 @@ import os
 import sys
 import time
 import shlex
+import threading
 import requests
 import simplejson as json
 import six
@@ -22,6 +23,10 @@ if (os.path.exists('{}/dependencies'.format(app_dir))):  # noqa
 
 SLACK_JSON_MESSAGE_LIMIT = 4000
 SLACK_JSON_API_URL = 'https://slack.com/api/'
+SLACK_BOT_QUEUE_POLL_INTERVAL = 1
+SLACK_BOT_STATUS_BATCH_SIZE = 100
+SLACK_BOT_CACHE_TTL = 300
+SLACK_BOT_CONTAINER_PAGE_SIZE = 1000
 
 SLACK_BOT_HELP_MESSAGE = """
 usage:
@@ -173,27 +178,65 @@ class SlackBot(object):
         self.verification_token = None
 
         self._init_containers()
-        self._generate_dicts()
+        self._init_caches()
         self._init_parsers()
 
     def _init_containers(self):
 
+        self._queue_lock = threading.Lock()
         self.action_queue = []
         self.app_run_queue = []
         self.playbook_queue = []
 
-    def _generate_dicts(self):
-        """ In order to easily keep track of and verify actions
-             phantom.bot creates a couple of dictionaries
+    def _init_caches(self):
+        """ The app, asset and action dictionaries and the container list are loaded lazily
+          " on first use and are only refreshed once their TTL has expired
         """
+
+        self._cache_lock = threading.Lock()
+
         self.app_dict = {}
         self.asset_dict = {}
         self.action_dict = {}
         self.app_to_asset_dict = {}
+        self._dicts_refreshed = 0
+
+        self.container_cache = {}
+        self._last_container_id = 0
+        self._containers_refreshed = 0
+
+    def _generate_dicts(self, force=False):
+        """ In order to easily keep track of and verify actions
+             phantom.bot creates a couple of dictionaries
+          " The dictionaries are swapped in only once all of them have been built,
+          " so a failed refresh keeps serving the previous ones
+        """
+
+        with self._cache_lock:
+
+            if (not force and time.time() - self._dicts_refreshed < SLACK_BOT_CACHE_TTL):
+                return
+
+            app_dict = self._create_app_dict()
+
+            if app_dict is None:
+                return
+
+            asset_dict, app_to_asset_dict = self._create_asset_dict(app_dict)
 
-        self._create_app_dict()
-        self._create_asset_dict()
-        self._create_action_dict()
+            if asset_dict is None:
+                return
+
+            action_dict = self._create_action_dict(app_to_asset_dict)
+
+            if action_dict is None:
+                return
+
+            self.app_dict = app_dict
+            self.asset_dict = asset_dict
+            self.action_dict = action_dict
+            self.app_to_asset_dict = app_to_asset_dict
+            self._dicts_refreshed = time.time()
 
     def _init_parsers(self):
 
@@ -224,11 +267,13 @@ class SlackBot(object):
 
         try:
             r = requests.get(self.base_url + "rest/app?page_size=0&pretty", headers=self.headers, auth=self.auth, verify=self.verify)
-        except:
-            return
+        except Exception:
+            return None
 
         if (r.status_code != 200):
-            return
+            return None
+
+        app_dict = {}
 
         for app in r.json().get('data', []):
 
@@ -240,21 +285,26 @@ class SlackBot(object):
 
             app_object = App(app_name, app_id)
 
-            self.app_dict[app_id] = app_object
-            self.app_dict[app_name] = app_object
+            app_dict[app_id] = app_object
+            app_dict[app_name] = app_object
 
-    def _create_asset_dict(self):
+        return app_dict
+
+    def _create_asset_dict(self, app_dict):
         """ Maps asset IDs and names to asset objects
           " Also maps app IDs to lists of associated asset IDs
         """
 
         try:
             r = requests.get(self.base_url + "rest/build_action", headers=self.headers, auth=self.auth, verify=self.verify)
-        except:
-            return
+        except Exception:
+            return None, None
 
         if (r.status_code != 200):
-            return
+            return None, None
+
+        asset_dict = {}
+        app_to_asset_dict = {}
 
         for asset in r.json().get('assets', []):
 
@@ -266,7 +316,7 @@ class SlackBot(object):
 
                 for app_id in asset_apps:
 
-                    app = self.app_dict.get(app_id)
+                    app = app_dict.get(app_id)
 
                     if (not app):
                         asset_apps.remove(app_id)
@@ -276,26 +326,30 @@ class SlackBot(object):
 
             for app in asset_apps:
 
-                if app not in self.app_to_asset_dict:
-                    self.app_to_asset_dict[app] = []
+                if app not in app_to_asset_dict:
+                    app_to_asset_dict[app] = []
 
-                self.app_to_asset_dict[app] += [asset_id]
+                app_to_asset_dict[app] += [asset_id]
 
             asset_object = Asset(asset_name, asset_id, asset_apps)
 
-            self.asset_dict[asset_id] = asset_object
-            self.asset_dict[asset_name] = asset_object
+            asset_dict[asset_id] = asset_object
+            asset_dict[asset_name] = asset_object
+
+        return asset_dict, app_to_asset_dict
 
-    def _create_action_dict(self):
+    def _create_action_dict(self, app_to_asset_dict):
         """ Maps actions names to action objects """
 
         try:
             r = requests.get(self.base_url + "rest/app_action?page_size=0", headers=self.headers, auth=self.auth, verify=self.verify)
-        except:
-            return
+        except Exception:
+            return None
 
         if (r.status_code != 200):
-            return
+            return None
+
+        action_dict = {}
 
         for action in r.json().get('data', []):
 
@@ -306,47 +360,93 @@ class SlackBot(object):
             if (not (action_name and action_id and action_app)):
                 continue
 
-            if action_name not in self.action_dict:
-                self.action_dict[action_name] = []
+            if action_name not in action_dict:
+                action_dict[action_name] = []
 
             action_object = Action(action_name, action_id, action_app)
 
             action_object.add_parameters(action['parameters'])
 
-            action_object.assets = self.app_to_asset_dict.get(action_app, [])
+            action_object.assets = app_to_asset_dict.get(action_app, [])
 
-            self.action_dict[action_name] += [action_object]
+            action_dict[action_name] += [action_object]
 
-    def _create_container_dict(self):
-        """ Maps container IDs to container objects """
+        return action_dict
 
-        try:
-            r = requests.get(self.base_url + "rest/container?page_size=0", headers=self.headers, auth=self.auth, verify=self.verify)
-        except:
-            return None
+    def _get_containers(self, params):
+        """ Pages through the containers matching the given filter parameters
+          " Returns None if the server answers any of the pages with an error
+        """
 
-        if (r.status_code != 200):
-            return None
+        params = dict(params)
+        params['page_size'] = SLACK_BOT_CONTAINER_PAGE_SIZE
+        params['page'] = 0
+
+        containers = []
 
-        container_dict = {}
+        while True:
 
-        for container in r.json().get('data', []):
+            r = requests.get(self.base_url + "rest/container", params=params, headers=self.headers, auth=self.auth, verify=self.verify)
 
-            container_id = container.get('id')
+            if (r.status_code != 200):
+                return None
 
-            if not container_id:
-                continue
+            resp = r.json()
 
-            tags = container['tags']
+            containers += resp.get('data', [])
 
-            for tag in tags:
+            params['page'] += 1
 
-                if tag not in container_dict:
-                    container_dict[tag] = []
+            if (params['page'] >= resp.get('num_pages', 0)):
+                break
+
+        return containers
+
+    def _get_containers_by_tag(self, tag):
+        """ Asks the server for the containers carrying the given tag,
+          " instead of downloading every container and indexing them locally
+        """
+
+        return self._get_containers({'_filter_tags__contains': json.dumps([tag]), 'sort': 'id', 'order': 'asc'})
+
+    def _refresh_container_cache(self):
+        """ Maps container IDs to container names
+          " Only containers newer than the last seen ID are fetched, unless the TTL has expired,
+          " in which case the cache is rebuilt to pick up renamed and deleted containers
+        """
+
+        with self._cache_lock:
+
+            if (time.time() - self._containers_refreshed >= SLACK_BOT_CACHE_TTL):
+                container_cache = {}
+                last_container_id = 0
+                refreshed = time.time()
+            else:
+                container_cache = dict(self.container_cache)
+                last_container_id = self._last_container_id
+                refreshed = self._containers_refreshed
+
+            params = {'_filter_id__gt': last_container_id, 'sort': 'id', 'order': 'asc'}
+
+            containers = self._get_containers(params)
+
+            # Keep the previous cache rather than swapping in a partial one
+            if containers is None:
+                return
+
+            for container in containers:
+
+                container_id = container.get('id')
+
+                if not container_id:
+                    continue
 
-                container_dict[tag].append(container_id)
+                container_cache[container_id] = container.get('name')
+                last_container_id = max(last_container_id, container_id)
 
-        return container_dict
+            self.container_cache = container_cache
+            self._last_container_id = last_container_id
+            self._containers_refreshed = refreshed
 
     def _action_run_request(self, body, channel):
 
@@ -372,7 +472,8 @@ class SlackBot(object):
         if not run_id:
             return "Failed to run action: Could not get action run ID"
 
-        self.action_queue.append((run_id, channel))
+        with self._queue_lock:
+            self.action_queue.append((run_id, channel))
 
         action_url = '{0}action/{1}'.format(self.phantom_url, run_id)
 
@@ -399,7 +500,8 @@ class SlackBot(object):
         if not run_id:
             return "Failed to run playbook: Could not get playbook run ID"
 
-        self.playbook_queue.append((run_id, channel))
+        with self._queue_lock:
+            self.playbook_queue.append((run_id, channel))
 
         container_id = body.get('container_id', '')
         playbook_id = body.get('playbook_id', '')
@@ -410,131 +512,178 @@ class SlackBot(object):
 
         return "Playbook: {0}\nPlaybook run ID: {1}\nPlaybook queueing result: Playbook run successfully queued".format(playbook_id, resp['playbook_run_id'])
 
-    def _add_to_app_queue(self, action_run_id, channel):
+    def _get_records_by_id(self, endpoint, ids, field='id'):
+        """ Fetches every record of the given endpoint whose field matches one of the given IDs
+          " The lookups are batched into filtered list queries instead of one request per ID
+        """
 
-        try:
+        ids = list(ids)
+        records = []
 
-            r = requests.get(self.base_url + "rest/action_run/{}/app_runs".format(action_run_id), headers=self.headers, auth=self.auth, verify=self.verify)
+        for i in range(0, len(ids), SLACK_BOT_STATUS_BATCH_SIZE):
 
-            resp = r.json()
+            id_filter = '[{}]'.format(','.join(str(x) for x in ids[i:i + SLACK_BOT_STATUS_BATCH_SIZE]))
+            params = {'_filter_{}__in'.format(field): id_filter, 'page_size': 0}
 
-        except Exception as e:
-            return "Failed to run action: Could not connect to Phantom REST endpoint: {}".format(e)
+            try:
+
+                r = requests.get(self.base_url + "rest/{}".format(endpoint), params=params, headers=self.headers, auth=self.auth, verify=self.verify)
 
-        for app_run in resp['data']:
-            self.app_run_queue.append((app_run['id'], channel))
+                resp = r.json()
+
+            except Exception:
+                continue
+
+            records += resp.get('data', [])
+
+        return records
 
     def _check_action_queue(self):
 
-        for action_id, channel in self.action_queue:
+        with self._queue_lock:
+            pending = dict(self.action_queue)
 
-            try:
+        if not pending:
+            return
 
-                r = requests.get(self.base_url + "rest/action_run/{}".format(action_id), headers=self.headers, auth=self.auth, verify=self.verify)
+        finished = {}
 
-                resp = r.json()
+        for action_run in self._get_records_by_id('action_run', pending):
 
-            except:
-                continue
+            if action_run.get('status', '') in ['success', 'failed']:
+                finished[action_run['id']] = pending[action_run['id']]
 
-            if resp.get('status', '') in ['success', 'failed']:
+        if not finished:
+            return
+
+        app_runs = self._get_records_by_id('app_run', finished, field='action_run')
+
+        with self._queue_lock:
 
-                self._add_to_app_queue(resp['id'], channel)
+            for app_run in app_runs:
+                self.app_run_queue.append((app_run['id'], finished[app_run['action_run']]))
 
-                self.action_queue.remove((action_id, channel))
+            self.action_queue = [x for x in self.action_queue if x[0] not in finished]
 
     def _check_app_run_queue(self):
 
-        for app_run_id, channel in self.app_run_queue:
+        with self._queue_lock:
+            pending = dict(self.app_run_queue)
 
-            try:
+        if not pending:
+            return
 
-                r = requests.get(self.base_url + "rest/app_run/{}".format(app_run_id), headers=self.headers, auth=self.auth, verify=self.verify)
+        finished = {}
 
-                resp = r.json()
+        self._generate_dicts()
 
-            except:
-                continue
+        for resp in self._get_records_by_id('app_run', pending):
 
             status = resp.get('status', 'unknown')
 
-            if status in ['success', 'failed']:
+            if status not in ['success', 'failed']:
+                continue
+
+            asset = self.asset_dict.get(resp.get('asset'))
 
-                asset = self.asset_dict.get(resp.get('asset'))
+            asset_name = "N/A" if asset is None else asset.name
 
-                asset_name = "N/A" if asset is None else asset.name
+            msg = "Action:  {}\n".format(resp.get('action'))
+            msg += "Asset:  {}\n".format(asset_name)
+            msg += "Status:  {}\n".format(status)
 
-                msg = "Action:  {}\n".format(resp.get('action'))
-                msg += "Asset:  {}\n".format(asset_name)
-                msg += "Status:  {}\n".format(status)
+            result_data = resp.get('result_data', [])
 
-                result_data = resp.get('result_data', [])
+            if (len(result_data) > 0):
 
-                if (len(result_data) > 0):
+                result_data = result_data[0]
 
-                    result_data = result_data[0]
+                msg += "Message: {}\n".format(result_data.get('message', status))
 
-                    msg += "Message: {}\n".format(result_data.get('message', status))
+                parameters = result_data.get('parameter', [])
 
-                    parameters = result_data.get('parameter', [])
+                if (len(parameters) > 1):
 
-                    if (len(parameters) > 1):
+                    msg += "Parameters:\n"
 
-                        msg += "Parameters:\n"
+                    for key, value in six.iteritems(parameters):
 
-                        for key, value in six.iteritems(parameters):
+                        if key == 'context':
+                            continue
 
-                            if key == 'context':
-                                continue
+                        msg += "  {0}: {1}\n".format(key, value)
 
-                            msg += "  {0}: {1}\n".format(key, value)
+                summary = result_data.get('summary', '')
 
-                    summary = result_data.get('summary', '')
+                if (summary):
 
-                    if (summary):
+                    msg += "Summary:\n"
 
-                        msg += "Summary:\n"
+                    for key, value in six.iteritems(summary):
+                        msg += "  {0}: {1}\n".format(key, value)
+
+            else:
 
-                        for key, value in six.iteritems(summary):
-                            msg += "  {0}: {1}\n".format(key, value)
+                msg += "Message: {}\n".format(resp.get('message', status))
 
-                else:
+            finished[resp['id']] = msg
 
-                    msg += "Message: {}\n".format(resp.get('message', status))
+        if not finished:
+            return
 
-            self.app_run_queue.remove((app_run_id, channel))
+        with self._queue_lock:
+            self.app_run_queue = [x for x in self.app_run_queue if x[0] not in finished]
 
-            self._post_message(msg, channel)
+        for app_run_id, msg in six.iteritems(finished):
+            self._post_message(msg, pending[app_run_id])
 
     def _check_playbook_queue(self):
 
-        for playbook_id, channel in self.playbook_queue:
+        with self._queue_lock:
+            pending = dict(self.playbook_queue)
 
-            try:
+        if not pending:
+            return
 
-                r = requests.get(self.base_url + "rest/playbook_run/{}".format(playbook_id), headers=self.headers, auth=self.auth, verify=self.verify)
+        finished = {}
 
-                resp = r.json()
+        for resp in self._get_records_by_id('playbook_run', pending):
 
-            except:
+            status = resp.get('status', 'unknown')
+
+            if status not in ["success", "failed"]:
                 continue
 
-            status = resp.get('status', 'unknown')
+            msg = "Playbook: {}\n".format(resp.get('playbook', 'unknown'))
+            msg += "Playbook run ID: {}\n".format(resp.get('id', 'unknown'))
+            msg += "Playbook run result: {}\n".format(status)
 
-            if status in ["success", "failed"]:
+            finished[resp['id']] = msg
 
-                msg = "Playbook: {}\n".format(resp.get('playbook', 'unknown'))
-                msg += "Playbook run ID: {}\n".format(resp.get('id', 'unknown'))
-                msg += "Playbook run result: {}\n".format(status)
+        if not finished:
+            return
 
-            else:
-                continue
+        with self._queue_lock:
+            self.playbook_queue = [x for x in self.playbook_queue if x[0] not in finished]
 
-            self.playbook_queue.remove((playbook_id, channel))
+        for playbook_run_id, msg in six.iteritems(finished):
+            self._post_message(msg, pending[playbook_run_id])
 
-            self._post_message(msg, channel)
+    def _poll_run_queues(self):
+        """ Checks the action, app run and playbook queues for completed runs
+          " This runs in its own thread so chat commands never wait behind run status polling
+        """
 
-            return
+        while True:
+
+            try:
+                self._check_action_queue()
+                self._check_app_run_queue()
+                self._check_playbook_queue()
+            except Exception as e:
+                print("Error occurred while checking the run queues: {}".format(e))
+
+            time.sleep(SLACK_BOT_QUEUE_POLL_INTERVAL)
 
     def _sanitize(self, string):
         """ Slack quotes use those fancy UTF-8 ones that flip based on what side they are on
@@ -894,42 +1043,33 @@ class SlackBot(object):
 
         elif tags:
 
-            container_dict = self._create_container_dict()
-
-            if (container_dict is None):
-                return False, "Could not get containers, error contactin REST endpoint"
-
-            if (not container_dict):
-                return False, "Found no containers on the Phantom instance"
-
             bad_tags = []
-            container_list = []
+            containers = {}
 
             for tag in tags:
 
-                if tag not in container_dict:
+                try:
+                    tag_containers = self._get_containers_by_tag(tag)
+                except Exception as e:
+                    return False, "Could not get containers, error contacting REST endpoint: {}".format(e)
+
+                if tag_containers is None:
+                    return False, "Could not get containers, REST endpoint returned an error"
+
+                if not tag_containers:
                     bad_tags.append(tag)
                     continue
 
-                container_list += container_dict[tag]
+                for container in tag_containers:
+                    containers[container.get('id')] = container
 
-            container_list = list(set(container_list))
-
-            num_conts = len(container_list)
+            num_conts = len(containers)
 
             message = "Found {0} container{1} matching specified tags:\n\n".format(num_conts, 's' if num_conts != 1 else '')
 
-            for container in container_list:
-
-                try:
-
-                    r = requests.get(self.base_url + "rest/container/{}".format(container), headers=self.headers, auth=self.auth, verify=self.verify)
-
-                    resp_text = r.text.encode('utf-8')
-                    info = json.loads(resp_text)
+            for container_id in sorted(containers):
 
-                except Exception as e:
-                    message += "Could not retrieve container data for {0}: {1}\n\n".format(container, e)
+                info = containers[container_id]
 
                 try:
                     message += "Name: {}\n".format(info['name'])
@@ -943,7 +1083,7 @@ class SlackBot(object):
                     message = message[:-1]
 
                     message += '\n\n'
-                except:
+                except Exception:
                     message += "COULD NOT PARSE CONTAINER INFO\n\n"
 
             if bad_tags:
@@ -979,15 +1119,15 @@ class SlackBot(object):
             msg = ''
 
             try:
-                r = requests.get(self.base_url + "rest/container?page_size=0", headers=self.headers, auth=self.auth, verify=self.verify)
+                self._refresh_container_cache()
             except Exception as e:
                 return False, "Could not retrieve container data. Could not connect to REST endpoint: {}".format(e)
 
-            for container in r.json()['data']:
+            for container_id in sorted(self.container_cache):
 
                 try:
-                    msg += 'ID: {}'.format(container['id']).ljust(10) + 'Name: {}\n'.format(container['name'])
-                except:
+                    msg += 'ID: {}'.format(container_id).ljust(10) + 'Name: {}\n'.format(self.container_cache[container_id])
+                except Exception:
                     msg += 'Container info could not be parsed'
 
             msg += '\nFor more information on a container, try "get_container <container_id>"'
@@ -1017,6 +1157,10 @@ class SlackBot(object):
         if (not web_socket):
             return False, "Could not connect to Slack"
 
+        poller = threading.Thread(target=self._poll_run_queues)
+        poller.daemon = True
+        poller.start()
+
         while True:
 
             command, channel = self._parse_slack_output(web_socket.recv())
@@ -1033,12 +1177,6 @@ class SlackBot(object):
                     except Exception as e:
                         self._post_message('Could not run command:\n\n{0}'.format(e), channel)
 
-            self._check_action_queue()
-            self._check_app_run_queue()
-            self._check_playbook_queue()
-
-            time.sleep(1)
-
     def _parse_slack_output(self, slack_output):
 
         out_dict = {}
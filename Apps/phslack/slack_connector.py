@@ -20,7 +20,9 @@ from bs4 import UnicodeDammit
 import simplejson as json
 import subprocess
 import requests
+import select
 import shlex
+import stat
 import time
 import uuid
 import os
@@ -108,6 +110,32 @@ def _save_app_state(state, asset_id, app_connector=None):
     return phantom.APP_SUCCESS
 
 
+def _notify_answer_waiter(local_data_directory, qid):
+    """ This function is used to wake up the 'ask question' action waiting for the answer to the given question.
+
+    :param local_data_directory: state directory of the asset
+    :param qid: question ID
+    :return: None
+    """
+
+    notify_path = "{0}/{1}{2}".format(local_data_directory, qid, SLACK_ANSWER_NOTIFY_EXTENSION)
+
+    # Failures are ignored here, the waiting action still checks for the answer file every poll interval
+    try:
+        if not stat.S_ISFIFO(os.stat(notify_path).st_mode):
+            return
+        notify_fd = os.open(notify_path, os.O_WRONLY | os.O_NONBLOCK)
+    except OSError:
+        return
+
+    try:
+        os.write(notify_fd, b'1')
+    except OSError:
+        pass
+    finally:
+        os.close(notify_fd)
+
+
 def handle_request(request, path):
 
     try:
@@ -157,17 +185,22 @@ def handle_request(request, path):
 
         answer_filename = '{0}.json'.format(qid)
         answer_path = "{0}/{1}".format(local_data_directory, answer_filename)
+        # The answer is written to a temporary file and renamed so that a waiting action never reads a partial answer
+        temp_answer_path = "{0}.tmp".format(answer_path)
         try:
-            answer_file = open(answer_path, 'w')
+            answer_file = open(temp_answer_path, 'w')
         except Exception as e:
             return HttpResponse(SLACK_ERR_COULD_NOT_OPEN_ANSWER_FILE.format(error=e), content_type="text/plain", status=400)
 
         try:
             answer_file.write(json.dumps(payload))
             answer_file.close()
+            os.rename(temp_answer_path, answer_path)
         except Exception as e:
             return HttpResponse(SLACK_ERR_WHILE_WRITING_ANSWER_FILE.format(error=e), content_type="text/plain", status=400)
 
+        _notify_answer_waiter(local_data_directory, qid)
+
         confirmation = dict(callback_json).get('confirmation')
 
     except Exception as e:
@@ -189,6 +222,8 @@ class SlackConnector(phantom.BaseConnector):
         self._slack_client = None
         self._interval = None
         self._timeout = None
+        self._directory_cache_ttl = None
+        self._last_page_request = {}
 
     def initialize(self):
 
@@ -206,6 +241,10 @@ class SlackConnector(phantom.BaseConnector):
         if self._timeout is None:
             return self.get_status()
 
+        self._directory_cache_ttl = self._validate_integers(self, config.get("directory_cache_ttl", 0), SLACK_DIRECTORY_CACHE_TTL_KEY, allow_zero=True)
+        if self._directory_cache_ttl is None:
+            return self.get_status()
+
         # Fetching the Python major version
         try:
             self._python_version = int(sys.version_info[0])
@@ -384,17 +423,91 @@ class SlackConnector(phantom.BaseConnector):
 
         body.update({'token': self._bot_token})
 
-        # send api call to slack
-        try:
-            response = requests.post("{}{}".format(self._base_url, endpoint),
-                    data=body,
-                    headers=headers,
-                    files=files)
-        except Exception as e:
-            return RetVal(action_result.set_status(phantom.APP_ERROR, "{}. {}".format(SLACK_ERR_SERVER_CONNECTION, self._get_error_message_from_exception(e))), None)
+        retries = 0
+
+        while True:
+
+            # send api call to slack
+            try:
+                response = requests.post("{}{}".format(self._base_url, endpoint),
+                        data=body,
+                        headers=headers,
+                        files=files)
+            except Exception as e:
+                return RetVal(action_result.set_status(phantom.APP_ERROR, "{}. {}".format(SLACK_ERR_SERVER_CONNECTION, self._get_error_message_from_exception(e))), None)
+
+            if response.status_code != 429 or retries >= SLACK_MAX_RATE_LIMIT_RETRIES:
+                break
+
+            try:
+                retry_after = int(response.headers.get('Retry-After', SLACK_DEFAULT_RETRY_AFTER))
+            except ValueError:
+                retry_after = SLACK_DEFAULT_RETRY_AFTER
+
+            self.debug_print("Rate limited by Slack on {0}, retrying after {1} seconds".format(endpoint, retry_after))
+            time.sleep(retry_after)
+            retries += 1
 
         return self._process_response(response, action_result)
 
+    def _wait_for_rate_limit_tier(self, endpoint):
+        """ Spaces out the requests made to an endpoint so they stay within its Slack rate limit tier
+
+        Args:
+            endpoint : Slack API method being called
+        """
+
+        requests_per_minute = SLACK_TIER_RATE_LIMITS.get(endpoint)
+        if not requests_per_minute:
+            return
+
+        last_request = self._last_page_request.get(endpoint)
+        if last_request is not None:
+            wait = last_request + 60.0 / requests_per_minute - time.time()
+            if wait > 0:
+                time.sleep(wait)
+
+        self._last_page_request[endpoint] = time.time()
+
+    def _get_cached_directory(self, key):
+        """ Returns the cached user or channel directory, or None if caching is disabled or the cache has expired
+
+        Args:
+            key : Name of the directory, either "members" or "channels"
+
+        Returns:
+            directory : Dictionary mapping IDs to cached entries
+        """
+
+        if not self._directory_cache_ttl:
+            return None
+
+        directory = self._state.get(SLACK_STATE_DIRECTORY, {}).get(key)
+        if not directory or time.time() - directory.get('updated', 0) > self._directory_cache_ttl * 60:
+            return None
+
+        return directory.get('entries')
+
+    def _cache_directory(self, key, items, fields=None):
+        """ Saves a complete user or channel directory in the app state
+
+        Args:
+            key : Name of the directory, either "members" or "channels"
+            items : Complete list of users or channels returned by Slack
+            fields : Fields of each entry to keep, keeps the whole entry if not given
+        """
+
+        if not self._directory_cache_ttl:
+            return
+
+        entries = {}
+        for item in items:
+            if not item.get('id'):
+                continue
+            entries[item['id']] = dict((k, v) for k, v in item.items() if fields is None or k in fields)
+
+        self._state.setdefault(SLACK_STATE_DIRECTORY, {})[key] = {'updated': time.time(), 'entries': entries}
+
     def _validate_integers(self, action_result, parameter, key, allow_zero=False):
         """Validate the provided input parameter value is a non-zero positive integer and returns the integer value of the parameter itself.
 
@@ -530,15 +643,16 @@ class SlackConnector(phantom.BaseConnector):
         if limit is None:
             return action_result.get_status()
 
-        ret_val, resp_json = self._paginator(action_result, SLACK_LIST_CHANNEL, "channels", limit=limit)
+        ret_val, resp_json, complete = self._paginator(action_result, SLACK_LIST_CHANNEL, "channels", limit=limit)
 
         if not ret_val:
             return action_result.get_status()
 
-        action_result.add_data(resp_json)
-
         channels = resp_json.get('channels', [])
 
+        if complete:
+            self._cache_directory("channels", channels, fields=['id', 'name'])
+
         for chan in channels:
             name = chan.get('name', 'unknownchannel')
             chan['name'] = '#{}'.format(name)
@@ -547,51 +661,61 @@ class SlackConnector(phantom.BaseConnector):
 
         return action_result.set_status(phantom.APP_SUCCESS)
 
-    def _paginator(self, action_result, endpoint, key, body={}, limit=None):
+    def _paginator(self, action_result, endpoint, key, body=None, limit=None):
         """Fetch results from multiple API calls using pagination for the given endpoint
 
+        The first page is added to the action result right away and later pages are appended to it as they arrive,
+        so the results that were fetched are kept if a later page fails. Requests are paced to the endpoint's rate limit tier.
+
         Args:
             action_result : Object of ActionResult class
             endpoint : REST endpoint that needs to be attended to the address
+            key : Key of the paginated list in the response
+            body : Additional request parameters
             limit : User specified maximum number of events to be returned
 
         Returns:
             results : The aggregated response
+            complete : Whether every page was fetched
         """
 
-        body.update({"limit": SLACK_DEFAULT_LIMIT})
+        body = dict(body or {})
+        body.update({"limit": SLACK_PAGE_SIZE})
         results = {}
 
         while True:
+            self._wait_for_rate_limit_tier(endpoint)
+
             ret_val, resp_json = self._make_slack_rest_call(action_result, endpoint, body)
 
             if not ret_val:
-                return phantom.APP_ERROR, None
+                return phantom.APP_ERROR, None, False
 
             key_result_value = resp_json.get(key, [])
 
             if not results:
                 if not key_result_value:
-                    return action_result.set_status(phantom.APP_ERROR, SLACK_ERR_DATA_NOT_FOUND_IN_OUTPUT.format(key=("users" if key == "members" else key))), None
+                    return action_result.set_status(phantom.APP_ERROR, SLACK_ERR_DATA_NOT_FOUND_IN_OUTPUT.format(key=("users" if key == "members" else key))), None, False
                 results = resp_json
+                action_result.add_data(results)
             else:
                 results[key].extend(key_result_value)
 
             result_length = len(results[key])
 
-            if limit and result_length >= limit:
-                results[key] = results[key][:limit]
-                return phantom.APP_SUCCESS, results
-
             # set the next cursor
             next_cursor = resp_json.get("response_metadata", {}).get("next_cursor", "")
 
+            if limit and result_length >= limit:
+                results[key] = results[key][:limit]
+                return phantom.APP_SUCCESS, results, not next_cursor and result_length == limit
+
             if not next_cursor:
                 break
             else:
                 body.update({"cursor": next_cursor})
 
-        return phantom.APP_SUCCESS, results
+        return phantom.APP_SUCCESS, results, True
 
     def _list_users(self, param):
 
@@ -602,15 +726,16 @@ class SlackConnector(phantom.BaseConnector):
         if limit is None:
             return action_result.get_status()
 
-        ret_val, resp_json = self._paginator(action_result, SLACK_USER_LIST, "members", limit=limit)
+        ret_val, resp_json, complete = self._paginator(action_result, SLACK_USER_LIST, "members", limit=limit)
 
         if not ret_val:
             return action_result.get_status()
 
-        action_result.add_data(resp_json)
-
         users = resp_json.get('members', [])
 
+        if complete:
+            self._cache_directory("members", users)
+
         for user in users:
             name = user.get('name', 'unknownuser')
             user['name'] = '@{}'.format(name)
@@ -629,15 +754,21 @@ class SlackConnector(phantom.BaseConnector):
         if not user_id.startswith('U'):
             return action_result.set_status(phantom.APP_ERROR, SLACK_ERR_NOT_A_USER_ID)
 
-        ret_val, resp_json = self._make_slack_rest_call(action_result, SLACK_USER_INFO, {'user': user_id})
+        cached_users = self._get_cached_directory("members")
 
-        if not ret_val:
-            message = action_result.get_message()
-            if message:
-                error_message = "{}: {}".format(SLACK_ERR_FETCHING_USER, message)
-            else:
-                error_message = SLACK_ERR_FETCHING_USER
-            return action_result.set_status(phantom.APP_ERROR, error_message)
+        if cached_users and user_id in cached_users:
+            self.save_progress("Found user {0} in the cached user directory".format(user_id))
+            resp_json = {'ok': True, 'user': dict(cached_users[user_id])}
+        else:
+            ret_val, resp_json = self._make_slack_rest_call(action_result, SLACK_USER_INFO, {'user': user_id})
+
+            if not ret_val:
+                message = action_result.get_message()
+                if message:
+                    error_message = "{}: {}".format(SLACK_ERR_FETCHING_USER, message)
+                else:
+                    error_message = SLACK_ERR_FETCHING_USER
+                return action_result.set_status(phantom.APP_ERROR, error_message)
 
         action_result.add_data(resp_json)
 
@@ -718,7 +849,17 @@ class SlackConnector(phantom.BaseConnector):
         if len(message) > SLACK_MESSAGE_LIMIT:
             return action_result.set_status(phantom.APP_ERROR, SLACK_ERR_MESSAGE_TOO_LONG.format(limit=SLACK_MESSAGE_LIMIT))
 
-        params = {'channel': param['destination'], 'text': message}
+        destination = param['destination']
+
+        # Resolve channel names locally when the channel directory is cached
+        cached_channels = self._get_cached_directory("channels")
+        if cached_channels and destination.startswith('#'):
+            for channel_id, channel in cached_channels.items():
+                if channel.get('name') == destination[1:]:
+                    destination = channel_id
+                    break
+
+        params = {'channel': destination, 'text': message}
 
         if 'parent_message_ts' in param:
             # Support for replying in thread
@@ -1014,6 +1155,56 @@ class SlackConnector(phantom.BaseConnector):
 
         return action_result.set_status(phantom.APP_SUCCESS, SLACK_SUCC_SLACKBOT_STARTED)
 
+    def _wait_for_answer(self, answer_path, notify_path):
+        """ This function is used to wait for the answer file of a question to be written.
+
+        The rest handler writes to a named pipe as soon as it has saved the answer, which wakes up the wait right away.
+        If the pipe cannot be set up, this falls back to checking for the answer file every poll interval.
+
+        :param answer_path: path of the answer file
+        :param notify_path: path of the named pipe used for the notification
+        :return: True if the answer was received before the timeout, False otherwise
+        """
+
+        deadline = time.time() + self._timeout * 60
+        notify_fds = []
+
+        try:
+            os.mkfifo(notify_path)
+            # The rest handler may not run as the same user as the action
+            os.chmod(notify_path, 0o622)
+            notify_fds.append(os.open(notify_path, os.O_RDONLY | os.O_NONBLOCK))
+            # Keeping a write end open ourselves stops the pipe from reporting EOF after the rest handler closes its end
+            notify_fds.append(os.open(notify_path, os.O_WRONLY | os.O_NONBLOCK))
+        except OSError as e:
+            self.debug_print("Unable to set up the answer notification, falling back to polling: {0}".format(self._get_error_message_from_exception(e)))
+            for notify_fd in notify_fds:
+                os.close(notify_fd)
+            notify_fds = []
+
+        try:
+            while True:
+
+                if os.path.exists(answer_path):
+                    return True
+
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+
+                if not notify_fds:
+                    time.sleep(min(self._interval, remaining))
+                    continue
+
+                readable, _, _ = select.select(notify_fds[:1], [], [], min(self._interval, remaining))
+                if readable:
+                    os.read(notify_fds[0], 1024)
+        finally:
+            for notify_fd in notify_fds:
+                os.close(notify_fd)
+            if os.path.exists(notify_path):
+                os.remove(notify_path)
+
     def _ask_question(self, param):
 
         action_result = self.add_action_result(phantom.ActionResult(dict(param)))
@@ -1089,29 +1280,15 @@ class SlackConnector(phantom.BaseConnector):
                 error_message = SLACK_ERR_ASKING_QUESTION
             return action_result.set_status(phantom.APP_ERROR, error_message)
 
-        loop_count = (self._timeout * 60) / self._interval
-        count = 0
+        if not self._wait_for_answer(answer_path, "{0}/{1}{2}".format(local_data_state_dir, qid, SLACK_ANSWER_NOTIFY_EXTENSION)):
+            action_result.set_summary({'response_received': False, 'question_id': qid})
+            return action_result.set_status(phantom.APP_SUCCESS)
 
-        while True:
-
-            if count >= loop_count:
-                action_result.set_summary({'response_received': False, 'question_id': qid})
-                return action_result.set_status(phantom.APP_SUCCESS)
-
-            try:
-                answer_file = open(answer_path, 'r')
-            except:
-                count += 1
-                time.sleep(self._interval)
-                continue
-
-            try:
+        try:
+            with open(answer_path, 'r') as answer_file:
                 resp_json = json.loads(answer_file.read())
-                answer_file.close()
-            except:
-                return action_result.set_status(phantom.APP_ERROR, SLACK_ERR_UNABLE_TO_PARSE_RESPONSE)
-
-            break
+        except:
+            return action_result.set_status(phantom.APP_ERROR, SLACK_ERR_UNABLE_TO_PARSE_RESPONSE)
 
         action_result.add_data(resp_json)
         action_result.set_summary({'response_received': True, 'question_id': qid, 'response': resp_json.get("actions", [{}])[0].get("value")})
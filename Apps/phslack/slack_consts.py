@@ -21,6 +21,17 @@ ACTION_ID_INVITE_USERS = "invite_users"
 SLACK_BASE_URL = "https://slack.com/api/"
 SLACK_MESSAGE_LIMIT = 4000
 SLACK_DEFAULT_LIMIT = 100
+SLACK_PAGE_SIZE = 200
+SLACK_MAX_RATE_LIMIT_RETRIES = 5
+SLACK_DEFAULT_RETRY_AFTER = 1
+
+# Requests per minute allowed by the Slack rate limit tier of the paginated endpoints
+SLACK_TIER_RATE_LIMITS = {
+    "conversations.list": 20,
+    "users.list": 20
+}
+
+SLACK_STATE_DIRECTORY = "directory"
 
 SLACK_JSON_BOT_TOKEN = "bot_token"
 SLACK_JSON_VERIFICATION_TOKEN = "verification_token"
@@ -41,6 +52,7 @@ SLACK_UPLOAD_FILE = "files.upload"
 
 SLACK_TC_STATUS_SLEEP = 2
 SLACK_TC_FILE = "slack_auth_task.out"
+SLACK_ANSWER_NOTIFY_EXTENSION = ".notify"
 
 SLACK_SUCC_MESSAGE = "Slack message post successful"
 
@@ -119,5 +131,6 @@ SLACK_ERR_LENGTH_LIMIT_EXCEEDED = "Based on your asset_id length ({asset_length}
 
 SLACK_RESP_POLL_INTERVAL_KEY = "'How often to poll for a response (in seconds)' configuration"
 SLACK_TIMEOUT_KEY = "'Question timeout (in minutes)' configuration"
+SLACK_DIRECTORY_CACHE_TTL_KEY = "'How long to keep the user and channel directory cached (in minutes, 0 to disable)' configuration"
 SLACK_TOTAL_RESP_KEY = "'Total number of responses to keep' configuration"
 SLACK_LIMIT_KEY = "'limit' action"
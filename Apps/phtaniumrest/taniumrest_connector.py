@@ -14,7 +14,7 @@ import os
 import sys
 import requests
 import json
-from time import sleep
+from time import sleep, time
 from bs4 import BeautifulSoup
 from bs4 import UnicodeDammit
 
@@ -38,6 +38,8 @@ class TaniumRestConnector(BaseConnector):
         self._verify = None
         self._session_id = None
         self._percentage = None
+        self._debug_question_results = False
+        self._metadata_cache_ttl = None
 
     def _handle_py_ver_compat_for_input_str(self, input_str):
         """
@@ -331,6 +333,100 @@ class TaniumRestConnector(BaseConnector):
 
         return phantom.APP_SUCCESS
 
+    def _get_cached_metadata(self, cache_type, key):
+        """ This function is used to get package, group, sensor or parsed question details from the cache in the asset state.
+
+        :param cache_type: type of the cached details
+        :param key: name of the package, group or sensor, or the normalized query text
+        :return: cached details, or None if they are not cached or have expired
+        """
+
+        if not self._metadata_cache_ttl:
+            return None
+
+        entry = self._state.get(TANIUMREST_STATE_METADATA_CACHE, {}).get(cache_type, {}).get(key)
+
+        if not entry or time() - entry.get("timestamp", 0) >= self._metadata_cache_ttl * 60:
+            return None
+
+        self.debug_print("Using the cached {0} details for '{1}'".format(cache_type, key))
+        return entry.get("value")
+
+    def _cache_metadata(self, cache_type, key, value):
+        """ This function is used to save package, group, sensor or parsed question details in the asset state.
+
+        :param cache_type: type of the cached details
+        :param key: name of the package, group or sensor, or the normalized query text
+        :param value: details to cache
+        """
+
+        if not self._metadata_cache_ttl:
+            return
+
+        now = time()
+        cache = self._state.setdefault(TANIUMREST_STATE_METADATA_CACHE, {}).setdefault(cache_type, {})
+
+        # Drop the expired entries so that the state file does not keep growing
+        for expired_key in [k for k, entry in cache.items() if now - entry.get("timestamp", 0) >= self._metadata_cache_ttl * 60]:
+            del cache[expired_key]
+
+        cache[key] = {"timestamp": now, "value": value}
+
+    def _get_metadata_by_name(self, action_result, cache_type, endpoint, name):
+        """ This function is used to get the details of a package, group or sensor by name, using the cache when possible.
+
+        :param action_result: object of ActionResult class
+        :param cache_type: type of the details
+        :param endpoint: REST endpoint returning the details
+        :param name: name of the package, group or sensor
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS, data section of the response
+        """
+
+        response_data = self._get_cached_metadata(cache_type, name)
+
+        if response_data:
+            return phantom.APP_SUCCESS, response_data
+
+        ret_val, response = self._make_rest_call_helper(action_result, endpoint, verify=self._verify, params=None, headers=None)
+
+        if phantom.is_fail(ret_val):
+            return action_result.get_status(), None
+
+        response_data = response.get("data")
+
+        if response_data:
+            self._cache_metadata(cache_type, name, response_data)
+
+        return phantom.APP_SUCCESS, response_data
+
+    def _parse_question_text(self, action_result, query_text):
+        """ This function is used to parse a question with the Tanium server, using the cache when possible.
+
+        :param action_result: object of ActionResult class
+        :param query_text: text of the question
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS, list of parsed questions
+        """
+
+        normalized_query_text = " ".join(query_text.split())
+        parsed_questions = self._get_cached_metadata("parsed_question", normalized_query_text)
+
+        if parsed_questions:
+            return phantom.APP_SUCCESS, parsed_questions
+
+        ret_val, response = self._make_rest_call_helper(action_result, TANIUMREST_PARSE_QUESTION, verify=self._verify, params=None, headers=None,
+                                                        json={"text": query_text}, method="post")
+
+        if phantom.is_fail(ret_val):
+            return action_result.get_status(), None
+
+        self.save_progress("Parsed Question:\n{}".format(json.dumps(response)))
+        parsed_questions = response.get("data", [])
+
+        if parsed_questions:
+            self._cache_metadata("parsed_question", normalized_query_text, parsed_questions)
+
+        return phantom.APP_SUCCESS, parsed_questions
+
     def _handle_test_connectivity(self, param):
         action_result = self.add_action_result(ActionResult(dict(param)))
 
@@ -430,13 +526,11 @@ class TaniumRestConnector(BaseConnector):
 
         # Get the package details
         endpoint = TANIUMREST_GET_PACKAGE.format(package=package_name)
-        ret_val, response = self._make_rest_call_helper(action_result, endpoint, verify=self._verify, params=None, headers=None)
+        ret_val, response_data = self._get_metadata_by_name(action_result, "package", endpoint, package_name)
 
         if phantom.is_fail(ret_val):
             return action_result.get_status()
 
-        response_data = response.get("data")
-
         if not response_data:
             return action_result.set_status(phantom.APP_ERROR, "No package exists with name {}. \
                     Also, please verify that your account has sufficient permissions to access the packages".format(package_name))
@@ -449,7 +543,7 @@ class TaniumRestConnector(BaseConnector):
         package_id = resp_data.get("id")
 
         self.debug_print("Fetching parameter definition of the package")
-        parameter_definition = response.get("data", {}).get("parameter_definition")
+        parameter_definition = resp_data.get("parameter_definition")
 
         if parameter_definition is not None:
             self.debug_print("Parameter definition fetched successfully")
@@ -513,13 +607,11 @@ class TaniumRestConnector(BaseConnector):
                 data["target_group"] = group_as_obj
             else:
                 endpoint = TANIUMREST_GET_GROUP.format(group_name=group_name)
-                ret_val, response = self._make_rest_call_helper(action_result, endpoint, verify=self._verify, params=None, headers=None)
+                ret_val, response_data = self._get_metadata_by_name(action_result, "group", endpoint, group_name)
 
                 if phantom.is_fail(ret_val):
                     return action_result.get_status()
 
-                response_data = response.get("data")
-
                 if not response_data:
                     return action_result.set_status(phantom.APP_ERROR, "No group exists with name {}. \
                             Also, please verify that your account has sufficient permissions to access the groups".format(group_name))
@@ -592,45 +684,96 @@ class TaniumRestConnector(BaseConnector):
         :param data: The object returned from a call to get question responses
         :return: tuple of num_complete, num_incomplete
         """
-        self.debug_print("Data: {}".format(data))
-        mr_tested = data.get("result_sets", [])[0].get("mr_tested")
-        estimated_total = data.get("result_sets", [])[0].get("estimated_total")
-
         results = data.get("result_sets", [])
         num_complete = 0
         num_incomplete = 0
 
         if len(results) > 0:
             rows = results[0].get("rows", [])
-            if len(rows) > 0:
-                self.debug_print("MR Tested/Estimated Total: {}/{}".format(mr_tested, estimated_total))
+            if self._debug_question_results and len(rows) > 0:
+                self.debug_print("MR Tested/Estimated Total: {}/{}".format(results[0].get("mr_tested"), results[0].get("estimated_total")))
                 self.debug_print("Rows in 'determine_num_results': {}".format(json.dumps(rows, indent=2)))
 
+            # A row is incomplete when any of its entries is one of the 'results unavailable' placeholders
             for row in rows:
-                row_data_elements = row.get("data", [])
-                incomplete_entry_found = False
-                # data section is a list of lists
-                for row_data_element in row_data_elements:
-                    for results_entry in row_data_element:
-                        results_text = results_entry.get("text", '')
-
-                        if results_text in TANIUMREST_RESULTS_UNAVAILABLE:
-                            incomplete_entry_found = True
-                            num_incomplete += 1
-                            break
-
-                    if incomplete_entry_found:
-                        break
+                if any(results_entry.get("text", '') in TANIUMREST_RESULTS_UNAVAILABLE
+                       for row_data_element in row.get("data", []) for results_entry in row_data_element):
+                    num_incomplete += 1
                 else:
                     num_complete += 1
 
         self.debug_print("Returning 'num_complete': {}, 'num_incomplete': {}".format(num_complete, num_incomplete))
         return num_complete, num_incomplete
 
+    def _get_question_result_info(self, endpoint, action_result):
+        """ Fetches the counters of a question's results without fetching the result rows.
+
+        :param endpoint: result data endpoint of the question
+        :param action_result: object of ActionResult class
+        :return: result info of the question, or None if it could not be fetched
+        """
+        info_endpoint = endpoint.replace(TANIUMREST_RESULT_DATA_PATH, TANIUMREST_RESULT_INFO_PATH)
+
+        ret_val, response = self._make_rest_call_helper(action_result, info_endpoint, verify=self._verify, params=None, headers=None)
+
+        if phantom.is_fail(ret_val):
+            return None
+
+        result_infos = response.get("data", {}).get("result_infos", [])
+
+        if not result_infos:
+            return None
+
+        return result_infos[0]
+
+    def _get_question_result_rows(self, endpoint, action_result):
+        """ Fetches all the rows of a question's results, one page at a time.
+
+        :param endpoint: result data endpoint of the question
+        :param action_result: object of ActionResult class
+        :return: response of the first page, with the rows of every page, or None on failure
+        """
+        params = {"row_start": 0, "row_count": TANIUMREST_RESULT_PAGE_SIZE}
+
+        ret_val, response = self._make_rest_call_helper(action_result, endpoint, verify=self._verify, params=dict(params), headers=None)
+
+        if phantom.is_fail(ret_val):
+            return None
+
+        result_sets = response.get("data", {}).get("result_sets", [])
+
+        if not result_sets:
+            return response
+
+        rows = result_sets[0].get("rows") or []
+        total_rows = result_sets[0].get("row_count") or 0
+
+        while rows and len(rows) < total_rows:
+            params["row_start"] = len(rows)
+
+            ret_val, page = self._make_rest_call_helper(action_result, endpoint, verify=self._verify, params=dict(params), headers=None)
+
+            if phantom.is_fail(ret_val):
+                return None
+
+            page_result_sets = page.get("data", {}).get("result_sets", [])
+            page_rows = page_result_sets[0].get("rows") if page_result_sets else None
+
+            if not page_rows:
+                break
+
+            rows.extend(page_rows)
+
+        result_sets[0]["rows"] = rows
+
+        return response
+
     def _question_result(self, timeout_seconds, results_percentage, endpoint, action_result,
                          wait_for_results_processing=None, return_when_n_results_available=None, wait_for_n_results_available=None):
 
         max_range = int(timeout_seconds / WAIT_SECONDS) + (1 if timeout_seconds % WAIT_SECONDS == 0 else 2)
+        question_id = os.path.basename(endpoint)
+        use_result_info = True
 
         for i in range(1, max_range):
             if timeout_seconds > WAIT_SECONDS:
@@ -641,24 +784,50 @@ class TaniumRestConnector(BaseConnector):
             else:
                 sleep(timeout_seconds - 1)
 
-            ret_val, response = self._make_rest_call_helper(action_result, endpoint, verify=self._verify, params=None, headers=None)
+            self.debug_print("Checking if Tanium question ID {} has completed and returned all results . . .".format(question_id))
 
-            if phantom.is_fail(ret_val):
+            # Poll the lightweight result counters until the results can be returned, and only then fetch the rows
+            if use_result_info:
+                result_info = self._get_question_result_info(endpoint, action_result)
+
+                if result_info is None:
+                    self.debug_print("Unable to fetch the result info of Tanium question ID {}. Polling the full results instead".format(question_id))
+                    use_result_info = False
+                else:
+                    mr_tested = result_info.get("mr_tested")
+                    estimated_total = result_info.get("estimated_total")
+
+                    if not (mr_tested and estimated_total):
+                        continue
+
+                    percentage_returned = float(mr_tested) / float(estimated_total) * 100
+                    row_count = result_info.get("row_count") or 0
+
+                    if int(percentage_returned) < int(results_percentage) and not (return_when_n_results_available and row_count >= return_when_n_results_available):
+                        self.debug_print("Tanium question ID {} is {}% done out of {}%. Waiting for more results . . .".format(question_id, percentage_returned, results_percentage))
+                        continue
+
+            response = self._get_question_result_rows(endpoint, action_result)
+
+            if response is None:
                 return None
 
             # Checking to see if all the results have been returned by the question. Keeps questioning until all results have been returned.
-            question_id = os.path.basename(endpoint)
-            self.debug_print("Checking if Tanium question ID {} has completed and returned all results . . .".format(question_id))
             data = response.get("data", {})
-            mr_tested = data.get("result_sets", [])[0].get("mr_tested")
-            estimated_total = data.get("result_sets", [])[0].get("estimated_total")
+            result_sets = data.get("result_sets", [])
+            mr_tested = result_sets[0].get("mr_tested") if result_sets else None
+            estimated_total = result_sets[0].get("estimated_total") if result_sets else None
             if mr_tested and estimated_total:
                 percentage_returned = float(mr_tested) / float(estimated_total) * 100
                 self.debug_print("mr_tested: {} | est_total: {} | perc_returned: {} | results_perc: {}".format(mr_tested, estimated_total,
                                                                                                                percentage_returned, results_percentage))
 
                 # incomplete is when a sensor returns the value 'current results unavailable'
-                num_results_complete, num_results_incomplete = self._determine_num_results_complete(data)
+                if wait_for_results_processing or return_when_n_results_available or wait_for_n_results_available:
+                    num_results_complete, num_results_incomplete = self._determine_num_results_complete(data)
+                else:
+                    num_results_complete, num_results_incomplete = 0, 0
+
                 if wait_for_results_processing:
                     num_results = num_results_complete
                 else:
@@ -684,7 +853,7 @@ class TaniumRestConnector(BaseConnector):
             else:
                 continue
 
-            if data.get("result_sets", [])[0].get("columns"):
+            if result_sets[0].get("columns"):
                 return response
 
         else:
@@ -712,13 +881,11 @@ class TaniumRestConnector(BaseConnector):
 
         if group_name:
             endpoint = TANIUMREST_GET_GROUP.format(group_name=group_name)
-            ret_val, response = self._make_rest_call_helper(action_result, endpoint, verify=self._verify, params=None, headers=None)
+            ret_val, response_data = self._get_metadata_by_name(action_result, "group", endpoint, group_name)
 
             if phantom.is_fail(ret_val):
                 return action_result.get_status()
 
-            response_data = response.get("data")
-
             if not response_data:
                 return action_result.set_status(phantom.APP_ERROR, "No group exists with name {}. \
                         Also, please verify that your account has sufficient permissions to access the groups".format(group_name))
@@ -785,14 +952,11 @@ class TaniumRestConnector(BaseConnector):
 
         action_result = self.add_action_result(ActionResult(dict(param)))
         query_text = param['query_text']
-        data = {"text": query_text}
 
-        ret_val, response = self._make_rest_call_helper(action_result, TANIUMREST_PARSE_QUESTION, verify=self._verify, params=None, headers=None, json=data, method="post")
+        ret_val, parsed_questions = self._parse_question_text(action_result, query_text)
         if phantom.is_fail(ret_val):
             return action_result.get_status()
 
-        parsed_questions = response.get("data", [])
-
         for question in parsed_questions:
             action_result.add_data(question)
 
@@ -932,12 +1096,10 @@ class TaniumRestConnector(BaseConnector):
         for sensor in sensors:
             sensor_name = sensor["name"]
             endpoint = TANIUMREST_GET_SENSOR_BY_NAME.format(sensor_name=sensor_name)
-            ret_val, response = self._make_rest_call_helper(action_result, endpoint, verify=self._verify)
+            ret_val, response_data = self._get_metadata_by_name(action_result, "sensor", endpoint, sensor_name)
             if phantom.is_fail(ret_val):
                 action_result.set_status(phantom.APP_ERROR, "Failed to get sensor definition from Tanium")
                 return
-
-            response_data = response.get("data")
             if not response_data:
                 action_result.set_status(phantom.APP_ERROR, "No sensor exists with name {}. \
                         Please verify that your account has sufficient permissions to access the sensors".format(sensor_name))
@@ -1006,14 +1168,12 @@ class TaniumRestConnector(BaseConnector):
         # If a group_name was supplied, validate the group name is valid
         if group_name:
             endpoint = TANIUMREST_GET_GROUP.format(group_name=group_name)
-            ret_val, response = self._make_rest_call_helper(action_result, endpoint, verify=self._verify, params=None, headers=None)
+            ret_val, response_data = self._get_metadata_by_name(action_result, "group", endpoint, group_name)
 
             if phantom.is_fail(ret_val):
                 action_result.set_status(phantom.APP_ERROR, "Failed to get group. Please provide a valid group name")
                 return
 
-            response_data = response.get("data")
-
             if not response_data:
                 action_result.set_status(phantom.APP_ERROR, "No group exists with name {}. \
                         Also, please verify that your account has sufficient permissions to access the groups".format(group_name))
@@ -1029,30 +1189,26 @@ class TaniumRestConnector(BaseConnector):
 
         # Before executing the query, run the query text against the /parse_question
         # to ensure the query is in a valid Tanium syntax
-        query_to_parse = {"text": query_text}
-
-        ret_val, response = self._make_rest_call_helper(action_result, TANIUMREST_PARSE_QUESTION, verify=self._verify, params=None, headers=None,
-                                                        json=query_to_parse, method="post")
-        self.save_progress("Parsed Question:\n{}".format(json.dumps(response)))
+        ret_val, parsed_questions = self._parse_question_text(action_result, query_text)
 
         if phantom.is_fail(ret_val):
             self.debug_print("Failed to parse question")
             return
 
-        if len(response.get("data")) != 1:
+        if len(parsed_questions) != 1:
             action_result.set_status(phantom.APP_ERROR, "Please provide a valid parsed question accepted by Tanium server")
             return
 
-        resp_text = response.get("data")[0].get("question_text", "").lower().replace('"', '').replace("'", "")
+        resp_text = parsed_questions[0].get("question_text", "").lower().replace('"', '').replace("'", "")
         query_text_updated = query_text.lower().replace('"', '').replace("'", "")
 
         if resp_text != query_text_updated:
             action_result.set_status(phantom.APP_ERROR, "Please provide a valid parsed question accepted by Tanium server")
             return
 
-        if response["data"][0].get("parameter_values"):
+        if parsed_questions[0].get("parameter_values"):
             self.save_progress("Making a parameterized query")
-            parameterized_data = self._parameterize_query(response.get("data")[0], action_result)
+            parameterized_data = self._parameterize_query(parsed_questions[0], action_result)
             if not parameterized_data:
                 # Something failed
                 return
@@ -1060,7 +1216,7 @@ class TaniumRestConnector(BaseConnector):
             data.update(parameterized_data)
         else:
             self.save_progress("Making a non-parameterized query")
-            data.update(response.get("data")[0])
+            data.update(parsed_questions[0])
 
         return data
 
@@ -1141,6 +1297,7 @@ class TaniumRestConnector(BaseConnector):
         self._password = config['password']
         self._verify = config.get('verify_server_cert', False)
         self._percentage = config.get('results_percentage', 99)
+        self._debug_question_results = config.get('debug_question_results', False)
 
         # Integer validation for 'results_percentage' configuration parameter
         ret_val, self._percentage = self._validate_integer(self, self._percentage, RESULTS_PERCENTAGE_KEY, True)
@@ -1149,6 +1306,11 @@ class TaniumRestConnector(BaseConnector):
         if self._percentage > 100:
             return self.set_status(phantom.APP_ERROR, "Please provide a valid integer in range of 0-100 in {}".format(RESULTS_PERCENTAGE_KEY))
 
+        # Integer validation for 'metadata_cache_ttl' configuration parameter
+        ret_val, self._metadata_cache_ttl = self._validate_integer(self, config.get('metadata_cache_ttl', 15), METADATA_CACHE_TTL_KEY, True)
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
         self._base_url = self._handle_py_ver_compat_for_input_str(config['base_url'])
 
         # removing single occurrence of trailing back-slash or forward-slash
@@ -15,8 +15,12 @@ TANIUMREST_GET_PACKAGE = "/api/v2/packages/by-name/{package}"
 TANIUMREST_GET_SAVED_QUESTION = "/api/v2/saved_questions/by-name/{saved_question}"
 TANIUMREST_GET_SENSOR_BY_NAME = "/api/v2/sensors/by-name/{sensor_name}"
 TANIUMREST_GET_SAVED_QUESTION_RESULT = "/api/v2/result_data/saved_question/{saved_question_id}"
+TANIUMREST_RESULT_DATA_PATH = "/result_data/"
+TANIUMREST_RESULT_INFO_PATH = "/result_info/"
+TANIUMREST_RESULT_PAGE_SIZE = 5000
 WAIT_SECONDS = 5
-TANIUMREST_RESULTS_UNAVAILABLE = ["[current results unavailable]", "[current result unavailable]", "[results currently unavailable]"]
+TANIUMREST_STATE_METADATA_CACHE = "metadata_cache"
+TANIUMREST_RESULTS_UNAVAILABLE = frozenset(["[current results unavailable]", "[current result unavailable]", "[results currently unavailable]"])
 
 # Constants relating to 'get_error_message_from_exception'
 ERR_CODE_MSG = "Error code unavailable"
@@ -33,5 +37,6 @@ ISSUE_SECONDS_KEY = "'issue_seconds' action parameter"
 TIMEOUT_SECONDS_KEY = "'timeout_seconds' action parameter"
 RETURN_WHEN_N_RESULTS_AVAILABLE_KEY = "'return_when_n_results_available' action parameter"
 WAIT_FOR_N_RESULTS_AVAILABLE_KEY = "'wait_for_n_results_available' action parameter"
+METADATA_CACHE_TTL_KEY = "'How long to cache package, group, sensor and parsed question details' configuration parameter"
 RESULTS_PERCENTAGE_KEY = "'Consider question results complete at' configuration parameter"
 QUESTION_ID_KEY = "'question_id' action parameter"
@@ -12,11 +12,13 @@ from taniumthreatresponse_consts import *
 
 import requests
 import tempfile
+import hashlib
 import datetime
 import json
 import uuid
 import os
 import sys
+import threading
 from bs4 import BeautifulSoup
 from bs4 import UnicodeDammit
 
@@ -40,6 +42,7 @@ class TaniumThreatResponseConnector(BaseConnector):
         # modify this as you deem fit.
         self._base_url = None
         self._session_key = None
+        self._session_key_lock = threading.Lock()
 
     def _handle_py_ver_compat_for_input_str(self, input_str):
         """
@@ -249,7 +252,27 @@ class TaniumThreatResponseConnector(BaseConnector):
 
         return phantom.APP_SUCCESS
 
-    def _make_rest_call_helper(self, endpoint, action_result, headers=None, params=None, data=None, json=None, method="get"):
+    def _get_session_key(self, action_result, expired_session_key=None):
+        """ This function is used to get the current session key, generating one when there is none or when it has expired.
+
+        The workers of the collect events action share the session key, so only the first of them that sees it rejected
+        generates a new one, the others pick up the refreshed key.
+
+        :param action_result: Object of action result
+        :param expired_session_key: session key that was rejected by the server
+        :return: status(phantom.APP_SUCCESS/phantom.APP_ERROR), session key
+        """
+        with self._session_key_lock:
+            if self._session_key and self._session_key != expired_session_key:
+                return RetVal(phantom.APP_SUCCESS, self._session_key)
+
+            ret_val = self._get_token(action_result)
+            if phantom.is_fail(ret_val):
+                return RetVal(action_result.get_status(), None)
+
+            return RetVal(phantom.APP_SUCCESS, self._session_key)
+
+    def _make_rest_call_helper(self, endpoint, action_result, headers=None, params=None, data=None, json=None, method="get", stream=False):
         """ Function that helps setting REST call to the app.
 
         :param endpoint: REST endpoint that needs to appended to the service address
@@ -259,7 +282,7 @@ class TaniumThreatResponseConnector(BaseConnector):
         :param data: request body
         :param json: JSON object
         :param method: GET/POST/PUT/DELETE/PATCH (Default will be GET)
-        :param verify: verify server certificate (Default True)
+        :param stream: leave the body of a file download unread so it can be streamed (Default False)
         :return: status phantom.APP_ERROR/phantom.APP_SUCCESS(along with appropriate message),
         response obtained by making an API call
         """
@@ -273,36 +296,35 @@ class TaniumThreatResponseConnector(BaseConnector):
         if headers is None:
             headers = {}
 
-        if not self._session_key:
-            ret_val = self._get_token(action_result)
-            if phantom.is_fail(ret_val):
-                return action_result.get_status(), None
+        ret_val, session_key = self._get_session_key(action_result)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status(), None
 
-        headers.update({'session': str(self._session_key)})
+        headers.update({'session': str(session_key)})
         if 'Content-Type' not in headers.keys():
             headers.update({'Content-Type': 'application/json'})
 
-        ret_val, resp_json = self._make_rest_call(url, action_result, verify=self._verify, headers=headers, params=params, data=data, json=json, method=method)
+        ret_val, resp_json = self._make_rest_call(url, action_result, verify=self._verify, headers=headers, params=params, data=data, json=json, method=method, stream=stream)
 
         # If token is expired, generate a new token
         msg = action_result.get_message()
 
         if msg and ("HTTP 401: Unauthorized" in msg or "403" in msg):
-            ret_val = self._get_token(action_result)
+            ret_val, session_key = self._get_session_key(action_result, expired_session_key=session_key)
             if phantom.is_fail(ret_val):
                 return action_result.get_status(), None
-            headers.update({'session': str(self._session_key)})
+            headers.update({'session': str(session_key)})
             if 'Content-Type' not in headers.keys():
                 headers.update({'Content-Type': 'application/json'})
 
-            ret_val, resp_json = self._make_rest_call(url, action_result, verify=self._verify, headers=headers, params=params, data=data, json=json, method=method)
+            ret_val, resp_json = self._make_rest_call(url, action_result, verify=self._verify, headers=headers, params=params, data=data, json=json, method=method, stream=stream)
 
         if phantom.is_fail(ret_val):
             return action_result.get_status(), None
 
         return phantom.APP_SUCCESS, resp_json
 
-    def _make_rest_call(self, endpoint, action_result, verify=True, headers=None, params=None, data=None, json=None, auth=None, method="get"):
+    def _make_rest_call(self, endpoint, action_result, verify=True, headers=None, params=None, data=None, json=None, auth=None, method="get", stream=False):
         """ Function that makes the REST call to the app.
 
         :param endpoint: REST endpoint that needs to appended to the service address
@@ -313,6 +335,7 @@ class TaniumThreatResponseConnector(BaseConnector):
         :param json: JSON object
         :param method: GET/POST/PUT/DELETE/PATCH (Default will be GET)
         :param verify: verify server certificate (Default True)
+        :param stream: leave the body of a file download unread so it can be streamed (Default False)
         :return: status phantom.APP_ERROR/phantom.APP_SUCCESS(along with appropriate message),
         response obtained by making an API call
         """
@@ -324,7 +347,7 @@ class TaniumThreatResponseConnector(BaseConnector):
             return RetVal(action_result.set_status(phantom.APP_ERROR, "Invalid method: {0}".format(method)), resp_json)
 
         try:
-            r = request_func(endpoint, json=json, data=data, headers=headers, verify=verify, auth=auth, params=params)
+            r = request_func(endpoint, json=json, data=data, headers=headers, verify=verify, auth=auth, params=params, stream=stream)
         except requests.exceptions.InvalidSchema:
             error_message = 'Error connecting to server. No connection adapters were found for %s' % (endpoint)
             return RetVal(action_result.set_status(phantom.APP_ERROR, error_message), resp_json)
@@ -358,14 +381,11 @@ class TaniumThreatResponseConnector(BaseConnector):
 
         return RetVal(phantom.APP_SUCCESS, filename)
 
-    def _save_temp_file(self, content):
-        """
-
-        Args:
-            content:
+    def _create_temp_file(self):
+        """ Create an empty file in a new directory under the Vault temp directory.
 
         Returns:
-
+            tuple: path of the new directory, path of the temp file
         """
 
         if hasattr(Vault, 'get_vault_tmp_dir'):
@@ -381,10 +401,50 @@ class TaniumThreatResponseConnector(BaseConnector):
                                                delete=False)
         file_obj.close()
 
-        with open(file_obj.name, 'wb') as f:
-            f.write(content)
+        return temp_dir, file_obj.name
+
+    def _remove_temp_file(self, temp_dir, temp_name):
+        """ Remove a temp file created by _create_temp_file along with its directory. """
+
+        try:
+            os.remove(temp_name)
+            os.rmdir(temp_dir)
+        except OSError as e:
+            self.debug_print('Unable to remove temp file {}. {}'.format(temp_name, self._get_error_message_from_exception(e)))
+
+    def _save_temp_file(self, response):
+        """ Stream the body of a file download into a new file in the Vault temp directory.
 
-        return file_obj.name
+        The body is read in chunks so that large snapshots and files never need to be
+        held in memory. The size and SHA256 of the content are computed along the way.
+
+        Args:
+            response (Response): streamed response from a file download request
+
+        Returns:
+            tuple: path of the temp file, size of the content in bytes, SHA256 hex digest
+        """
+
+        temp_dir, temp_name = self._create_temp_file()
+
+        size = 0
+        sha256 = hashlib.sha256()
+        try:
+            with open(temp_name, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=TANIUMTHREATRESPONSE_DOWNLOAD_CHUNK_SIZE):
+                    if not chunk:
+                        continue
+                    f.write(chunk)
+                    size += len(chunk)
+                    sha256.update(chunk)
+        except Exception:
+            # Do not leave a partial download behind in the Vault temp directory
+            self._remove_temp_file(temp_dir, temp_name)
+            raise
+        finally:
+            response.close()
+
+        return temp_name, size, sha256.hexdigest()
 
     def _list_connections(self, action_result):
         """ Return a list of current connections.
@@ -786,30 +846,31 @@ class TaniumThreatResponseConnector(BaseConnector):
         directory = UnicodeDammit(param['directory'].strip()).unicode_markup.encode('utf-8')
         filename = UnicodeDammit(param['filename'].strip()).unicode_markup.encode('utf-8')
         endpoint = '/plugin/products/trace/locals/{}/{}'.format(directory, filename)
-        ret_val, response = self._make_rest_call_helper(endpoint, action_result)
+        ret_val, response = self._make_rest_call_helper(endpoint, action_result, stream=True)
 
         if phantom.is_fail(ret_val):
             self.save_progress('Get local snapshot failed')
             return action_result.get_status()
 
-        metadata = {
-            'size': len(response.content),
-            'contains': ['threatresponse snapshot'],
-            'action': self.get_action_name(),
-            'app_run_id': self.get_app_run_id()
-        }
-
         file_name = '{}_{}'.format(directory, filename)
 
         # Save file
         self.send_progress('Saving file to disk')
         try:
-            temp_name = self._save_temp_file(response.content)
+            temp_name, size, sha256 = self._save_temp_file(response)
         except Exception as e:
             err = self._get_error_message_from_exception(e)
             self.debug_print('Error creating file')
             return action_result.set_status(phantom.APP_ERROR, 'Error creating file. {}'.format(err))
 
+        metadata = {
+            'size': size,
+            'sha256': sha256,
+            'contains': ['threatresponse snapshot'],
+            'action': self.get_action_name(),
+            'app_run_id': self.get_app_run_id()
+        }
+
         vault = Vault.add_attachment(temp_name, self.get_container_id(), file_name=file_name, metadata=metadata)
         if filename:
             vault['file_name'] = file_name
@@ -1072,52 +1133,33 @@ class TaniumThreatResponseConnector(BaseConnector):
         self.save_progress('Get children process tree Successful')
         return action_result.set_status(phantom.APP_SUCCESS, 'Children process tree retrieved')
 
-    def _handle_get_events(self, param):
-        """ Return events and number of events of a certain type where the value exists in one or more
-        of the queried fields from an existing connection.
+    def _get_event_filter_params(self, action_result, param):
+        """ Build the query parameters of an event search from the fields, operators, value and filter_type parameters.
 
         Args:
+            action_result (ActionResult): object of ActionResult class
             param (dict): Parameters sent in by a user or playbook
 
         Returns:
-            ActionResult status: success/failure
+            RetVal:
+                * ActionResult: status success/failure
+                * dict or None: query parameters of the filter
         """
 
-        self.save_progress('In action handler for: {0}'.format(self.get_action_identifier()))
-        action_result = self.add_action_result(ActionResult(dict(param)))
-
-        event_type = self._handle_py_ver_compat_for_input_str(param['event_type'])
-        if event_type not in EVENT_TYPE_VALUE_LIST:
-            return action_result.set_status(phantom.APP_ERROR, "Please provide valid input from {} in 'event_type' action parameter".format(EVENT_TYPE_VALUE_LIST))
-
-        ret_val, limit = self._validate_integer(action_result, param.get('limit'), LIMIT_KEY, False)
-        if phantom.is_fail(ret_val):
-            return action_result.get_status()
-
-        ret_val, offset = self._validate_integer(action_result, param.get('offset'), OFFSET_KEY)
-        if phantom.is_fail(ret_val):
-            return action_result.get_status()
-
-        sort = self._handle_py_ver_compat_for_input_str(param.get('sort'))
         fields = self._handle_py_ver_compat_for_input_str(param.get('fields'))
         operators = self._handle_py_ver_compat_for_input_str(param.get('operators'))
         value = self._handle_py_ver_compat_for_input_str(param.get('value'))
-        cid = self._handle_py_ver_compat_for_input_str(param['connection_id'])
-
-        if not self._is_connection_active(action_result, cid):
-            self.save_progress('Inactive or non-existent connection')
-            return action_result.get_status()
 
         params = {}
 
         if fields or value or operators:
             if not (fields and value and operators):
-                return action_result.set_status(phantom.APP_ERROR, 'fields, operators, and value need to be filled in to query events. Returning all results')
+                return RetVal(action_result.set_status(phantom.APP_ERROR, 'fields, operators, and value need to be filled in to query events. Returning all results'), None)
             else:
 
                 filter_type = self._handle_py_ver_compat_for_input_str(param.get("filter_type", "all"))
                 if filter_type and filter_type not in FILTER_TYPE_VALUE_LIST:
-                    return action_result.set_status(phantom.APP_ERROR, "Please provide valid input from {} in 'filter_type' action parameter".format(FILTER_TYPE_VALUE_LIST))
+                    return RetVal(action_result.set_status(phantom.APP_ERROR, "Please provide valid input from {} in 'filter_type' action parameter".format(FILTER_TYPE_VALUE_LIST)), None)
 
                 fields = [field.strip() for field in fields.split(',')]
                 fields = list(filter(None, fields))
@@ -1129,7 +1171,7 @@ class TaniumThreatResponseConnector(BaseConnector):
                 operators = list(filter(None, operators))
 
                 if not (len(fields) == len(value) and len(value) == len(operators)):
-                    return action_result.set_status(phantom.APP_ERROR, "Length of value, fields , and operators must be equal")
+                    return RetVal(action_result.set_status(phantom.APP_ERROR, "Length of value, fields , and operators must be equal"), None)
 
                 group_list = []
 
@@ -1142,6 +1184,45 @@ class TaniumThreatResponseConnector(BaseConnector):
                 params["gm1"] = filter_type
                 params["g1"] = ",".join(group_list)
 
+        return RetVal(phantom.APP_SUCCESS, params)
+
+    def _handle_get_events(self, param):
+        """ Return events and number of events of a certain type where the value exists in one or more
+        of the queried fields from an existing connection.
+
+        Args:
+            param (dict): Parameters sent in by a user or playbook
+
+        Returns:
+            ActionResult status: success/failure
+        """
+
+        self.save_progress('In action handler for: {0}'.format(self.get_action_identifier()))
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        event_type = self._handle_py_ver_compat_for_input_str(param['event_type'])
+        if event_type not in EVENT_TYPE_VALUE_LIST:
+            return action_result.set_status(phantom.APP_ERROR, "Please provide valid input from {} in 'event_type' action parameter".format(EVENT_TYPE_VALUE_LIST))
+
+        ret_val, limit = self._validate_integer(action_result, param.get('limit'), LIMIT_KEY, False)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        ret_val, offset = self._validate_integer(action_result, param.get('offset'), OFFSET_KEY)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        sort = self._handle_py_ver_compat_for_input_str(param.get('sort'))
+        cid = self._handle_py_ver_compat_for_input_str(param['connection_id'])
+
+        if not self._is_connection_active(action_result, cid):
+            self.save_progress('Inactive or non-existent connection')
+            return action_result.get_status()
+
+        ret_val, params = self._get_event_filter_params(action_result, param)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
         endpoint = '/plugin/products/trace/conns/{0}/{1}/eventsCount'.format(cid, event_type)
 
         ret_val, response = self._make_rest_call_helper(endpoint, action_result, params=params)
@@ -1219,6 +1300,169 @@ class TaniumThreatResponseConnector(BaseConnector):
         message = 'Number of categories found: {}'.format(summary.get('total_categories'))
         return action_result.set_status(phantom.APP_SUCCESS, message)
 
+    def _collect_event_type(self, cid, event_type, params, page_size, max_events, out_file, locks, results):
+        """ Page through the events of one type and append them to the shared JSON-lines file.
+
+        Runs on a worker thread of 'collect events', so failures are recorded in results
+        instead of on the action result shared by all the event types.
+
+        Args:
+            cid (str): Connection ID
+            event_type (str): Type of event to collect
+            params (dict): Query parameters of the filter shared by all the event types
+            page_size (int): Number of events to request per page
+            max_events (int): Maximum number of events to collect, None for all of them
+            out_file (file): JSON-lines file the events are written to
+            locks (tuple): semaphore bounding the concurrent requests, lock guarding out_file
+            results (dict): collection result of each event type
+        """
+
+        worker_semaphore, write_lock = locks
+        type_result = ActionResult()
+        endpoint = '/plugin/products/trace/conns/{0}/{1}/events'.format(cid, event_type)
+        page_params = dict(params)
+        collected = 0
+
+        with worker_semaphore:
+            try:
+                while True:
+                    page_params['limit'] = min(page_size, max_events - collected) if max_events else page_size
+                    page_params['offset'] = collected
+
+                    ret_val, response = self._make_rest_call_helper(endpoint, type_result, params=page_params)
+
+                    if phantom.is_fail(ret_val):
+                        results[event_type] = {'type': event_type, 'event_count': collected, 'status': 'failed', 'message': type_result.get_message()}
+                        return
+
+                    if not response:
+                        break
+
+                    lines = ''.join('{}\n'.format(json.dumps({'type': event_type, 'event': event})) for event in response)
+                    with write_lock:
+                        out_file.write(lines)
+
+                    collected += len(response)
+                    self.send_progress('Collected {} {} events'.format(collected, event_type))
+
+                    if len(response) < page_params['limit'] or (max_events and collected >= max_events):
+                        break
+            except Exception as e:
+                err = self._get_error_message_from_exception(e)
+                results[event_type] = {'type': event_type, 'event_count': collected, 'status': 'failed', 'message': err}
+                return
+
+        results[event_type] = {'type': event_type, 'event_count': collected, 'status': 'success', 'message': 'Events collected'}
+
+    def _handle_collect_events(self, param):
+        """ Collect events of several types from an existing connection into a JSON-lines file in the Vault.
+
+        The connection is checked once, then the event types are paged through concurrently
+        with the same filter. Each line of the file is a JSON object with the event type and the event.
+
+        Args:
+            param (dict): Parameters sent in by a user or playbook
+
+        Returns:
+            ActionResult status: success/failure
+        """
+
+        self.save_progress('In action handler for: {0}'.format(self.get_action_identifier()))
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        cid = self._handle_py_ver_compat_for_input_str(param['connection_id'])
+
+        event_types = self._handle_py_ver_compat_for_input_str(param.get('event_types'))
+        if event_types:
+            event_types = [event_type.strip() for event_type in event_types.split(',')]
+            event_types = [event_type for i, event_type in enumerate(event_types) if event_type and event_type not in event_types[:i]]
+        else:
+            event_types = COLLECT_EVENTS_DEFAULT_TYPES
+
+        invalid_types = [event_type for event_type in event_types if event_type not in EVENT_TYPE_VALUE_LIST]
+        if invalid_types or not event_types:
+            return action_result.set_status(phantom.APP_ERROR, "Please provide a comma-separated list of values from {} in 'event_types' action parameter".format(EVENT_TYPE_VALUE_LIST))
+
+        ret_val, page_size = self._validate_integer(action_result, param.get('page_size', COLLECT_EVENTS_DEFAULT_PAGE_SIZE), PAGE_SIZE_KEY, False)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        ret_val, max_events = self._validate_integer(action_result, param.get('max_events'), MAX_EVENTS_KEY, False)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        ret_val, params = self._get_event_filter_params(action_result, param)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        sort = self._handle_py_ver_compat_for_input_str(param.get('sort'))
+        if sort:
+            params['sort'] = sort
+
+        if not self._is_connection_active(action_result, cid):
+            self.save_progress('Inactive or non-existent connection')
+            return action_result.get_status()
+
+        try:
+            temp_dir, temp_name = self._create_temp_file()
+        except Exception as e:
+            err = self._get_error_message_from_exception(e)
+            return action_result.set_status(phantom.APP_ERROR, 'Error creating file. {}'.format(err))
+
+        results = {}
+        locks = (threading.BoundedSemaphore(COLLECT_EVENTS_MAX_WORKERS), threading.Lock())
+
+        self.save_progress('Collecting {} event types'.format(len(event_types)))
+        with open(temp_name, 'w') as out_file:
+            workers = []
+            for event_type in event_types:
+                worker = threading.Thread(target=self._collect_event_type,
+                                          args=(cid, event_type, params, page_size, max_events, out_file, locks, results))
+                worker.daemon = True
+                worker.start()
+                workers.append(worker)
+
+            for worker in workers:
+                worker.join()
+
+        failed_types = []
+        total_events = 0
+        for event_type in event_types:
+            result = results.get(event_type, {'type': event_type, 'event_count': 0, 'status': 'failed', 'message': 'Unknown error'})
+            if result['status'] == 'failed':
+                failed_types.append(event_type)
+            total_events += result['event_count']
+            action_result.add_data(result)
+
+        summary = action_result.update_summary({})
+        summary['total_events'] = total_events
+        summary['failed_event_types'] = len(failed_types)
+
+        if not total_events:
+            self._remove_temp_file(temp_dir, temp_name)
+            if len(failed_types) == len(event_types):
+                return action_result.set_status(phantom.APP_ERROR, 'Failed to collect events of any type')
+            return action_result.set_status(phantom.APP_SUCCESS, 'No events found')
+
+        metadata = {
+            'size': os.path.getsize(temp_name),
+            'contains': [],
+            'action': self.get_action_name(),
+            'app_run_id': self.get_app_run_id()
+        }
+        file_name = '{}_events.jsonl'.format(cid)
+
+        vault = Vault.add_attachment(temp_name, self.get_container_id(), file_name=file_name, metadata=metadata)
+        if not vault.get('succeeded'):
+            return action_result.set_status(phantom.APP_ERROR, 'Error adding file to the vault. {}'.format(vault.get('message')))
+        summary['vault_id'] = vault.get('vault_id')
+
+        self.save_progress('Collect Events Successful')
+        message = 'Collected {} events to vault'.format(total_events)
+        if failed_types:
+            message = '{}. Failed event types: {}'.format(message, ', '.join(failed_types))
+        return action_result.set_status(phantom.APP_SUCCESS, message)
+
     def _handle_list_files(self, param):
         """ Return list of saved files and number of files.
 
@@ -1331,14 +1575,24 @@ class TaniumThreatResponseConnector(BaseConnector):
             return action_result.get_status()
 
         endpoint = '/plugin/products/trace/filedownloads/{file_id}'.format(file_id=file_id)
-        ret_val, response = self._make_rest_call_helper(endpoint, action_result)
+        ret_val, response = self._make_rest_call_helper(endpoint, action_result, stream=True)
 
         if phantom.is_fail(ret_val):
             self.save_progress('Get File Failed')
             return action_result.get_status()
 
+        # Save file
+        self.send_progress('Saving file to disk')
+        try:
+            temp_name, size, sha256 = self._save_temp_file(response)
+        except Exception as e:
+            err = self._get_error_message_from_exception(e)
+            self.debug_print('Error creating file')
+            return action_result.set_status(phantom.APP_ERROR, 'Error creating file. {}'.format(err))
+
         metadata = {
-            'size': len(response.content),
+            'size': size,
+            'sha256': sha256,
             'contains': [],
             'action': self.get_action_name(),
             'app_run_id': self.get_app_run_id()
@@ -1347,15 +1601,6 @@ class TaniumThreatResponseConnector(BaseConnector):
         # Get file name from Tanium, if it exists
         ret_val, filename = self._get_filename_from_tanium(action_result, file_id)
 
-        # Save file
-        self.send_progress('Saving file to disk')
-        try:
-            temp_name = self._save_temp_file(response.content)
-        except Exception as e:
-            err = self._get_error_message_from_exception(e)
-            self.debug_print('Error creating file')
-            return action_result.set_status(phantom.APP_ERROR, 'Error creating file. {}'.format(err))
-
         if phantom.is_fail(ret_val) or not filename:
             filename = temp_name.split('/')[-1]
 
@@ -1548,6 +1793,7 @@ class TaniumThreatResponseConnector(BaseConnector):
             'get_children_process_tree': self._handle_get_children_process_tree,
             'get_events': self._handle_get_events,
             'get_events_summary': self._handle_get_events_summary,
+            'collect_events': self._handle_collect_events,
             'list_files': self._handle_list_files,
             'save_file': self._handle_save_file,
             'delete_file': self._handle_delete_file,
@@ -18,8 +18,18 @@ LIMIT_KEY = "'limit' action parameter"
 OFFSET_KEY = "'offset' action parameter"
 FILE_ID_KEY = "'file_id' action parameter"
 INTEL_DOC_ID_KEY = "'intel_doc_id' action parameter"
+PAGE_SIZE_KEY = "'page_size' action parameter"
+MAX_EVENTS_KEY = "'max_events' action parameter"
 
 # Constants relating to value_list check
 DSTTYPE_VALUE_LIST = ["computer_name", "ip_address"]
 EVENT_TYPE_VALUE_LIST = ["combined", "dns", "driver", "file", "network", "process", "registry", "sid", "image"]
 FILTER_TYPE_VALUE_LIST = ["any", "all"]
+
+# Constants relating to file downloads
+TANIUMTHREATRESPONSE_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Constants relating to 'collect events'
+COLLECT_EVENTS_DEFAULT_TYPES = ["dns", "driver", "file", "network", "process", "registry", "sid", "image"]
+COLLECT_EVENTS_DEFAULT_PAGE_SIZE = 500
+COLLECT_EVENTS_MAX_WORKERS = 4